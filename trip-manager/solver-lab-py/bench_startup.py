@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import List, Optional
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+CLI = os.path.join(ROOT, "cli.py")
+SAMPLE_INPUT = os.path.join(os.path.dirname(ROOT), "solver-lab", "examples", "sample-input.json")
+# Cold `--help` measures ~60-90 ms on a dev laptop (interpreter start
+# included); loading ortools up front costs another ~400 ms.
+DEFAULT_BUDGET_MS = 250
+
+# Modules that must stay out of light commands.
+HEAVY_MODULES = ("ortools", "google.protobuf", "numpy")
+IMPORT_PROBE = (
+    "import sys; sys.argv = ['cli.py']; sys.path.insert(0, {root!r}); import cli; "
+    "print(','.join(name for name in {modules!r} if name in sys.modules))"
+)
+
+
+def _time_command(command: List[str], repeat: int) -> float:
+    samples: List[float] = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        subprocess.run(command, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def _parse_args(argv: Optional[List[str]]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Cold-start budget for cli.py light commands")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS, help="median wall-time budget")
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--in", dest="input_path", default=SAMPLE_INPUT, help="input for the validate probe")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = _parse_args(argv)
+    failed = False
+
+    probe = subprocess.run(
+        [sys.executable, "-c", IMPORT_PROBE.format(root=ROOT, modules=HEAVY_MODULES)],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    loaded = probe.stdout.strip()
+    if probe.returncode != 0 or loaded:
+        print(f"FAIL import cli: heavy modules loaded: {loaded or probe.stderr.strip()}")
+        failed = True
+    else:
+        print("ok   import cli: no heavy modules loaded")
+
+    commands = {"--help": [sys.executable, CLI, "--help"]}
+    if os.path.isfile(args.input_path):
+        commands["validate"] = [sys.executable, CLI, "validate", "--in", args.input_path]
+    for name, command in commands.items():
+        median_ms = _time_command(command, max(1, args.repeat))
+        over = median_ms > args.budget_ms
+        failed = failed or over
+        print(f"{'FAIL' if over else 'ok  '} {name}: median {median_ms:.0f} ms (budget {args.budget_ms:.0f} ms)")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -10,111 +10,945 @@ from __future__ import annotations
 import argparse
 import json
 import os
+import signal
 import sys
+import threading
 import time
-from typing import Any, Dict
+from typing import List, Optional
 
+from solver_lab.insert_group import insert_group, load_insert_request
+from solver_lab.jsonio import read_json, write_json, write_json_atomic
+from solver_lab.model_cp_sat import is_cp_sat_available
 from solver_lab.normalize import normalize_input
-from solver_lab.precheck import run_precheck
-from solver_lab.solve_feasible import solve_feasible
-from solver_lab.optimize_lns import optimize_with_lns
-from solver_lab.validate import validate_solution
-from solver_lab.exporter import build_result_payload, build_report_payload
+from solver_lab.pipeline import build_config, run_pipeline
+from solver_lab.progress import ProgressEmitter, open_progress_stream
+from solver_lab.replan import load_previous_assignments
+from solver_lab.result_cache import ResultCache
 
+DEFAULT_CHECKPOINT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "runs", "checkpoints")
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "runs", "cache")
+DEFAULT_HISTORY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "runs")
+DEFAULT_TIME_MODEL = os.path.join(DEFAULT_HISTORY_DIR, "time-model.json")
+DEFAULT_REGISTRY = os.path.join(DEFAULT_HISTORY_DIR, "registry.sqlite")
 
-def _read_json(path: str) -> Dict[str, Any]:
-    with open(path, "r", encoding="utf-8") as handle:
-        return json.load(handle)
 
+def _time_arg(text: str) -> object:
+    if text == "auto":
+        return text
+    try:
+        return int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected seconds or auto: {text}")
 
-def _write_json(path: str, payload: Dict[str, Any]) -> None:
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, "w", encoding="utf-8") as handle:
-        json.dump(payload, handle, ensure_ascii=False, indent=2)
-        handle.write("\n")
+
+def _add_solve_options(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--seed", type=int, default=42, help="random seed")
+    parser.add_argument(
+        "--time",
+        type=_time_arg,
+        default=300,
+        help="total time limit in seconds, or auto to predict one from past runs (see time-model)",
+    )
+    parser.add_argument(
+        "--time-quality",
+        type=float,
+        default=0.99,
+        help="with --time auto: target share of the achievable score (0.95-1.0)",
+    )
+    parser.add_argument("--time-model", default=DEFAULT_TIME_MODEL, help="with --time auto: fitted time model json")
+    parser.add_argument("--workers", type=int, help="cp-sat worker threads (default 8, or the preset's)")
+    parser.add_argument(
+        "--phase1-ratio",
+        type=float,
+        help="fraction of total time reserved for phase1 feasible solve (default 0.25, or the preset's)",
+    )
+    parser.add_argument(
+        "--preset",
+        default="",
+        help="solver parameter preset by name (see presets/), or auto to pick a tuned one by instance size",
+    )
+    parser.add_argument(
+        "--gap-rel",
+        type=float,
+        default=0.0,
+        help="stop LNS once (bound - best) / |bound| is at most this value (0 = only when optimal)",
+    )
+    parser.add_argument(
+        "--gap-abs",
+        type=int,
+        default=0,
+        help="stop LNS once bound - best is at most this many score points",
+    )
+    parser.add_argument(
+        "--stall-iters",
+        type=int,
+        default=0,
+        help="stop LNS after this many iterations without improvement (0 = disabled)",
+    )
+    parser.add_argument(
+        "--stall-sec",
+        type=float,
+        default=0.0,
+        help="stop LNS after this many seconds without improvement (0 = disabled)",
+    )
+    parser.add_argument(
+        "--explain",
+        action="store_true",
+        help="when phase1 is infeasible, report a minimal set of conflicting required locations",
+    )
+    parser.add_argument(
+        "--max-memory",
+        type=float,
+        default=0.0,
+        help="memory budget in MB; the solver degrades to leaner strategies instead of exceeding it (0 = none)",
+    )
+    parser.add_argument(
+        "--trace-memory",
+        action="store_true",
+        help="also record the Python-heap peak per phase with tracemalloc (slower)",
+    )
+
+
+def _add_input_options(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--in", dest="input_path", default="", help="input json path")
+    parser.add_argument(
+        "--db",
+        dest="db_path",
+        default="",
+        help="read input straight from backend sqlite (read-only) instead of --in; needs --start/--end",
+    )
+    parser.add_argument("--start", dest="start_date", default="", help="scope start date for --db (YYYY-MM-DD)")
+    parser.add_argument("--end", dest="end_date", default="", help="scope end date for --db (YYYY-MM-DD)")
+    parser.add_argument("--groups", default="", help="comma separated group ids for --db (default all in scope)")
+
+
+def _check_input_args(parser: argparse.ArgumentParser, args: argparse.Namespace) -> argparse.Namespace:
+    if bool(args.input_path) == bool(args.db_path):
+        parser.error("exactly one of --in or --db is required")
+    if args.db_path and not (args.start_date and args.end_date):
+        parser.error("--db needs --start and --end")
+    return args
 
 
-def _parse_args() -> argparse.Namespace:
+def _check_preset_arg(parser: argparse.ArgumentParser, args: argparse.Namespace) -> argparse.Namespace:
+    from solver_lab.presets import load_preset
+
+    if args.preset and args.preset != "auto":
+        try:
+            load_preset(args.preset)
+        except ValueError as error:
+            parser.error(str(error))
+    return args
+
+
+def _config_from_args(args: argparse.Namespace, **overrides: object) -> dict:
+    options = {
+        "seed": args.seed,
+        "time_limit_sec": 300 if args.time == "auto" else args.time,
+        "time_auto": args.time == "auto",
+        "time_quality": args.time_quality,
+        "time_model_path": os.path.abspath(args.time_model) if args.time == "auto" else "",
+        "explain_infeasible": args.explain,
+        "gap_rel": args.gap_rel,
+        "gap_abs": args.gap_abs,
+        "stall_iterations": args.stall_iters,
+        "stall_sec": args.stall_sec,
+        "max_memory_mb": args.max_memory,
+        "trace_memory": args.trace_memory,
+        "preset": args.preset,
+    }
+    # Flags given explicitly win over the preset.
+    explicit = {"workers": args.workers, "phase1_ratio": args.phase1_ratio}
+    options.update({key: value for key, value in explicit.items() if value is not None})
+    options["preset_keep"] = [key for key, value in explicit.items() if value is not None]
+    options.update(overrides)
+    return build_config(**options)
+
+
+def _parse_args(argv: List[str]) -> argparse.Namespace:
     parser = argparse.ArgumentParser(
         description="Standalone scheduling solver (CP-SAT + LNS pipeline)."
     )
-    parser.add_argument("--in", dest="input_path", required=True, help="input json path")
+    _add_input_options(parser)
     parser.add_argument("--out", dest="output_path", required=True, help="result json path")
     parser.add_argument("--report", dest="report_path", default="", help="report json path")
-    parser.add_argument("--seed", type=int, default=42, help="random seed")
-    parser.add_argument("--time", type=int, default=300, help="total time limit in seconds")
-    parser.add_argument("--workers", type=int, default=8, help="cp-sat worker threads")
+    _add_solve_options(parser)
     parser.add_argument(
-        "--phase1-ratio",
+        "--checkpoint-dir",
+        default=DEFAULT_CHECKPOINT_DIR,
+        help="directory for LNS checkpoints (one sub-folder per input hash)",
+    )
+    parser.add_argument(
+        "--checkpoint-every",
         type=float,
-        default=0.25,
-        help="fraction of total time reserved for phase1 feasible solve",
+        default=60.0,
+        help="seconds between LNS checkpoints (0 = disabled)",
     )
-    return parser.parse_args()
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="continue from the latest checkpoint of this input, skipping normalize and phase1",
+    )
+    parser.add_argument(
+        "--previous",
+        dest="previous_path",
+        default="",
+        help="previous ec-planning-result@1; re-plan only the tasks affected by input changes",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=DEFAULT_CACHE_DIR,
+        help="result cache keyed on normalized input, solve options and solver version",
+    )
+    parser.add_argument("--no-cache", action="store_true", help="always solve, do not read or write the cache")
+    parser.add_argument(
+        "--cache-warm-start",
+        action="store_true",
+        help="on a near hit (similar input, same options) re-plan from the cached result",
+    )
+    parser.add_argument(
+        "--progress",
+        choices=["none", "ndjson"],
+        default="none",
+        help="ndjson: stream phase/improvement/heartbeat events and rewrite --out on every improvement",
+    )
+    parser.add_argument(
+        "--progress-to",
+        default="-",
+        help="progress destination: - for stdout (text output moves to stderr), or a file/FIFO path",
+    )
+    parser.add_argument(
+        "--heartbeat-sec",
+        type=float,
+        default=2.0,
+        help="seconds between heartbeat events (0 = disabled)",
+    )
+    parser.add_argument(
+        "--trace",
+        dest="trace_path",
+        default="",
+        help="write phase/sub-step spans as Chrome trace-event json (chrome://tracing, Perfetto)",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="run under cProfile and write <report or out>.prof next to it (python -m pstats)",
+    )
+    parser.add_argument("--registry", default=DEFAULT_REGISTRY, help="sqlite run registry to append this run to")
+    parser.add_argument("--no-registry", action="store_true", help="do not record this run in the registry")
+    return _check_preset_arg(parser, _check_input_args(parser, parser.parse_args(argv)))
+
+
+def _load_input(args: argparse.Namespace) -> dict:
+    if not args.db_path:
+        return read_json(os.path.abspath(args.input_path))
+    from solver_lab.sqlite_input import load_sqlite_input
+
+    return load_sqlite_input(
+        os.path.abspath(args.db_path),
+        start_date=args.start_date,
+        end_date=args.end_date,
+        group_ids=[int(value) for value in args.groups.split(",") if value.strip()] or None,
+    )
+
 
+def _record_run(
+    registry_path: str,
+    report: dict,
+    config: dict,
+    raw_payload: dict,
+    input_path: str,
+    result: dict,
+    log: object,
+    source: str = "solve",
+) -> None:
+    # The registry is bookkeeping; a locked or broken database must not fail a solve.
+    import sqlite3
 
-def main() -> int:
-    args = _parse_args()
+    from solver_lab.checkpoint import compute_input_hash
+    from solver_lab.run_registry import record_run
+
+    try:
+        record_run(
+            os.path.abspath(registry_path),
+            report,
+            config,
+            input_hash=compute_input_hash(raw_payload),
+            input_path=input_path,
+            snapshot_id=str(result.get("snapshot_id") or ""),
+            source=source,
+        )
+    except (sqlite3.Error, OSError) as error:
+        print(f"Run registry not updated: {error}", file=log)
+
+
+def _run_solve(argv: List[str]) -> int:
+    args = _parse_args(argv)
     started_at = time.time()
 
-    input_path = os.path.abspath(args.input_path)
+    input_path = os.path.abspath(args.input_path or args.db_path)
     output_path = os.path.abspath(args.output_path)
     report_path = os.path.abspath(args.report_path) if args.report_path else ""
+    previous_path = os.path.abspath(args.previous_path) if args.previous_path else ""
 
-    raw_payload = _read_json(input_path)
-    normalized = normalize_input(raw_payload)
-    precheck = run_precheck(normalized)
+    progress = None
+    progress_stream = None
+    close_stream = False
+    log = sys.stdout
+    if args.progress == "ndjson":
+        progress_stream, close_stream = open_progress_stream(args.progress_to)
+        if progress_stream is sys.stdout:
+            log = sys.stderr
+        progress = ProgressEmitter(progress_stream, started_at=started_at, heartbeat_sec=args.heartbeat_sec)
 
-    config = {
-        "seed": int(args.seed),
-        "time_limit_sec": max(1, int(args.time)),
-        "workers": max(1, int(args.workers)),
-        "phase1_ratio": min(0.9, max(0.05, float(args.phase1_ratio))),
-    }
+    # SIGINT/SIGTERM end the search early; the best plan so far is still written.
+    stop_event = threading.Event()
 
-    phase1 = solve_feasible(normalized, config, precheck)
-    optimized = optimize_with_lns(normalized, phase1, config, started_at)
-    audit = validate_solution(normalized, optimized["assignments"])
+    def request_stop(signum: int, frame: object) -> None:
+        stop_event.set()
 
-    elapsed_ms = int((time.time() - started_at) * 1000)
-    result_payload = build_result_payload(
-        normalized=normalized,
-        assignments=optimized["assignments"],
-        config=config,
-        diagnostics=optimized.get("diagnostics", {}),
-        elapsed_ms=elapsed_ms,
-    )
-    report_payload = build_report_payload(
-        normalized=normalized,
-        precheck=precheck,
-        phase1=phase1,
-        optimized=optimized,
-        audit=audit,
-        elapsed_ms=elapsed_ms,
-    )
+    for name in ("SIGINT", "SIGTERM"):
+        if hasattr(signal, name):
+            signal.signal(getattr(signal, name), request_stop)
+
+    raw_payload = _load_input(args)
+    config = _config_from_args(args, checkpoint_every_sec=args.checkpoint_every)
+    if progress is not None:
+        progress.start(input=input_path, timeLimitSec=config["time_limit_sec"], seed=config["seed"])
+    profiler = None
+    if args.profile:
+        import cProfile
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        run = run_pipeline(
+            raw_payload,
+            config,
+            started_at=started_at,
+            previous_assignments=(
+                load_previous_assignments(read_json(previous_path)) if previous_path else None
+            ),
+            checkpoint_root=os.path.abspath(args.checkpoint_dir),
+            resume=bool(args.resume),
+            cache=None if args.no_cache or args.resume else ResultCache(os.path.abspath(args.cache_dir)),
+            cache_warm_start=bool(args.cache_warm_start),
+            should_stop=stop_event.is_set,
+            progress=progress,
+            best_result_path=output_path if progress is not None else "",
+        )
+    except BaseException as error:
+        if profiler is not None:
+            profiler.disable()
+        if progress is not None:
+            progress.close(ok=False, error=f"{type(error).__name__}: {error}")
+            if close_stream:
+                progress_stream.close()
+        raise
+    if profiler is not None:
+        profiler.disable()
+    if args.resume and not previous_path and not run["resumed"]:
+        print(f"No checkpoint for this input in {run['checkpoint_dir']}, starting fresh.", file=log)
+    audit = run["audit"]
+    optimized = run["optimized"]
+    report_payload = run["report"]
+    cache_info = report_payload.get("cache") or {}
+    if cache_info.get("hit"):
+        print(f"Served from result cache (stored {cache_info['ageSec']}s ago).", file=log)
+    elif cache_info.get("nearHit") and not cache_info.get("warmStart"):
+        near = cache_info["nearHit"]
+        print(
+            f"Similar cached result {near['key']} (similarity {near['similarity']}); "
+            "--cache-warm-start would re-plan from it.",
+            file=log,
+        )
 
-    _write_json(output_path, result_payload)
+    write_json_atomic(output_path, run["result"])
     if report_path:
-        _write_json(report_path, report_payload)
+        write_json(report_path, report_payload)
 
-    print(f"Wrote result: {output_path}")
+    print(f"Wrote result: {output_path}", file=log)
     if report_path:
-        print(f"Wrote report: {report_path}")
+        print(f"Wrote report: {report_path}", file=log)
+    if args.trace_path:
+        trace_path = os.path.abspath(args.trace_path)
+        write_json(trace_path, run["tracer"].chrome_trace())
+        print(f"Wrote trace: {trace_path}", file=log)
+    if profiler is not None:
+        profile_path = f"{os.path.splitext(report_path or output_path)[0]}.prof"
+        profiler.dump_stats(profile_path)
+        print(f"Wrote profile: {profile_path}", file=log)
+    if not args.no_registry:
+        _record_run(args.registry, report_payload, config, raw_payload, input_path, run["result"], log)
+    for row in report_payload.get("memory", {}).get("degradations", []):
+        print(f"Memory budget: {row['step']} during {row['phase'] or 'setup'} ({row['reason']}).", file=log)
+    prediction = report_payload.get("timePrediction")
+    if prediction:
+        print(
+            f"Time auto: {prediction['timeLimitSec']}s, phase1 ratio {prediction['phase1Ratio']} "
+            f"({prediction['source']}, quality {prediction['quality']}, {prediction['samples']} samples).",
+            file=log,
+        )
+    infeasibility = report_payload.get("infeasibility")
+    if infeasibility and infeasibility.get("conflicts"):
+        print("Infeasible required locations:", file=log)
+        for row in infeasibility["conflicts"]:
+            print(f"- {row['group_name']} -> {row['location_name']}", file=log)
     print(
         "Hard violations: "
-        f"{len(audit['hard_violations'])}, Must-visit missing: {len(audit['must_visit_missing'])}"
+        f"{len(audit['hard_violations'])}, Must-visit missing: {len(audit['must_visit_missing'])}",
+        file=log,
     )
     curve_tail = optimized.get("diagnostics", {}).get("curve_tail_zh", [])
     if isinstance(curve_tail, list) and curve_tail:
-        print("Optimization trace (ZH):")
+        print("Optimization trace (ZH):", file=log)
         for note in curve_tail:
             if isinstance(note, str) and note.strip():
-                print(f"- {note}")
+                print(f"- {note}", file=log)
+
+    exit_code = 2 if audit["hard_violations"] or audit["must_visit_missing"] else 0
+    if progress is not None:
+        progress.close(
+            ok=True,
+            exitCode=exit_code,
+            resultPath=output_path,
+            reportPath=report_path or None,
+            elapsedMs=run["elapsed_ms"],
+        )
+        if close_stream:
+            progress_stream.close()
+    return exit_code
+
+
+def _parse_insert_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="cli.py insert",
+        description="Check whether one new group fits into the current plan.",
+    )
+    parser.add_argument("--in", dest="input_path", required=True, help="input json path")
+    parser.add_argument(
+        "--request",
+        dest="request_path",
+        required=True,
+        help="json with {group: {...}, requiredLocationIds: [...]}",
+    )
+    parser.add_argument(
+        "--assignments",
+        dest="assignments_path",
+        default="",
+        help="current ec-planning-result@1 (defaults to the input's existing assignments)",
+    )
+    parser.add_argument("--out", dest="output_path", default="", help="answer json path")
+    parser.add_argument("--max-shift", type=int, default=2, help="max number of other groups allowed to move")
+    parser.add_argument("--time-cap", type=float, default=1.0, help="hard time cap in seconds")
+    parser.add_argument("--seed", type=int, default=42, help="random seed")
+    parser.add_argument("--workers", type=int, default=8, help="cp-sat worker threads")
+    return parser.parse_args(argv)
+
+
+def _run_insert(argv: List[str]) -> int:
+    args = _parse_insert_args(argv)
+    normalized = normalize_input(read_json(os.path.abspath(args.input_path)))
+    request = load_insert_request(read_json(os.path.abspath(args.request_path)))
+    if request is None:
+        print("Invalid insert request: expected {group, requiredLocationIds}.")
+        return 1
+    if args.assignments_path:
+        assignments = load_previous_assignments(read_json(os.path.abspath(args.assignments_path)))
+    else:
+        assignments = list(normalized["existing_assignments"])
 
-    if audit["hard_violations"] or audit["must_visit_missing"]:
-        return 2
+    if args.max_shift > 0:
+        # Import ortools before insert_group starts its time cap, so stage 2
+        # gets the whole cap.
+        is_cp_sat_available()
+    answer = insert_group(
+        normalized,
+        assignments,
+        request["group"],
+        request["required_location_ids"],
+        max_shifted_groups=max(0, int(args.max_shift)),
+        time_cap_sec=max(0.1, float(args.time_cap)),
+        workers=max(1, int(args.workers)),
+        seed=int(args.seed),
+    )
+    if args.output_path:
+        output_path = os.path.abspath(args.output_path)
+        write_json(output_path, answer)
+        print(f"Wrote answer: {output_path}")
+    print(
+        f"Group {answer['group_id']}: {answer['status']} "
+        f"(placements {len(answer['placements'])}, displacements {len(answer['displacements'])}, "
+        f"{answer['elapsed_ms']} ms)"
+    )
+    return 0 if answer["fits"] else 2
+
+
+def _run_serve(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(
+        prog="cli.py serve",
+        description="Resident solver service on a local HTTP port (imports ortools once).",
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="bind address (keep it local)")
+    parser.add_argument("--port", type=int, default=8765, help="listen port")
+    parser.add_argument("--jobs", type=int, default=0, help="max concurrently running solves (0 = core budget)")
+    parser.add_argument(
+        "--cores",
+        type=int,
+        default=0,
+        help="global CP-SAT thread budget shared by running jobs (0 = all CPUs)",
+    )
+    args = parser.parse_args(argv)
+
+    from solver_lab.service import serve
+
+    print(f"Solver service listening on http://{args.host}:{args.port}")
+    serve(host=args.host, port=args.port, max_jobs=args.jobs or None, core_budget=args.cores or None)
+    return 0
+
+
+def _run_validate(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(
+        prog="cli.py validate",
+        description="Normalize and precheck an input, optionally audit a result; no solver is loaded.",
+    )
+    _add_input_options(parser)
+    parser.add_argument("--result", dest="result_path", default="", help="ec-planning-result@1 to audit")
+    parser.add_argument("--out", dest="output_path", default="", help="check report json path")
+    args = _check_input_args(parser, parser.parse_args(argv))
+
+    from solver_lab.precheck import run_precheck
+    from solver_lab.validate import validate_solution
+
+    normalized = normalize_input(_load_input(args))
+    precheck = run_precheck(normalized)
+    report = {
+        "schema": "ec-planning-check@1",
+        "summary": {
+            "groups": len(normalized["groups"]),
+            "locations": len(normalized["locations"]),
+            "tasks": len(precheck["task_space"]["tasks"]),
+            "assignmentsInput": len(normalized["existing_assignments"]),
+        },
+        "precheck": {
+            "blockingErrors": precheck["blocking_errors"],
+            "warnings": precheck["warnings"],
+        },
+    }
+    failed = bool(precheck["blocking_errors"])
+    print(
+        f"Groups: {report['summary']['groups']}, Locations: {report['summary']['locations']}, "
+        f"Tasks: {report['summary']['tasks']}"
+    )
+    print(f"Blocking errors: {len(precheck['blocking_errors'])}, Warnings: {len(precheck['warnings'])}")
+    if args.result_path:
+        audit = validate_solution(
+            normalized, load_previous_assignments(read_json(os.path.abspath(args.result_path)))
+        )
+        report["audit"] = {
+            "hardViolations": audit["hard_violations"],
+            "mustVisitMissing": audit["must_visit_missing"],
+        }
+        failed = failed or bool(audit["hard_violations"] or audit["must_visit_missing"])
+        print(
+            "Hard violations: "
+            f"{len(audit['hard_violations'])}, Must-visit missing: {len(audit['must_visit_missing'])}"
+        )
+    if args.output_path:
+        write_json(os.path.abspath(args.output_path), report)
+        print(f"Wrote check report: {os.path.abspath(args.output_path)}")
+    return 2 if failed else 0
+
+
+def _run_batch(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(
+        prog="cli.py batch",
+        description="Solve many inputs in parallel worker processes.",
+    )
+    parser.add_argument("inputs", nargs="+", help="input json files, directories or glob patterns")
+    parser.add_argument("--out-dir", required=True, help="one sub-folder with result/report per input")
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=0,
+        help="worker processes (0 = CPU count / --workers)",
+    )
+    parser.add_argument("--summary", default="", help="summary json path (default <out-dir>/summary.json)")
+    parser.add_argument("--registry", default=DEFAULT_REGISTRY, help="sqlite run registry to append runs to")
+    parser.add_argument("--no-registry", action="store_true", help="do not record runs in the registry")
+    _add_solve_options(parser)
+    args = parser.parse_args(argv)
+
+    from solver_lab.batch import collect_inputs, format_summary_table, run_batch
+
+    input_paths = collect_inputs(args.inputs)
+    if not input_paths:
+        print("No input files matched.")
+        return 1
+    out_dir = os.path.abspath(args.out_dir)
+    config = _config_from_args(args)
+    summary = run_batch(input_paths, out_dir, config, processes=args.processes)
+    if not args.no_registry:
+        for row in summary["rows"]:
+            if row["status"] != "failed":
+                report, result = read_json(row["reportPath"]), read_json(row["resultPath"])
+                raw_payload = read_json(row["input"])
+                _record_run(args.registry, report, config, raw_payload, row["input"], result, sys.stdout, "batch")
+    summary_path = os.path.abspath(args.summary) if args.summary else os.path.join(out_dir, "summary.json")
+    write_json(summary_path, summary)
+    for line in format_summary_table(summary):
+        print(line)
+    print(f"Wrote summary: {summary_path}")
+    return 0 if summary["statusCounts"].get("ok", 0) == len(input_paths) else 2
+
+
+def _run_scenarios(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(
+        prog="cli.py scenarios",
+        description="Solve what-if variants of one base input and compare them.",
+    )
+    parser.add_argument("--in", dest="input_path", required=True, help="base input json path")
+    parser.add_argument("--scenarios", dest="scenarios_path", required=True, help="scenario patches json path")
+    parser.add_argument("--out", dest="output_path", required=True, help="comparison report json path")
+    parser.add_argument("--out-dir", default="", help="optional folder for per-scenario result/report")
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=0,
+        help="worker processes (0 = CPU count / --workers)",
+    )
+    parser.add_argument("--no-base", action="store_true", help="do not solve the unpatched base")
+    _add_solve_options(parser)
+    args = parser.parse_args(argv)
+
+    from solver_lab.scenarios import build_comparison_report, format_comparison_table, load_scenarios, run_scenarios
+
+    outcome = run_scenarios(
+        read_json(os.path.abspath(args.input_path)),
+        load_scenarios(read_json(os.path.abspath(args.scenarios_path))),
+        _config_from_args(args),
+        processes=args.processes,
+        include_base=not args.no_base,
+    )
+    if args.out_dir:
+        for row in outcome["rows"]:
+            write_json(os.path.join(os.path.abspath(args.out_dir), row["name"], "result.json"), row["result"])
+            write_json(os.path.join(os.path.abspath(args.out_dir), row["name"], "report.json"), row["report"])
+    report = build_comparison_report(outcome)
+    output_path = os.path.abspath(args.output_path)
+    write_json(output_path, report)
+    for line in format_comparison_table(report):
+        print(line)
+    print(f"Wrote comparison: {output_path}")
     return 0
 
 
+def _add_generator_options(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--tightness", type=float, help="peak demand / capacity per slot (0 = no capacity limits)")
+    parser.add_argument("--required-density", type=float, help="must-visit locations as a share of a group's slots")
+    parser.add_argument("--closed-rate", type=float, help="chance a location is closed on a given date")
+    parser.add_argument("--open-hours-rate", type=float, help="share of locations with restricted open hours")
+    parser.add_argument("--cluster-share", type=float, help="share of same-day cluster locations")
+    parser.add_argument("--existing-share", type=float, help="share of slots with an existing assignment")
+
+
+def _generator_overrides(args: argparse.Namespace) -> dict:
+    names = {
+        "tightness": "capacity_tightness",
+        "required_density": "required_density",
+        "closed_rate": "closed_date_rate",
+        "open_hours_rate": "open_hours_rate",
+        "cluster_share": "cluster_share",
+        "existing_share": "existing_share",
+    }
+    return {key: getattr(args, name) for name, key in names.items() if getattr(args, name) is not None}
+
+
+def _run_generate(argv: List[str]) -> int:
+    from solver_lab.generator import SIZE_PRESETS, generate_instance
+
+    parser = argparse.ArgumentParser(
+        prog="cli.py generate",
+        description="Write a seeded synthetic ec-planning-input@2 instance.",
+    )
+    parser.add_argument("--out", dest="output_path", required=True, help="input json path to write")
+    parser.add_argument("--size", choices=sorted(SIZE_PRESETS), default="m", help="preset for the counts below")
+    parser.add_argument("--groups", type=int, help="number of groups")
+    parser.add_argument("--locations", type=int, help="number of locations")
+    parser.add_argument("--days", type=int, help="scope length in days")
+    parser.add_argument("--seed", type=int, default=42, help="random seed")
+    _add_generator_options(parser)
+    args = parser.parse_args(argv)
+
+    spec = dict(SIZE_PRESETS[args.size], seed=args.seed, **_generator_overrides(args))
+    for name in ("groups", "locations", "days"):
+        if getattr(args, name) is not None:
+            spec[name] = getattr(args, name)
+    output_path = os.path.abspath(args.output_path)
+    write_json(output_path, generate_instance(**spec))
+    print(f"Wrote input: {output_path} ({spec['groups']} groups, {spec['locations']} locations, {spec['days']} days)")
+    return 0
+
+
+def _run_bench(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(
+        prog="cli.py bench",
+        description="Solve generated instances of increasing size and compare with a baseline.",
+    )
+    parser.add_argument("--sizes", default="xs,s,m", help="comma separated size presets (xs,s,m,l,xl)")
+    parser.add_argument("--instance-seed", type=int, default=42, help="generator seed")
+    parser.add_argument("--out", dest="output_path", default="", help="benchmark json path")
+    parser.add_argument("--csv", dest="csv_path", default="", help="also write rows as csv")
+    parser.add_argument("--baseline", default="", help="earlier benchmark json to compare against")
+    parser.add_argument("--save-baseline", default="", help="write this run as the new baseline")
+    parser.add_argument("--time-tolerance", type=float, default=0.25, help="allowed relative slowdown")
+    parser.add_argument("--memory-tolerance", type=float, default=0.2, help="allowed relative peak RSS growth")
+    parser.add_argument("--score-tolerance", type=float, default=0.01, help="allowed relative score drop")
+    _add_generator_options(parser)
+    _add_solve_options(parser)
+    parser.set_defaults(time=10)
+    args = parser.parse_args(argv)
+
+    from solver_lab.benchmark import build_cases, compare_to_baseline, format_bench_table, run_benchmark, write_csv
+
+    overrides = dict(_generator_overrides(args), seed=args.instance_seed)
+    cases = build_cases([size.strip() for size in args.sizes.split(",") if size.strip()], overrides)
+    result = run_benchmark(cases, _config_from_args(args))
+    for line in format_bench_table(result):
+        print(line)
+    for path in (args.output_path, args.save_baseline):
+        if path:
+            write_json(os.path.abspath(path), result)
+            print(f"Wrote benchmark: {os.path.abspath(path)}")
+    if args.csv_path:
+        write_csv(os.path.abspath(args.csv_path), result)
+        print(f"Wrote csv: {os.path.abspath(args.csv_path)}")
+    if not args.baseline:
+        return 0
+    regressions = compare_to_baseline(
+        result,
+        read_json(os.path.abspath(args.baseline)),
+        time_tolerance=args.time_tolerance,
+        memory_tolerance=args.memory_tolerance,
+        score_tolerance=args.score_tolerance,
+    )
+    for row in regressions:
+        print(f"REGRESSION {row['case']} {row['metric']}: {row['baseline']} -> {row['current']}")
+    if not regressions:
+        print("No regressions against baseline.")
+    return 1 if regressions else 0
+
+
+def _parse_param(text: str) -> tuple:
+    name, _, values = text.partition("=")
+    if not name or not values:
+        raise argparse.ArgumentTypeError(f"expected name=value,value: {text}")
+    parsed = []
+    for token in values.split(","):
+        try:
+            parsed.append(json.loads(token))
+        except ValueError:
+            parsed.append(token)
+    return name.strip(), parsed
+
+
+def _run_tune(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(
+        prog="cli.py tune",
+        description="Search CP-SAT / pipeline parameters over an instance set and save the best as a preset.",
+    )
+    parser.add_argument("--sizes", default="s", help="comma separated generator size presets to tune on")
+    parser.add_argument("--in", dest="input_paths", action="append", default=[], help="input json (repeatable)")
+    parser.add_argument("--instance-seed", type=int, default=42, help="generator seed")
+    parser.add_argument("--search", choices=["random", "grid"], default="random", help="how to pick trials")
+    parser.add_argument("--trials", type=int, default=20, help="number of random trials (grid: upper bound)")
+    parser.add_argument(
+        "--param",
+        dest="params",
+        type=_parse_param,
+        action="append",
+        default=[],
+        help="replace one search dimension, e.g. workers=4,8 or cp_model_presolve=true,false (repeatable)",
+    )
+    parser.add_argument("--only", action="store_true", help="search only the --param dimensions")
+    parser.add_argument("--seeds", default="42", help="comma separated solver seeds per trial")
+    parser.add_argument("--out", dest="output_path", default="", help="tuning result json path")
+    parser.add_argument("--save-preset", default="", help="save the best trial as this preset name")
+    _add_generator_options(parser)
+    _add_solve_options(parser)
+    parser.set_defaults(time=10)
+    args = parser.parse_args(argv)
+
+    from solver_lab.benchmark import build_cases, file_cases
+    from solver_lab.presets import save_preset
+    from solver_lab.tuning import SEARCH_SPACE, best_preset, format_tuning_table, grid_trials, random_trials, run_tuning
+
+    space = {} if args.only else dict(SEARCH_SPACE)
+    space.update(dict(args.params))
+    if not space:
+        parser.error("--only needs at least one --param")
+    if args.input_paths:
+        cases = file_cases(args.input_paths)
+    else:
+        overrides = dict(_generator_overrides(args), seed=args.instance_seed)
+        cases = build_cases([size.strip() for size in args.sizes.split(",") if size.strip()], overrides)
+    if args.search == "grid":
+        trials = grid_trials(space)[: max(1, args.trials)]
+    else:
+        trials = random_trials(space, max(1, args.trials), args.instance_seed)
+    seeds = [int(seed) for seed in args.seeds.split(",") if seed.strip()]
+    print(f"Tuning {len(trials)} trials x {len(cases)} cases x {len(seeds)} seeds at {args.time}s each.")
+
+    def on_trial(trial: dict) -> None:
+        scores = ", ".join(f"{row['case']}={row['score']}" for row in trial["rows"])
+        print(f"trial {trial['trial'] + 1}/{len(trials)} {json.dumps(trial['params'])}: {scores}", flush=True)
+
+    result = run_tuning(cases, _config_from_args(args), trials, seeds=seeds, on_trial=on_trial)
+    for line in format_tuning_table(result):
+        print(line)
+    if args.output_path:
+        write_json(os.path.abspath(args.output_path), result)
+        print(f"Wrote tuning: {os.path.abspath(args.output_path)}")
+    if args.save_preset:
+        print(f"Wrote preset: {save_preset(args.save_preset, best_preset(result, args.save_preset))}")
+    return 0
+
+
+def _run_time_model(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(
+        prog="cli.py time-model",
+        description="Fit the --time auto predictor from past reports and benchmark results.",
+    )
+    parser.add_argument(
+        "--history",
+        action="append",
+        default=[],
+        help=f"report / bench json file or directory to learn from (repeatable, default {DEFAULT_HISTORY_DIR})",
+    )
+    parser.add_argument("--out", dest="output_path", default=DEFAULT_TIME_MODEL, help="time model json path")
+    parser.add_argument("--predict", dest="input_path", default="", help="also print the prediction for this input")
+    parser.add_argument("--quality", type=float, default=0.99, help="target quality for --predict")
+    args = parser.parse_args(argv)
+
+    from solver_lab.precheck import run_precheck
+    from solver_lab.time_budget import collect_samples, fit_time_model, instance_features, predict_time, save_time_model
+
+    samples, skipped = collect_samples([os.path.abspath(path) for path in args.history or [DEFAULT_HISTORY_DIR]])
+    model = fit_time_model(samples)
+    output_path = os.path.abspath(args.output_path)
+    save_time_model(output_path, model)
+    fitted = [level for level, fit in model["reach"].items() if fit is not None]
+    print(f"Samples: {len(samples)} (skipped {skipped} without instance features or timed curve)")
+    if fitted:
+        for level in fitted:
+            print(f"quality {level}: sigma {model['reach'][level]['sigma']:.3f} (log ms)")
+    else:
+        print("Too few samples to fit; --time auto uses the size heuristic.")
+    print(f"Wrote time model: {output_path}")
+    if args.input_path:
+        normalized = normalize_input(read_json(os.path.abspath(args.input_path)))
+        features = instance_features(normalized, run_precheck(normalized)["task_space"])
+        prediction = predict_time(features, model, quality=args.quality)
+        print(json.dumps(prediction, ensure_ascii=False))
+    return 0
+
+
+def _run_runs(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(
+        prog="cli.py runs",
+        description="Query the run registry for trends and regressions.",
+    )
+    parser.add_argument("--registry", default=DEFAULT_REGISTRY, help="sqlite run registry path")
+    actions = parser.add_subparsers(dest="action", required=True)
+    listing = actions.add_parser("list", help="latest runs")
+    listing.add_argument("--limit", type=int, default=20, help="number of runs")
+    listing.add_argument("--since", default="", help="today, week, month, <N>d or YYYY-MM-DD")
+    trend = actions.add_parser("trend", help="statistics of one metric per group")
+    trend.add_argument("--metric", default="total_ms", help="runs column (total_ms, final_score, ...) or span:<name>")
+    trend.add_argument(
+        "--by",
+        default="size",
+        help="comma separated groups: size, solver, preset, engine, input, source, day, week, month",
+    )
+    trend.add_argument("--stats", default="count,p50,p95", help="comma separated: count, mean, p50, p90, p95, min, max")
+    trend.add_argument("--since", default="", help="today, week, month, <N>d or YYYY-MM-DD")
+    trend.add_argument("--until", default="", help="same forms as --since")
+    trend.add_argument("--source", default="", help="only runs from solve or batch")
+    trend.add_argument("--with-cache-hits", action="store_true", help="include runs served from the result cache")
+    regressions = actions.add_parser("regressions", help="groups where recent runs got worse than earlier ones")
+    regressions.add_argument("--metric", default="total_ms", help="runs column or span:<name>")
+    regressions.add_argument("--since", default="7d", help="start of the recent window (earlier runs are the baseline)")
+    regressions.add_argument("--by", default="size", help="comma separated groups (see trend)")
+    regressions.add_argument("--stat", default="p50", help="statistic to compare")
+    regressions.add_argument("--tolerance", type=float, default=0.2, help="allowed relative change")
+    regressions.add_argument("--min-runs", type=int, default=3, help="runs needed on both sides")
+    for action in (listing, trend, regressions):
+        action.add_argument("--json", action="store_true", help="print json instead of a table")
+    args = parser.parse_args(argv)
+
+    from solver_lab.run_registry import find_regressions, format_rows, list_runs, parse_since, query_trend
+
+    registry_path = os.path.abspath(args.registry)
+    if not os.path.exists(registry_path):
+        print(f"No run registry at {registry_path}.")
+        return 1
+    try:
+        since = parse_since(args.since) if args.since else ""
+        if args.action == "list":
+            rows = list_runs(registry_path, limit=args.limit, since=since)
+        elif args.action == "trend":
+            rows = query_trend(
+                registry_path,
+                metric=args.metric,
+                group_by=[name.strip() for name in args.by.split(",") if name.strip()],
+                stats=[name.strip() for name in args.stats.split(",") if name.strip()],
+                since=since,
+                until=parse_since(args.until) if args.until else "",
+                include_cache_hits=args.with_cache_hits,
+                source=args.source,
+            )["rows"]
+        else:
+            rows = find_regressions(
+                registry_path,
+                metric=args.metric,
+                since=since,
+                group_by=[name.strip() for name in args.by.split(",") if name.strip()],
+                stat=args.stat,
+                tolerance=args.tolerance,
+                min_runs=args.min_runs,
+            )
+    except ValueError as error:
+        parser.error(str(error))
+    if args.json:
+        print(json.dumps(rows, ensure_ascii=False, indent=2))
+    elif args.action == "regressions" and not rows:
+        print("No regressions.")
+    else:
+        for line in format_rows(rows):
+            print(line)
+    return 1 if args.action == "regressions" and rows else 0
+
+
+SUBCOMMANDS = {
+    "validate": _run_validate,
+    "generate": _run_generate,
+    "bench": _run_bench,
+    "tune": _run_tune,
+    "time-model": _run_time_model,
+    "runs": _run_runs,
+    "batch": _run_batch,
+    "scenarios": _run_scenarios,
+    "insert": _run_insert,
+    "serve": _run_serve,
+}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if argv and argv[0] in SUBCOMMANDS:
+        return SUBCOMMANDS[argv[0]](argv[1:])
+    return _run_solve(argv)
+
+
 if __name__ == "__main__":
     sys.exit(main())
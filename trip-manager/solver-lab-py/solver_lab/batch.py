@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional
+
+from .jsonio import read_json, write_json
+from .pipeline import run_pipeline
+
+
+def collect_inputs(patterns: List[str]) -> List[str]:
+    paths: List[str] = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matches = glob.glob(os.path.join(pattern, "*.json"))
+        else:
+            matches = glob.glob(pattern, recursive=True)
+        for path in sorted(matches):
+            absolute = os.path.abspath(path)
+            if os.path.isfile(absolute) and absolute not in paths:
+                paths.append(absolute)
+    return paths
+
+
+def _output_dir_for(input_path: str, out_root: str, taken: Dict[str, int]) -> str:
+    stem = os.path.splitext(os.path.basename(input_path))[0]
+    count = taken.get(stem, 0)
+    taken[stem] = count + 1
+    return os.path.join(out_root, stem if count == 0 else f"{stem}-{count + 1}")
+
+
+def _solve_one(input_path: str, output_dir: str, config: Dict[str, Any]) -> Dict[str, Any]:
+    # Runs inside a pool worker; the solver modules stay imported between jobs.
+    started_at = time.time()
+    row: Dict[str, Any] = {
+        "input": input_path,
+        "resultPath": os.path.join(output_dir, "result.json"),
+        "reportPath": os.path.join(output_dir, "report.json"),
+        "workers": int(config["workers"]),
+    }
+    try:
+        run = run_pipeline(read_json(input_path), config, started_at=started_at)
+    except Exception as error:
+        row.update(
+            {
+                "status": "failed",
+                "error": f"{type(error).__name__}: {error}",
+                "elapsedMs": int((time.time() - started_at) * 1000),
+            }
+        )
+        return row
+    write_json(row["resultPath"], run["result"])
+    write_json(row["reportPath"], run["report"])
+    audit = run["audit"]
+    diagnostics = run["optimized"].get("diagnostics", {})
+    hard = len(audit["hard_violations"])
+    missing = len(audit["must_visit_missing"])
+    row.update(
+        {
+            "status": "ok" if not hard and not missing else "violations",
+            "score": diagnostics.get("final_score", diagnostics.get("phase1_score")),
+            "hardViolations": hard,
+            "mustVisitMissing": missing,
+            "engine": run["optimized"].get("engine"),
+            "elapsedMs": run["elapsed_ms"],
+        }
+    )
+    return row
+
+
+def run_batch(
+    input_paths: List[str],
+    out_root: str,
+    config: Dict[str, Any],
+    *,
+    processes: Optional[int] = None,
+) -> Dict[str, Any]:
+    started_at = time.time()
+    cores = max(1, os.cpu_count() or 1)
+    if not processes or processes <= 0:
+        processes = max(1, cores // max(1, int(config["workers"])))
+    processes = max(1, min(int(processes), len(input_paths) or 1))
+
+    taken: Dict[str, int] = {}
+    jobs = [(path, _output_dir_for(path, out_root, taken)) for path in input_paths]
+    rows: List[Dict[str, Any]] = []
+    if processes == 1:
+        for path, output_dir in jobs:
+            rows.append(_solve_one(path, output_dir, config))
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            futures = {
+                pool.submit(_solve_one, path, output_dir, config): (path, output_dir) for path, output_dir in jobs
+            }
+            for future in as_completed(futures):
+                try:
+                    rows.append(future.result())
+                except BrokenProcessPool as error:
+                    # A worker died (OOM kill, native crash); every job still
+                    # in the pool fails with it, finished rows are kept.
+                    path, output_dir = futures[future]
+                    rows.append(
+                        {
+                            "input": path,
+                            "resultPath": os.path.join(output_dir, "result.json"),
+                            "reportPath": os.path.join(output_dir, "report.json"),
+                            "status": "failed",
+                            "error": f"{type(error).__name__}: {error}",
+                            "workers": int(config["workers"]),
+                        }
+                    )
+    order = {path: index for index, (path, _) in enumerate(jobs)}
+    rows.sort(key=lambda row: order.get(row["input"], 0))
+
+    counts: Dict[str, int] = {}
+    for row in rows:
+        counts[row["status"]] = counts.get(row["status"], 0) + 1
+    return {
+        "inputs": len(input_paths),
+        "processes": processes,
+        "workersPerJob": int(config["workers"]),
+        "statusCounts": counts,
+        "elapsedMs": int((time.time() - started_at) * 1000),
+        "rows": rows,
+    }
+
+
+def format_summary_table(summary: Dict[str, Any]) -> List[str]:
+    header = ["input", "status", "score", "hard", "missing", "elapsed_ms"]
+    lines = [header]
+    for row in summary["rows"]:
+        lines.append(
+            [
+                os.path.basename(row["input"]),
+                str(row["status"]),
+                "" if row.get("score") is None else str(row["score"]),
+                str(row.get("hardViolations", "")),
+                str(row.get("mustVisitMissing", "")),
+                str(row.get("elapsedMs", "")),
+            ]
+        )
+    widths = [max(len(line[index]) for line in lines) for index in range(len(header))]
+    return ["  ".join(cell.ljust(widths[index]) for index, cell in enumerate(line)).rstrip() for line in lines]
@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List
+
+import numpy as np  # listed in requirements.txt
+
+from .constraints import make_group_slot_key
+
+# Cells of the per-chunk scratch matrices ([candidates, keys]); bounds memory
+# for large batches.
+CHUNK_CELLS = 4_000_000
+
+
+# Scores many candidate plans over one task space in a few numpy passes. A
+# candidate is a vector of location indexes per task (positions in
+# normalized["locations"], -1 = unassigned), the layout of SharedDataset's
+# incumbent; a batch stacks them into a [candidates, tasks] matrix.
+# score_batch() gives the _score_solution value of every row (one point per
+# assignment, existing matches, required rows, required coverage and
+# cluster-day penalties) plus whether the row stays within capacity and only
+# uses candidate locations.
+def build_score_tables(normalized: Dict[str, Any], task_space: Dict[str, Any]) -> Dict[str, Any]:
+    locations = normalized["locations"]
+    tasks = task_space["tasks"]
+    location_index = {int(row["id"]): index for index, row in enumerate(locations)}
+    location_count = len(locations)
+    group_index: Dict[int, int] = {}
+    date_slot_index: Dict[Any, int] = {}
+    for task in tasks:
+        group_index.setdefault(int(task["group_id"]), len(group_index))
+        date_slot_index.setdefault((task["date"], task["time_slot"]), len(date_slot_index))
+    date_index = {date: index for index, date in enumerate(sorted({task["date"] for task in tasks}))}
+
+    # Existing location per task; -2 never matches, unassigned included.
+    existing = {
+        make_group_slot_key(row["group_id"], row["date"], row["time_slot"]): row["location_id"]
+        for row in normalized["existing_assignments"]
+    }
+    task_existing = np.full(len(tasks), -2, dtype=np.int64)
+    for position, task in enumerate(tasks):
+        location_id = existing.get(task["key"])
+        if location_id is not None and int(location_id) in location_index:
+            task_existing[position] = location_index[int(location_id)]
+
+    # Required (group, location) pairs reachable by the tasks, numbered 0..P-1.
+    required_by_group = normalized["required_by_group"]
+    required_code = np.full((max(1, len(group_index)), location_count + 1), -1, dtype=np.int64)
+    required_pairs = 0
+    for group_id, position in group_index.items():
+        for location_id in sorted(required_by_group.get(group_id, set())):
+            if int(location_id) in location_index:
+                required_code[position, location_index[int(location_id)]] = required_pairs
+                required_pairs += 1
+
+    cluster_ids = set(normalized.get("cluster_location_ids", set()))
+    cluster_code = np.full(location_count + 1, -1, dtype=np.int64)
+    for index, row in enumerate(locations):
+        if int(row["id"]) in cluster_ids:
+            cluster_code[index] = int(cluster_code.max()) + 1
+    cluster_day_penalty = max(0, int(normalized.get("cluster_day_penalty", 40) or 40))
+
+    candidates = np.zeros((len(tasks), location_count + 1), dtype=bool)
+    for position, task in enumerate(tasks):
+        for location_id in task["candidate_location_ids"]:
+            candidates[position, location_index[int(location_id)]] = True
+
+    # Index location_count is a sentinel column for unassigned tasks.
+    return {
+        "task_keys": [task["key"] for task in tasks],
+        "location_ids": [int(row["id"]) for row in locations],
+        "location_count": location_count,
+        "task_group": np.array([group_index[int(task["group_id"])] for task in tasks], dtype=np.int64),
+        "task_date": np.array([date_index[task["date"]] for task in tasks], dtype=np.int64),
+        "task_date_slot": np.array(
+            [date_slot_index[(task["date"], task["time_slot"])] for task in tasks], dtype=np.int64
+        ),
+        "task_participants": np.array([int(task["participant_count"]) for task in tasks], dtype=np.int64),
+        "task_existing": task_existing,
+        "date_count": max(1, len(date_index)),
+        "date_slot_count": max(1, len(date_slot_index)),
+        "capacity": np.array([int(row.get("capacity", 0) or 0) for row in locations] + [0], dtype=np.int64),
+        "required_code": required_code,
+        "required_pairs": required_pairs,
+        "required_count": sum(len(ids) for ids in required_by_group.values()),
+        "cluster_code": cluster_code,
+        "cluster_locations": int(cluster_code.max()) + 1,
+        "cluster_day_penalty": cluster_day_penalty,
+        "candidates": candidates,
+    }
+
+
+def plans_to_matrix(tables: Dict[str, Any], plans: List[List[Dict[str, Any]]]) -> Any:
+    # Rows outside the task space or at unknown locations are dropped, as in
+    # SharedDataset.set_incumbent.
+    task_index = {key: position for position, key in enumerate(tables["task_keys"])}
+    location_index = {location_id: index for index, location_id in enumerate(tables["location_ids"])}
+    matrix = np.full((len(plans), len(task_index)), -1, dtype=np.int64)
+    for row_index, plan in enumerate(plans):
+        for row in plan:
+            position = task_index.get(make_group_slot_key(row["group_id"], row["date"], row["time_slot"]))
+            location = location_index.get(int(row["location_id"]))
+            if position is not None and location is not None:
+                matrix[row_index, position] = location
+    return matrix
+
+
+def _distinct_per_row(codes: Any, width: int) -> Any:
+    # codes: [rows, tasks] with -1 for none; number of distinct codes per row.
+    rows = codes.shape[0]
+    seen = np.zeros((rows, max(1, width)), dtype=bool)
+    row_ids, columns = np.nonzero(codes >= 0)
+    seen[row_ids, codes[row_ids, columns]] = True
+    return seen.sum(axis=1)
+
+
+def _score_chunk(tables: Dict[str, Any], matrix: Any) -> Dict[str, Any]:
+    location_count = tables["location_count"]
+    assigned = matrix >= 0
+    # unassigned -> sentinel column, which is never required, clustered or capped
+    locations = np.where(assigned, matrix, location_count)
+    task_group = tables["task_group"][None, :]
+
+    existing_match = (locations == tables["task_existing"][None, :]).sum(axis=1)
+    required = tables["required_code"][task_group, locations]
+    covered = _distinct_per_row(required, tables["required_pairs"])
+    required_rows = (required >= 0).sum(axis=1)
+    scores = assigned.sum(axis=1) + 60 * existing_match + 20 * required_rows
+    scores = scores + 200 * covered - 400 * (tables["required_count"] - covered)
+    if tables["cluster_day_penalty"] > 0 and tables["cluster_locations"]:
+        cluster = tables["cluster_code"][locations]
+        cluster_days = np.where(cluster >= 0, cluster * tables["date_count"] + tables["task_date"][None, :], -1)
+        days = _distinct_per_row(cluster_days, tables["cluster_locations"] * tables["date_count"])
+        scores = scores - tables["cluster_day_penalty"] * days
+
+    # People per (candidate, date+slot, location), against capacity (<= 0: none).
+    rows = matrix.shape[0]
+    width = tables["date_slot_count"] * (location_count + 1)
+    keys = tables["task_date_slot"][None, :] * (location_count + 1) + locations
+    flat = (np.arange(rows)[:, None] * width + keys)[assigned]
+    weights = np.broadcast_to(tables["task_participants"][None, :], matrix.shape)[assigned]
+    usage = np.bincount(flat, weights=weights, minlength=rows * width).reshape(rows, width)
+    capacity = np.tile(tables["capacity"], tables["date_slot_count"])[None, :]
+    capacity_ok = ((capacity <= 0) | (usage <= capacity)).all(axis=1)
+    candidate_ok = (tables["candidates"][np.arange(matrix.shape[1])[None, :], locations] | ~assigned).all(axis=1)
+    return {"scores": scores.astype(np.int64), "capacity_ok": capacity_ok, "candidate_ok": candidate_ok}
+
+
+def score_batch(tables: Dict[str, Any], matrix: Any) -> Dict[str, Any]:
+    matrix = np.asarray(matrix, dtype=np.int64)
+    if matrix.ndim != 2 or matrix.shape[1] != len(tables["task_keys"]):
+        raise ValueError(f"expected a [candidates, {len(tables['task_keys'])}] matrix, got {matrix.shape}")
+    if matrix.size and (matrix.min() < -1 or matrix.max() >= tables["location_count"]):
+        raise ValueError("location indexes must be -1 or within normalized['locations']")
+    widest = max(
+        matrix.shape[1],
+        tables["required_pairs"],
+        tables["cluster_locations"] * tables["date_count"],
+        tables["date_slot_count"] * (tables["location_count"] + 1),
+    )
+    chunk = max(1, CHUNK_CELLS // max(1, widest))
+    parts = [_score_chunk(tables, matrix[start : start + chunk]) for start in range(0, matrix.shape[0], chunk)]
+    if not parts:
+        empty = np.zeros(0, dtype=np.int64)
+        return {"scores": empty, "capacity_ok": empty.astype(bool), "candidate_ok": empty.astype(bool)}
+    return {key: np.concatenate([part[key] for part in parts]) for key in parts[0]}
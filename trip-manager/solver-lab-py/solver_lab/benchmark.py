@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import csv
+import multiprocessing
+import os
+import platform
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from .generator import SIZE_PRESETS, generate_instance
+from .jsonio import read_json
+from .memory import peak_rss_mb
+from .result_cache import solver_version
+from .time_budget import time_sample
+
+BENCH_SCHEMA = "ec-planning-bench@1"
+PHASES = ("normalize", "precheck", "feasible", "optimize", "validate")
+# Metrics that do not depend on the search budget; feasible and optimize run
+# until their time limit, so only their model build time is compared.
+TIMED_METRICS = ("normalizeMs", "precheckMs", "validateMs", "buildMsPerModel")
+
+
+def _peak_rss_mb() -> Optional[float]:
+    peak = peak_rss_mb()
+    return None if peak is None else round(peak, 1)
+
+
+def _span_totals(rows: List[Dict[str, Any]], totals: Dict[str, List[float]]) -> Dict[str, List[float]]:
+    for row in rows:
+        entry = totals.setdefault(row["name"], [0, 0.0])
+        entry[0] += row["count"]
+        entry[1] += row["wallMs"]
+        _span_totals(row.get("children", []), totals)
+    return totals
+
+
+def _model_size(normalized: Dict[str, Any], task_space: Dict[str, Any]) -> Dict[str, Any]:
+    from .model_cp_sat import build_cp_model
+
+    bundle = build_cp_model(normalized, task_space, with_objective=True)
+    if bundle is None:
+        return {"modelVars": None, "modelConstraints": None}
+    proto = bundle["model"].Proto()
+    return {"modelVars": len(proto.variables), "modelConstraints": len(proto.constraints)}
+
+
+def build_cases(sizes: List[str], overrides: Dict[str, Any]) -> List[Dict[str, Any]]:
+    cases = []
+    for size in sizes:
+        if size not in SIZE_PRESETS:
+            raise ValueError(f"unknown size {size!r}; choose from {', '.join(SIZE_PRESETS)}")
+        cases.append({"name": size, "spec": {**SIZE_PRESETS[size], **overrides}})
+    return cases
+
+
+def file_cases(paths: List[str]) -> List[Dict[str, Any]]:
+    return [{"name": os.path.splitext(os.path.basename(path))[0], "path": os.path.abspath(path)} for path in paths]
+
+
+def run_case(case: Dict[str, Any], config: Dict[str, Any]) -> Dict[str, Any]:
+    # Runs in a fresh process so ru_maxrss is this case's peak alone.
+    from .optimize_lns import _score_solution
+    from .pipeline import run_pipeline
+
+    base_rss = _peak_rss_mb()
+    started_at = time.time()
+    payload = read_json(case["path"]) if case.get("path") else generate_instance(**case["spec"])
+    generate_ms = round((time.time() - started_at) * 1000, 3)
+    run = run_pipeline(payload, config)
+    spans = {row["name"]: row for row in run["report"]["timings"]["spans"]}
+    totals = _span_totals(run["report"]["timings"]["spans"], {})
+    build_count, build_ms = totals.get("cp_sat.build", [0, 0.0])
+    task_space = run["precheck"]["task_space"]
+    diagnostics = run["optimized"].get("diagnostics", {})
+    row: Dict[str, Any] = {
+        "case": case["name"],
+        "groups": len(run["normalized"]["groups"]),
+        "locations": len(run["normalized"]["locations"]),
+        "days": int(case.get("spec", {}).get("days", 0)),
+        "tasks": len(task_space["tasks"]),
+        "candidatePairs": sum(len(task["candidate_location_ids"]) for task in task_space["tasks"]),
+        "generateMs": generate_ms,
+    }
+    for phase in PHASES:
+        row[f"{phase}Ms"] = spans[phase]["wallMs"] if phase in spans else None
+    row.update(
+        {
+            "totalMs": run["report"]["timings"]["totalMs"],
+            "cpuMs": run["report"]["timings"]["cpuMs"],
+            "buildMs": round(build_ms, 3),
+            "buildMsPerModel": round(build_ms / build_count, 3) if build_count else None,
+            "solveMs": round(totals.get("cp_sat.solve", [0, 0.0])[1], 3),
+            "lnsIterations": int(diagnostics.get("lns_iterations", 0) or 0),
+            "score": _score_solution(run["normalized"], run["optimized"]["assignments"]),
+            "bound": diagnostics.get("score_bound"),
+            "stopReason": diagnostics.get("stop_reason") or diagnostics.get("reason"),
+            "hardViolations": len(run["audit"]["hard_violations"]),
+            "mustVisitMissing": len(run["audit"]["must_visit_missing"]),
+            "blockingErrors": len(run["precheck"]["blocking_errors"]),
+        }
+    )
+    row.update(_model_size(run["normalized"], task_space))
+    row["baseRssMb"] = base_rss
+    row["peakRssMb"] = _peak_rss_mb()
+    row["timeSample"] = time_sample(run["report"])
+    return row
+
+
+def run_benchmark(cases: List[Dict[str, Any]], config: Dict[str, Any]) -> Dict[str, Any]:
+    rows = []
+    context = multiprocessing.get_context("spawn")
+    for case in cases:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            rows.append(pool.submit(run_case, case, config).result())
+    return {
+        "schema": BENCH_SCHEMA,
+        "createdAt": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "machine": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "solver": solver_version(),
+        },
+        "config": config,
+        "cases": cases,
+        "rows": rows,
+    }
+
+
+def compare_to_baseline(
+    current: Dict[str, Any],
+    baseline: Dict[str, Any],
+    *,
+    time_tolerance: float = 0.25,
+    min_time_ms: float = 20.0,
+    memory_tolerance: float = 0.2,
+    score_tolerance: float = 0.01,
+) -> List[Dict[str, Any]]:
+    # A metric regresses when it is worse by more than the relative tolerance;
+    # tiny absolute timing changes (min_time_ms) are ignored as noise.
+    previous = {row["case"]: row for row in baseline.get("rows", [])}
+    regressions: List[Dict[str, Any]] = []
+
+    def flag(case: str, metric: str, before: Any, after: Any) -> None:
+        regressions.append({"case": case, "metric": metric, "baseline": before, "current": after})
+
+    for row in current["rows"]:
+        before = previous.get(row["case"])
+        if before is None:
+            continue
+        for metric in TIMED_METRICS:
+            old, new = before.get(metric), row.get(metric)
+            if old is None or new is None:
+                continue
+            if new > old * (1 + time_tolerance) and new - old > min_time_ms:
+                flag(row["case"], metric, old, new)
+        old, new = before.get("peakRssMb"), row.get("peakRssMb")
+        if old is not None and new is not None and new > old * (1 + memory_tolerance):
+            flag(row["case"], "peakRssMb", old, new)
+        old, new = before.get("score"), row.get("score")
+        if old is not None and new is not None and new < old - abs(old) * score_tolerance:
+            flag(row["case"], "score", old, new)
+        for metric in ("hardViolations", "mustVisitMissing"):
+            if row.get(metric, 0) > before.get(metric, 0):
+                flag(row["case"], metric, before.get(metric, 0), row.get(metric, 0))
+    return regressions
+
+
+CSV_COLUMNS = [
+    "case",
+    "groups",
+    "locations",
+    "days",
+    "tasks",
+    "candidatePairs",
+    "modelVars",
+    "modelConstraints",
+    "normalizeMs",
+    "precheckMs",
+    "feasibleMs",
+    "optimizeMs",
+    "validateMs",
+    "buildMsPerModel",
+    "solveMs",
+    "totalMs",
+    "cpuMs",
+    "peakRssMb",
+    "lnsIterations",
+    "score",
+    "bound",
+    "stopReason",
+    "hardViolations",
+    "mustVisitMissing",
+]
+
+
+def write_csv(path: str, result: Dict[str, Any]) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8", newline="") as handle:
+        writer = csv.DictWriter(handle, fieldnames=CSV_COLUMNS, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(result["rows"])
+
+
+def format_bench_table(result: Dict[str, Any]) -> List[str]:
+    header = ["case", "tasks", "vars", "precheck_ms", "build_ms", "total_ms", "peak_mb", "score", "stop"]
+    lines = [header]
+    for row in result["rows"]:
+        lines.append(
+            [
+                str(row["case"]),
+                str(row["tasks"]),
+                str(row.get("modelVars") or ""),
+                f"{row['precheckMs'] or 0:.0f}",
+                f"{row['buildMsPerModel'] or 0:.0f}",
+                f"{row['totalMs']:.0f}",
+                "" if row.get("peakRssMb") is None else f"{row['peakRssMb']:.0f}",
+                str(row["score"]),
+                str(row.get("stopReason") or ""),
+            ]
+        )
+    widths = [max(len(line[index]) for line in lines) for index in range(len(header))]
+    return ["  ".join(cell.ljust(widths[index]) for index, cell in enumerate(line)).rstrip() for line in lines]
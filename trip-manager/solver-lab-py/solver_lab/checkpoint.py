@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+from typing import Any, Dict, Optional
+
+CHECKPOINT_VERSION = 1
+BASE_FILE = "base.pkl"
+STATE_FILE = "checkpoint.pkl"
+
+
+def compute_input_hash(payload: Dict[str, Any]) -> str:
+    canonical = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def checkpoint_dir_for(root_dir: str, input_hash: str) -> str:
+    return os.path.join(root_dir, input_hash[:16])
+
+
+def _atomic_dump(path: str, payload: Dict[str, Any]) -> None:
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(prefix=".tmp-", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            pickle.dump(payload, handle, protocol=pickle.HIGHEST_PROTOCOL)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def _load(path: str) -> Optional[Dict[str, Any]]:
+    if not os.path.isfile(path):
+        return None
+    try:
+        with open(path, "rb") as handle:
+            payload = pickle.load(handle)
+    except (OSError, EOFError, pickle.UnpicklingError):
+        return None
+    if not isinstance(payload, dict) or payload.get("version") != CHECKPOINT_VERSION:
+        return None
+    return payload
+
+
+def write_base(
+    directory: str,
+    *,
+    input_hash: str,
+    normalized: Dict[str, Any],
+    precheck: Dict[str, Any],
+    phase1: Dict[str, Any],
+) -> None:
+    # Written once per run: everything the LNS loop needs besides its own state.
+    _atomic_dump(
+        os.path.join(directory, BASE_FILE),
+        {
+            "version": CHECKPOINT_VERSION,
+            "input_hash": input_hash,
+            "normalized": normalized,
+            "precheck": {
+                "blocking_errors": precheck.get("blocking_errors", []),
+                "warnings": precheck.get("warnings", []),
+            },
+            "phase1": phase1,
+        },
+    )
+
+
+def write_state(directory: str, *, input_hash: str, state: Dict[str, Any]) -> None:
+    _atomic_dump(
+        os.path.join(directory, STATE_FILE),
+        {"version": CHECKPOINT_VERSION, "input_hash": input_hash, "state": state},
+    )
+
+
+def load_checkpoint(directory: str, input_hash: str) -> Optional[Dict[str, Any]]:
+    base = _load(os.path.join(directory, BASE_FILE))
+    if base is None or base.get("input_hash") != input_hash:
+        return None
+    state = _load(os.path.join(directory, STATE_FILE))
+    if state is not None and state.get("input_hash") != input_hash:
+        state = None
+    return {
+        "normalized": base["normalized"],
+        "precheck": base["precheck"],
+        "phase1": base["phase1"],
+        "state": state["state"] if state is not None else None,
+    }
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Dict, Iterable, Iterator, Optional, Set
 
 
@@ -45,6 +46,9 @@ def clamp_range(
     return {"start_date": start, "end_date": end}
 
 
+# Plans span a few hundred dates at most, and availability checks ask for
+# the same ones over and over.
+@lru_cache(maxsize=4096)
 def get_weekday(date_text: str) -> int:
     date_obj = parse_date(date_text)
     if date_obj is None:
@@ -133,10 +137,20 @@ def is_location_available(
     date: str,
     slot_window: Dict[str, float],
 ) -> bool:
-    if not bool(location.get("is_active", False)):
-        return False
     if not is_group_type_allowed(location, group):
         return False
+    return is_location_open(location=location, date=date, slot_window=slot_window)
+
+
+def is_location_open(
+    *,
+    location: Dict[str, object],
+    date: str,
+    slot_window: Dict[str, float],
+) -> bool:
+    # The group-independent part of is_location_available.
+    if not bool(location.get("is_active", False)):
+        return False
     weekday = get_weekday(date)
     if weekday < 0:
         return False
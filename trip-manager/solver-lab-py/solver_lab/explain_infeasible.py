@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .model_cp_sat import build_cp_model, is_cp_sat_available, solve_with_assumptions
+
+
+def _collect_literals(bundle: Dict[str, Any]) -> Dict[Tuple[str, Any], Any]:
+    out: Dict[Tuple[str, Any], Any] = {}
+    for (group_id, location_id), literal in bundle["requirement_literals"].items():
+        out[("requirement", (group_id, location_id))] = literal
+    for group_id, literal in bundle["group_literals"].items():
+        out[("group", group_id)] = literal
+    return out
+
+
+def _core_order(key: Tuple[str, Any]) -> Tuple[bool, str]:
+    # Requirement rows first so that a group literal is only kept when its
+    # pinned assignments are part of the conflict on their own.
+    return (key[0] != "requirement", str(key[1]))
+
+
+def _describe_core(
+    normalized: Dict[str, Any],
+    core_keys: List[Tuple[str, Any]],
+) -> Dict[str, Any]:
+    groups_by_id = normalized["groups_by_id"]
+    locations_by_id = normalized["locations_by_id"]
+    conflicts: List[Dict[str, Any]] = []
+    group_ids = set()
+    location_ids = set()
+    for kind, value in core_keys:
+        if kind == "group":
+            group_ids.add(int(value))
+            continue
+        group_id, location_id = value
+        group_ids.add(int(group_id))
+        location_ids.add(int(location_id))
+        group = groups_by_id.get(group_id, {})
+        location = locations_by_id.get(location_id, {})
+        conflicts.append(
+            {
+                "group_id": int(group_id),
+                "group_name": group.get("name", f"#{group_id}"),
+                "location_id": int(location_id),
+                "location_name": location.get("name", f"#{location_id}"),
+            }
+        )
+    conflicts.sort(key=lambda row: (row["group_id"], row["location_id"]))
+    return {
+        "conflicts": conflicts,
+        "groups": [
+            {"group_id": group_id, "group_name": groups_by_id.get(group_id, {}).get("name", f"#{group_id}")}
+            for group_id in sorted(group_ids)
+        ],
+        "locations": [
+            {
+                "location_id": location_id,
+                "location_name": locations_by_id.get(location_id, {}).get("name", f"#{location_id}"),
+            }
+            for location_id in sorted(location_ids)
+        ],
+    }
+
+
+def explain_infeasibility(
+    normalized: Dict[str, Any],
+    task_space: Dict[str, Any],
+    *,
+    time_limit_sec: float,
+    seed: int,
+    fixed_tasks: Optional[Dict[str, int]] = None,
+) -> Dict[str, Any]:
+    if not is_cp_sat_available():
+        return {"status": "not_available", "conflicts": [], "groups": [], "locations": []}
+
+    deadline = time.time() + max(1.0, float(time_limit_sec))
+    bundle = build_cp_model(
+        normalized,
+        task_space,
+        fixed_tasks=fixed_tasks,
+        with_objective=False,
+        guard_requirements=True,
+    )
+    literal_by_key = _collect_literals(bundle)
+    by_index = {literal.Index(): key for key, literal in literal_by_key.items()}
+    solves = 0
+
+    ordered = sorted(literal_by_key.keys(), key=_core_order)
+    result = solve_with_assumptions(
+        bundle,
+        [literal_by_key[key] for key in ordered],
+        time_limit_sec=max(0.1, deadline - time.time()),
+        seed=seed,
+    )
+    solves += 1
+    if result["status"] != "INFEASIBLE":
+        return {
+            "status": "not_infeasible" if result["status"] in ("OPTIMAL", "FEASIBLE") else "unknown",
+            "solver_status": result["status"],
+            "solves": solves,
+            "minimal": False,
+            "conflicts": [],
+            "groups": [],
+            "locations": [],
+        }
+
+    core = [by_index[index] for index in result["core"] if index in by_index]
+    if not core:
+        # Infeasible without any assumption: no required row or pinned group
+        # is to blame, so there is nothing to shrink.
+        return {
+            "status": "unconditional",
+            "solver_status": "INFEASIBLE",
+            "solves": solves,
+            "minimal": False,
+            "conflicts": [],
+            "groups": [],
+            "locations": [],
+        }
+    core.sort(key=_core_order)
+
+    # Deletion-based shrinking: drop each member whose removal keeps the rest
+    # infeasible; adopt the smaller core reported by that solve when given.
+    minimal = True
+    cursor = 0
+    while cursor < len(core):
+        if time.time() >= deadline:
+            minimal = False
+            break
+        candidate = core[:cursor] + core[cursor + 1:]
+        if not candidate:
+            cursor += 1
+            continue
+        probe = solve_with_assumptions(
+            bundle,
+            [literal_by_key[key] for key in candidate],
+            time_limit_sec=max(0.1, deadline - time.time()),
+            seed=seed,
+        )
+        solves += 1
+        if probe["status"] == "INFEASIBLE":
+            reduced = {by_index[index] for index in probe["core"] if index in by_index}
+            if reduced:
+                candidate = [key for key in candidate if key in reduced]
+            core = candidate
+            continue
+        if probe["status"] not in ("OPTIMAL", "FEASIBLE"):
+            minimal = False
+        cursor += 1
+
+    described = _describe_core(normalized, core)
+    return {
+        "status": "explained",
+        "solver_status": "INFEASIBLE",
+        "solves": solves,
+        "minimal": minimal,
+        **described,
+    }
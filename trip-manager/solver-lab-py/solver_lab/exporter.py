@@ -61,7 +61,7 @@ def build_report_payload(
     audit: Dict[str, Any],
     elapsed_ms: int,
 ) -> Dict[str, Any]:
-    return {
+    report = {
         "summary": {
             "groups": len(normalized["groups"]),
             "locations": len(normalized["locations"]),
@@ -88,4 +88,7 @@ def build_report_payload(
             "mustVisitMissing": audit.get("must_visit_missing", []),
         },
     }
+    if phase1.get("infeasibility") is not None:
+        report["infeasibility"] = phase1["infeasibility"]
+    return report
 
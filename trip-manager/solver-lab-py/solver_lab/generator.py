@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import math
+import random
+from datetime import timedelta
+from typing import Any, Dict, List
+
+from .constraints import format_date, get_weekday, iter_dates, parse_date
+
+SLOT_WINDOWS = {
+    "MORNING": {"start": 6, "end": 12},
+    "AFTERNOON": {"start": 12, "end": 18},
+    "EVENING": {"start": 18, "end": 20.75},
+}
+GROUP_TYPES = ["primary", "secondary"]
+
+# Named sizes for benchmarks and hardware sizing; every knob of
+# generate_instance can still be overridden per call.
+SIZE_PRESETS: Dict[str, Dict[str, Any]] = {
+    "xs": {"groups": 4, "locations": 6, "days": 3},
+    "s": {"groups": 15, "locations": 10, "days": 3},
+    "m": {"groups": 30, "locations": 15, "days": 5},
+    "l": {"groups": 80, "locations": 30, "days": 7},
+    "xl": {"groups": 200, "locations": 60, "days": 10},
+}
+
+
+def _open_hours(rng: random.Random) -> Dict[str, Any]:
+    # Half-day venues: open for one of the two default slots only, sometimes
+    # with a different window on Sunday.
+    window = rng.choice([{"start": 6, "end": 12}, {"start": 12, "end": 18}, {"start": 8, "end": 18}])
+    hours: Dict[str, Any] = {"default": [window]}
+    if rng.random() < 0.3:
+        hours["0"] = [{"start": 6, "end": 12}]
+    return hours
+
+
+def generate_instance(
+    *,
+    groups: int = 30,
+    locations: int = 15,
+    days: int = 3,
+    capacity_tightness: float = 0.6,
+    required_density: float = 0.3,
+    closed_date_rate: float = 0.05,
+    open_hours_rate: float = 0.2,
+    cluster_share: float = 0.2,
+    target_share: float = 0.2,
+    existing_share: float = 0.0,
+    start_date: str = "2026-07-01",
+    seed: int = 42,
+) -> Dict[str, Any]:
+    # Seeded ec-planning-input@2 instance; the same arguments always give the
+    # same payload.
+    #
+    # capacity_tightness  peak demand / total capacity per slot (0 = no caps)
+    # required_density    must-visit share of a group's slots
+    # closed_date_rate    chance a location is closed on a given date
+    # open_hours_rate     share of locations with restricted open hours
+    # cluster_share       share of locations that prefer same-day visits
+    # target_share        share of locations limited to one group type
+    # existing_share      share of slots that already have an assignment
+    rng = random.Random(int(seed))
+    days = max(1, int(days))
+    group_count = max(1, int(groups))
+    location_count = max(1, int(locations))
+    start = parse_date(start_date)
+    if start is None:
+        raise ValueError(f"invalid start date: {start_date}")
+    end_date = format_date(start + timedelta(days=days - 1))
+    dates = list(iter_dates(start_date, end_date))
+    slot_keys = ["MORNING", "AFTERNOON"]
+
+    group_rows: List[Dict[str, Any]] = []
+    for index in range(group_count):
+        length = rng.randint(max(1, days // 2), days)
+        offset = rng.randint(0, days - length)
+        students = rng.randint(20, 60)
+        teachers = rng.randint(2, 6)
+        group_rows.append(
+            {
+                "id": 1000 + index,
+                "name": f"G{index:04d}",
+                "type": rng.choice(GROUP_TYPES),
+                "studentCount": students,
+                "teacherCount": teachers,
+                "participantCount": students + teachers,
+                "startDate": dates[offset],
+                "endDate": dates[offset + length - 1],
+            }
+        )
+
+    # Capacity: peak people in one slot spread over all locations, scaled so
+    # that demand / capacity is roughly capacity_tightness. The floor is the
+    # largest group, so every group fits somewhere without flattening the
+    # tightness knob.
+    peak_people = max(
+        sum(row["participantCount"] for row in group_rows if row["startDate"] <= date <= row["endDate"])
+        for date in dates
+    )
+    largest_group = max(row["participantCount"] for row in group_rows)
+    base_capacity = 0
+    if capacity_tightness > 0:
+        base_capacity = max(1, math.ceil(peak_people / (location_count * float(capacity_tightness))))
+
+    location_rows: List[Dict[str, Any]] = []
+    for index in range(location_count):
+        capacity = 0
+        if base_capacity:
+            capacity = max(largest_group, int(base_capacity * rng.uniform(0.5, 1.5)))
+        closed = [date for date in dates if rng.random() < closed_date_rate]
+        location_rows.append(
+            {
+                "id": 5000 + index,
+                "name": f"L{index:03d}",
+                "targetGroups": rng.choice(GROUP_TYPES) if rng.random() < target_share else "all",
+                "isActive": True,
+                "capacity": capacity,
+                "clusterPreferSameDay": rng.random() < cluster_share,
+                "blockedWeekdays": str(rng.randint(0, 6)) if rng.random() < 0.1 else "",
+                "closedDates": closed,
+                "openHours": _open_hours(rng) if rng.random() < open_hours_rate else None,
+            }
+        )
+
+    required: Dict[str, Dict[str, List[int]]] = {}
+    existing: List[Dict[str, Any]] = []
+    for group in group_rows:
+        group_dates = [date for date in dates if group["startDate"] <= date <= group["endDate"]]
+        slots = len(group_dates) * len(slot_keys)
+        allowed = [row for row in location_rows if row["targetGroups"] in ("all", group["type"])]
+        count = min(len(allowed), int(round(slots * float(required_density))))
+        if count > 0:
+            required[str(group["id"])] = {
+                "locationIds": sorted(row["id"] for row in rng.sample(allowed, count))
+            }
+        if existing_share > 0 and allowed:
+            for date in group_dates:
+                for slot in slot_keys:
+                    if rng.random() >= existing_share:
+                        continue
+                    location = rng.choice(allowed)
+                    if date in location["closedDates"] or str(get_weekday(date)) == location["blockedWeekdays"]:
+                        continue
+                    existing.append(
+                        {
+                            "groupId": group["id"],
+                            "locationId": location["id"],
+                            "date": date,
+                            "timeSlot": slot,
+                            "participantCount": group["participantCount"],
+                        }
+                    )
+
+    return {
+        "schema": "ec-planning-input@2",
+        "meta": {
+            "snapshotId": f"synthetic-{seed}-{group_count}x{location_count}x{days}",
+            "source": "generator",
+        },
+        "scope": {"startDate": start_date, "endDate": end_date, "groupIds": [row["id"] for row in group_rows]},
+        "rules": {"timeSlots": slot_keys, "slotWindows": SLOT_WINDOWS},
+        "data": {
+            "groups": group_rows,
+            "locations": location_rows,
+            "requiredLocationsByGroup": required,
+            "existingAssignments": existing,
+        },
+    }
+
+
+def generate_preset(size: str, **overrides: Any) -> Dict[str, Any]:
+    if size not in SIZE_PRESETS:
+        raise ValueError(f"unknown size {size!r}; choose from {', '.join(SIZE_PRESETS)}")
+    return generate_instance(**{**SIZE_PRESETS[size], **overrides})
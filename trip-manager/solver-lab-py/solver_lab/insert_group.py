@@ -0,0 +1,300 @@
+from __future__ import annotations
+
+import time
+from typing import Any, Dict, List, Optional, Set
+
+from .constraints import make_group_slot_key, make_usage_key
+from .model_cp_sat import build_cp_model, is_cp_sat_available, solve_cp_model
+from .normalize import normalize_group_row
+from .task_space import build_task_space
+
+
+def _sub_normalized(
+    normalized: Dict[str, Any],
+    groups: List[Dict[str, Any]],
+    required_by_group: Dict[int, Set[int]],
+) -> Dict[str, Any]:
+    # Same locations and rules, restricted to the groups being (re)placed.
+    view = dict(normalized)
+    view["groups"] = groups
+    view["groups_by_id"] = {row["id"]: row for row in groups}
+    view["required_by_group"] = {
+        row["id"]: set(required_by_group.get(row["id"], set())) for row in groups
+    }
+    view["existing_assignments"] = []
+    return view
+
+
+def _build_usage(assignments: List[Dict[str, Any]], skip_groups: Set[int]) -> Dict[str, int]:
+    usage: Dict[str, int] = {}
+    for row in assignments:
+        if int(row["group_id"]) in skip_groups:
+            continue
+        key = make_usage_key(row["date"], row["time_slot"], int(row["location_id"]))
+        usage[key] = usage.get(key, 0) + int(row["participant_count"])
+    return usage
+
+
+def _has_room(
+    locations_by_id: Dict[int, Dict[str, Any]],
+    usage: Dict[str, int],
+    task: Dict[str, Any],
+    location_id: int,
+) -> bool:
+    capacity = int(locations_by_id[location_id].get("capacity", 0) or 0)
+    if capacity <= 0:
+        return True
+    key = make_usage_key(task["date"], task["time_slot"], location_id)
+    return usage.get(key, 0) + int(task["participant_count"]) <= capacity
+
+
+def _match_required(
+    normalized: Dict[str, Any],
+    tasks: List[Dict[str, Any]],
+    required_ids: List[int],
+    usage: Dict[str, int],
+) -> Dict[int, Dict[str, Any]]:
+    # Bipartite matching of required locations onto the group's free slots
+    # (augmenting paths); exact when no other group may move.
+    locations_by_id = normalized["locations_by_id"]
+    edges: Dict[int, List[int]] = {}
+    for location_id in required_ids:
+        edges[location_id] = [
+            index
+            for index, task in enumerate(tasks)
+            if location_id in task["candidate_location_ids"]
+            and _has_room(locations_by_id, usage, task, location_id)
+        ]
+    task_owner: Dict[int, int] = {}
+
+    def augment(location_id: int, seen: Set[int]) -> bool:
+        for index in edges[location_id]:
+            if index in seen:
+                continue
+            seen.add(index)
+            owner = task_owner.get(index)
+            if owner is None or augment(owner, seen):
+                task_owner[index] = location_id
+                return True
+        return False
+
+    for location_id in required_ids:
+        augment(location_id, set())
+    return {location_id: tasks[index] for index, location_id in task_owner.items()}
+
+
+def _placement_row(task: Dict[str, Any], location_id: int) -> Dict[str, Any]:
+    return {
+        "group_id": int(task["group_id"]),
+        "location_id": int(location_id),
+        "date": task["date"],
+        "time_slot": task["time_slot"],
+        "participant_count": int(task["participant_count"]),
+    }
+
+
+def _fill_free_slots(
+    normalized: Dict[str, Any],
+    tasks: List[Dict[str, Any]],
+    placements: List[Dict[str, Any]],
+    usage: Dict[str, int],
+) -> None:
+    locations_by_id = normalized["locations_by_id"]
+    used_keys = {make_group_slot_key(row["group_id"], row["date"], row["time_slot"]) for row in placements}
+    for task in tasks:
+        if task["key"] in used_keys:
+            continue
+        for location_id in task["candidate_location_ids"]:
+            if _has_room(locations_by_id, usage, task, location_id):
+                placements.append(_placement_row(task, location_id))
+                key = make_usage_key(task["date"], task["time_slot"], location_id)
+                usage[key] = usage.get(key, 0) + int(task["participant_count"])
+                break
+
+
+def _shift_candidates(
+    new_tasks: List[Dict[str, Any]],
+    required_ids: List[int],
+    assignments: List[Dict[str, Any]],
+    limit: int,
+) -> List[int]:
+    # Groups occupying a required location in a slot the new group could use.
+    wanted = {
+        make_usage_key(task["date"], task["time_slot"], location_id)
+        for task in new_tasks
+        for location_id in required_ids
+        if location_id in task["candidate_location_ids"]
+    }
+    counts: Dict[int, int] = {}
+    for row in assignments:
+        if make_usage_key(row["date"], row["time_slot"], int(row["location_id"])) in wanted:
+            group_id = int(row["group_id"])
+            counts[group_id] = counts.get(group_id, 0) + 1
+    ranked = sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+    return [group_id for group_id, _ in ranked[:limit]]
+
+
+def insert_group(
+    normalized: Dict[str, Any],
+    assignments: List[Dict[str, Any]],
+    group: Dict[str, Any],
+    required_location_ids: List[int],
+    *,
+    max_shifted_groups: int = 2,
+    max_candidate_groups: int = 8,
+    time_cap_sec: float = 1.0,
+    workers: int = 8,
+    seed: int = 42,
+) -> Dict[str, Any]:
+    started_at = time.time()
+    deadline = started_at + max(0.1, float(time_cap_sec))
+    group_id = int(group["id"])
+    if group_id in normalized["groups_by_id"]:
+        raise ValueError(f"group {group_id} already exists in the snapshot")
+    locations_by_id = normalized["locations_by_id"]
+    required_ids = sorted({int(value) for value in required_location_ids if int(value) in locations_by_id})
+    unknown_ids = sorted({int(value) for value in required_location_ids} - set(required_ids))
+
+    new_view = _sub_normalized(normalized, [group], {group_id: set(required_ids)})
+    new_tasks = build_task_space(new_view)["tasks_by_group"].get(group_id, [])
+
+    def finish(status: str, **extra: Any) -> Dict[str, Any]:
+        out = {
+            "fits": status in ("fits", "fits_with_shifts"),
+            "status": status,
+            "group_id": group_id,
+            "placements": [],
+            "displacements": [],
+            "shifted_groups": [],
+            "unknown_location_ids": unknown_ids,
+        }
+        out.update(extra)
+        out["elapsed_ms"] = int((time.time() - started_at) * 1000)
+        return out
+
+    if unknown_ids or not new_tasks:
+        return finish("no_fit", reason="unknown_location" if unknown_ids else "no_slots_in_scope")
+
+    # Stage 1: residual capacity only, nobody moves.
+    usage = _build_usage(assignments, set())
+    matched = _match_required(normalized, new_tasks, required_ids, usage)
+    if len(matched) == len(required_ids):
+        placements = [_placement_row(task, location_id) for location_id, task in matched.items()]
+        for row in placements:
+            key = make_usage_key(row["date"], row["time_slot"], row["location_id"])
+            usage[key] = usage.get(key, 0) + int(row["participant_count"])
+        _fill_free_slots(normalized, new_tasks, placements, usage)
+        placements.sort(key=lambda row: (row["date"], normalized["slot_keys"].index(row["time_slot"])))
+        return finish("fits", placements=placements)
+
+    unmatched = [location_id for location_id in required_ids if location_id not in matched]
+    if max_shifted_groups <= 0 or not is_cp_sat_available():
+        return finish("no_fit", reason="no_residual_capacity", unmatched_location_ids=unmatched)
+
+    # Stage 2: let up to max_shifted_groups nearby groups move.
+    candidate_ids = _shift_candidates(new_tasks, required_ids, assignments, max_candidate_groups)
+    groups_by_id = normalized["groups_by_id"]
+    sub_groups = [group] + [groups_by_id[cid] for cid in candidate_ids if cid in groups_by_id]
+    required_by_group = dict(normalized["required_by_group"])
+    required_by_group[group_id] = set(required_ids)
+    sub_view = _sub_normalized(normalized, sub_groups, required_by_group)
+    sub_space = build_task_space(sub_view)
+    moving = {int(row["id"]) for row in sub_groups}
+    bundle = build_cp_model(
+        sub_view,
+        sub_space,
+        with_objective=False,
+        reserved_usage=_build_usage(assignments, moving),
+    )
+    model = bundle["model"]
+    task_loc_to_var = bundle["task_loc_to_var"]
+
+    current: Dict[str, int] = {}
+    for row in assignments:
+        if int(row["group_id"]) in moving:
+            current[make_group_slot_key(row["group_id"], row["date"], row["time_slot"])] = int(row["location_id"])
+
+    shift_vars: Dict[int, Any] = {}
+    keep_terms: List[Any] = []
+    assign_terms: List[Any] = []
+    for cid in candidate_ids:
+        shift_vars[cid] = model.NewBoolVar(f"shift_{cid}")
+    for task in sub_space["tasks"]:
+        task_vars = [task_loc_to_var[(task["key"], loc)] for loc in task["candidate_location_ids"]]
+        assign_terms.extend(task_vars)
+        if task["group_id"] == group_id:
+            continue
+        shifted = shift_vars.get(task["group_id"])
+        if shifted is None:
+            continue
+        current_location = current.get(task["key"])
+        keep_var = task_loc_to_var.get((task["key"], current_location)) if current_location else None
+        if keep_var is not None:
+            model.Add(keep_var == 1).OnlyEnforceIf(shifted.Not())
+            keep_terms.append(keep_var)
+        elif current_location is None and task_vars:
+            model.Add(sum(task_vars) == 0).OnlyEnforceIf(shifted.Not())
+    model.Add(sum(shift_vars.values()) <= int(max_shifted_groups))
+    model.Maximize(10 * sum(keep_terms) + sum(assign_terms) - 1000 * sum(shift_vars.values()))
+
+    remaining = deadline - time.time()
+    if remaining <= 0.05:
+        return finish("unknown", reason="time_cap", unmatched_location_ids=unmatched)
+    solved = solve_cp_model(
+        bundle,
+        time_limit_sec=remaining,
+        workers=workers,
+        seed=seed,
+        hints=current,
+    )
+    if not solved["assignments"]:
+        status = "no_fit" if solved["status"] == "INFEASIBLE" else "unknown"
+        return finish(
+            status,
+            reason="shift_limit" if status == "no_fit" else "time_cap",
+            unmatched_location_ids=unmatched,
+            candidate_groups=candidate_ids,
+        )
+
+    placements: List[Dict[str, Any]] = []
+    proposed: Dict[str, Dict[str, Any]] = {}
+    for row in solved["assignments"]:
+        if row["group_id"] == group_id:
+            placements.append(row)
+        else:
+            proposed[make_group_slot_key(row["group_id"], row["date"], row["time_slot"])] = row
+    displacements: List[Dict[str, Any]] = []
+    for task in sub_space["tasks"]:
+        if task["group_id"] == group_id:
+            continue
+        before = current.get(task["key"])
+        after_row = proposed.get(task["key"])
+        after = int(after_row["location_id"]) if after_row else None
+        if before != after:
+            displacements.append(
+                {
+                    "group_id": int(task["group_id"]),
+                    "date": task["date"],
+                    "time_slot": task["time_slot"],
+                    "from_location_id": before,
+                    "to_location_id": after,
+                }
+            )
+    placements.sort(key=lambda row: (row["date"], normalized["slot_keys"].index(row["time_slot"])))
+    return finish(
+        "fits_with_shifts" if displacements else "fits",
+        placements=placements,
+        displacements=displacements,
+        shifted_groups=sorted({row["group_id"] for row in displacements}),
+        solver_status=solved["status"],
+    )
+
+
+def load_insert_request(payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    if not isinstance(payload, dict):
+        return None
+    group = normalize_group_row(payload.get("group"))
+    required = payload.get("requiredLocationIds", payload.get("required_location_ids", []))
+    if group is None or not isinstance(required, list):
+        return None
+    return {"group": group, "required_location_ids": required}
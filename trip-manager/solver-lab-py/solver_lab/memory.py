@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+# Rough CP-SAT footprint per candidate (task, location) pair, fitted on the
+# generator's l/xl presets: the Python model builder keeps ~0.8 KB per pair,
+# the solver ~3.5 KB per pair plus ~1.6 KB per pair for every search worker.
+BUILD_KB_PER_PAIR = 0.8
+SOLVE_KB_PER_PAIR = 3.5
+WORKER_KB_PER_PAIR = 1.6
+SOLVE_BASE_MB = 20.0
+
+
+def current_rss_mb() -> Optional[float]:
+    try:
+        with open("/proc/self/statm", "r", encoding="ascii") as handle:
+            pages = int(handle.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import psutil  # type: ignore
+
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    except Exception:
+        return None
+
+
+def peak_rss_mb() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def estimate_model_mb(candidate_pairs: int, workers: int) -> float:
+    per_pair_kb = BUILD_KB_PER_PAIR + SOLVE_KB_PER_PAIR + WORKER_KB_PER_PAIR * max(1, int(workers))
+    return SOLVE_BASE_MB + candidate_pairs * per_pair_kb / 1024
+
+
+def candidate_pairs(tasks: List[Dict[str, Any]]) -> int:
+    return sum(len(task["candidate_location_ids"]) for task in tasks)
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return None if value is None else round(value, 1)
+
+
+# Per-phase memory accounting plus the budget watchdog. A sampler thread reads
+# RSS every sample_sec, so phase peaks include CP-SAT's native allocations that
+# tracemalloc cannot see; tracemalloc (trace_python) adds the Python-heap peak
+# per phase at the cost of slower Python code. When a budget is set the
+# sampler raises over_budget as soon as RSS crosses it; CP-SAT solves poll
+# that through should_stop, and the pipeline/LNS step down to leaner
+# strategies, each recorded in degradations.
+class MemoryMonitor:
+    def __init__(self, budget_mb: float = 0.0, *, trace_python: bool = False, sample_sec: float = 0.05) -> None:
+        self.budget_mb = max(0.0, float(budget_mb))
+        self.trace_python = bool(trace_python)
+        self.sample_sec = max(0.01, float(sample_sec))
+        self.over_budget = threading.Event()
+        self._trip_mb = self.budget_mb
+        self.degradations: List[Dict[str, Any]] = []
+        self.on_degrade: Optional[Callable[[Dict[str, Any]], None]] = None
+        self.phases: Dict[str, Dict[str, Any]] = {}
+        self._phase = ""
+        self._phase_peak = 0.0
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started_tracemalloc = False
+        self._started_at = time.time()
+
+    def start(self) -> "MemoryMonitor":
+        if self.trace_python and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        if current_rss_mb() is not None:
+            self._thread = threading.Thread(target=self._sample_loop, name="memory-monitor", daemon=True)
+            self._thread.start()
+        return self
+
+    def _sample_loop(self) -> None:
+        while not self._stopped.wait(self.sample_sec):
+            self.sample()
+
+    def sample(self) -> Optional[float]:
+        rss = current_rss_mb()
+        if rss is None:
+            return None
+        with self._lock:
+            self._phase_peak = max(self._phase_peak, rss)
+        if self.budget_mb and rss > self._trip_mb:
+            self.over_budget.set()
+        return rss
+
+    def headroom_mb(self) -> Optional[float]:
+        if not self.budget_mb:
+            return None
+        rss = current_rss_mb()
+        return None if rss is None else self.budget_mb - rss
+
+    def fits(self, needed_mb: float) -> bool:
+        headroom = self.headroom_mb()
+        return headroom is None or needed_mb <= headroom
+
+    def should_stop(self, other: Any = None) -> Any:
+        # CP-SAT stop callback: the caller's own stop request or the budget.
+        def check() -> bool:
+            return self.over_budget.is_set() or (other is not None and bool(other()))
+
+        return check
+
+    def rearm(self) -> None:
+        # After stepping down: freed memory mostly stays in the process, so
+        # only real growth (5% of the budget) past the current RSS trips the
+        # watchdog again.
+        rss = current_rss_mb()
+        self._trip_mb = max(self.budget_mb, rss or 0.0) + self.budget_mb * 0.05
+        self.over_budget.clear()
+
+    def degrade(self, step: str, reason: str, **fields: Any) -> None:
+        row = {"step": step, "reason": reason, "phase": self._phase, "rssMb": _round(current_rss_mb())}
+        row["tMs"] = int((time.time() - self._started_at) * 1000)
+        row.update(fields)
+        self.degradations.append(row)
+        if self.on_degrade is not None:
+            self.on_degrade(row)
+
+    def phase_start(self, phase: str) -> None:
+        rss = self.sample()
+        with self._lock:
+            self._phase = phase
+            self._phase_peak = rss or 0.0
+        self.phases[phase] = {"rssStartMb": _round(rss)}
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+            self.phases[phase]["pyStartMb"] = _round(tracemalloc.get_traced_memory()[0] / (1024 * 1024))
+
+    def phase_end(self, phase: str) -> None:
+        row = self.phases.setdefault(phase, {})
+        rss = self.sample()
+        with self._lock:
+            row["rssEndMb"] = _round(rss)
+            row["rssPeakMb"] = _round(self._phase_peak) if self._phase_peak else None
+        if tracemalloc.is_tracing() and "pyStartMb" in row:
+            current, peak = tracemalloc.get_traced_memory()
+            row["pyEndMb"] = _round(current / (1024 * 1024))
+            row["pyPeakMb"] = _round(peak / (1024 * 1024))
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "budgetMb": self.budget_mb or None,
+            "overBudget": self.over_budget.is_set(),
+            "peakRssMb": _round(peak_rss_mb()),
+            "tracePython": self.trace_python,
+            "phases": self.phases,
+            "degradations": self.degradations,
+        }
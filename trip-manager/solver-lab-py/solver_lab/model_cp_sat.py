@@ -1,30 +1,50 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional, Tuple
+import threading
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
 
 from .constraints import make_usage_key
+from .tracing import span, traced
 
-try:
-    from ortools.sat.python import cp_model  # type: ignore
+# ortools (and the numpy/pandas it pulls in) takes ~0.5 s to import, so it is
+# loaded on first use; --help, validate and precheck never pay for it.
+_CP_MODEL: Any = None
+_CP_MODEL_LOADED = False
+_STOP_AT_FIRST: Any = None
 
-    ORTOOLS_AVAILABLE = True
-except Exception:  # pragma: no cover - runtime availability
-    cp_model = None  # type: ignore
-    ORTOOLS_AVAILABLE = False
+
+def _load_cp_model() -> Any:
+    global _CP_MODEL, _CP_MODEL_LOADED
+    if not _CP_MODEL_LOADED:
+        try:
+            with span("ortools.import"):
+                from ortools.sat.python import cp_model  # type: ignore
+
+            _CP_MODEL = cp_model
+        except Exception:  # pragma: no cover - runtime availability
+            _CP_MODEL = None
+        _CP_MODEL_LOADED = True
+    return _CP_MODEL
 
 
 def is_cp_sat_available() -> bool:
-    return ORTOOLS_AVAILABLE
+    return _load_cp_model() is not None
 
 
+@traced("cp_sat.build")
 def build_cp_model(
     normalized: Dict[str, Any],
     task_space: Dict[str, Any],
     *,
     fixed_tasks: Optional[Dict[str, int]] = None,
     with_objective: bool = True,
+    guard_requirements: bool = False,
+    reserved_usage: Optional[Dict[str, int]] = None,
+    enforced_required: Optional[Dict[int, Set[int]]] = None,
+    open_cluster_days: Optional[Set[Tuple[int, str]]] = None,
 ):
-    if not ORTOOLS_AVAILABLE:
+    cp_model = _load_cp_model()
+    if cp_model is None:
         return None
 
     model = cp_model.CpModel()
@@ -40,8 +60,24 @@ def build_cp_model(
     task_var_map: Dict[str, List[Any]] = {}
     task_loc_to_var: Dict[Tuple[str, int], Any] = {}
     cluster_day_candidate_vars: Dict[Tuple[int, str], List[Any]] = {}
+    # assumption literals used by infeasibility explanation
+    group_literals: Dict[int, Any] = {}
+    requirement_literals: Dict[Tuple[int, int], Any] = {}
+
+    def group_literal(group_id: int) -> Any:
+        if group_id not in group_literals:
+            group_literals[group_id] = model.NewBoolVar(f"group_{group_id}")
+        return group_literals[group_id]
 
     fixed_tasks = fixed_tasks or {}
+    # people already placed outside this model, keyed by usage key
+    reserved_usage = reserved_usage or {}
+    # required pairs that must be covered inside this model (default: all);
+    # the +20 objective term still follows required_by_group
+    if enforced_required is None:
+        enforced_required = required_by_group
+    # (cluster location, date) days already used outside this model
+    open_cluster_days = open_cluster_days or set()
 
     for task_index, task in enumerate(tasks):
         task_key = task["key"]
@@ -61,20 +97,24 @@ def build_cp_model(
 
         fixed_location_id = fixed_tasks.get(task_key)
         if fixed_location_id is not None and vars_for_task:
+            guard = [group_literal(int(task["group_id"]))] if guard_requirements else []
             has_fixed_candidate = False
             for location_id in candidates:
                 var = task_loc_to_var[(task_key, location_id)]
                 if location_id == fixed_location_id:
-                    model.Add(var == 1)
+                    model.Add(var == 1).OnlyEnforceIf(guard)
                     has_fixed_candidate = True
                 else:
-                    model.Add(var == 0)
+                    model.Add(var == 0).OnlyEnforceIf(guard)
             if not has_fixed_candidate:
                 # impossible fixed assignment; make model infeasible quickly
-                model.Add(0 == 1)
+                if guard:
+                    model.AddBoolOr([lit.Not() for lit in guard])
+                else:
+                    model.Add(0 == 1)
 
     # required coverage
-    for group_id, required_set in required_by_group.items():
+    for group_id, required_set in enforced_required.items():
         group_tasks = task_space["tasks_by_group"].get(group_id, [])
         for location_id in required_set:
             required_vars: List[Any] = []
@@ -82,7 +122,15 @@ def build_cp_model(
                 var = task_loc_to_var.get((task["key"], location_id))
                 if var is not None:
                     required_vars.append(var)
-            if not required_vars:
+            if guard_requirements:
+                row_literal = model.NewBoolVar(f"req_{group_id}_{location_id}")
+                requirement_literals[(int(group_id), int(location_id))] = row_literal
+                guard = [group_literal(int(group_id)), row_literal]
+                if not required_vars:
+                    model.AddBoolOr([lit.Not() for lit in guard])
+                else:
+                    model.Add(sum(required_vars) >= 1).OnlyEnforceIf(guard)
+            elif not required_vars:
                 # no candidate exists for a required location
                 model.Add(0 == 1)
             else:
@@ -106,7 +154,8 @@ def build_cp_model(
         capacity = int(location.get("capacity", 0) or 0)
         if capacity <= 0:
             continue
-        model.Add(sum(weight * var for weight, var in entries) <= capacity)
+        residual = max(0, capacity - int(reserved_usage.get(usage_key, 0)))
+        model.Add(sum(weight * var for weight, var in entries) <= residual)
 
     if with_objective:
         objective_terms: List[Any] = []
@@ -123,7 +172,7 @@ def build_cp_model(
 
         if cluster_day_penalty > 0:
             for (location_id, date_text), vars_for_day in cluster_day_candidate_vars.items():
-                if not vars_for_day:
+                if not vars_for_day or (location_id, date_text) in open_cluster_days:
                     continue
                 safe_date = date_text.replace("-", "")
                 day_used = model.NewBoolVar(f"cluster_day_{location_id}_{safe_date}")
@@ -140,33 +189,73 @@ def build_cp_model(
         "tasks": tasks,
         "task_space": task_space,
         "task_loc_to_var": task_loc_to_var,
+        "group_literals": group_literals,
+        "requirement_literals": requirement_literals,
     }
 
 
-if ORTOOLS_AVAILABLE:
-    class _StopAtFirstSolution(cp_model.CpSolverSolutionCallback):  # type: ignore
-        def __init__(self) -> None:
-            super().__init__()
-            self.found = False
+def _stop_at_first_solution() -> Any:
+    global _STOP_AT_FIRST
+    if _STOP_AT_FIRST is None:
+        cp_model = _load_cp_model()
+
+        class _StopAtFirstSolution(cp_model.CpSolverSolutionCallback):  # type: ignore
+            def __init__(self) -> None:
+                super().__init__()
+                self.found = False
+
+            def on_solution_callback(self) -> None:
+                self.found = True
+                self.StopSearch()
+
+        _STOP_AT_FIRST = _StopAtFirstSolution
+    return _STOP_AT_FIRST()
+
+
+def solve_with_assumptions(
+    bundle: Dict[str, Any],
+    literals: List[Any],
+    *,
+    time_limit_sec: float,
+    seed: int,
+) -> Dict[str, Any]:
+    cp_model = _load_cp_model()
+    if cp_model is None:
+        return {"status": "not_available", "core": []}
 
-        def on_solution_callback(self) -> None:
-            self.found = True
-            self.StopSearch()
-else:
-    class _StopAtFirstSolution:  # pragma: no cover
-        pass
+    model = bundle["model"]
+    model.ClearAssumptions()
+    model.AddAssumptions(literals)
 
+    solver = cp_model.CpSolver()  # type: ignore
+    solver.parameters.max_time_in_seconds = max(0.1, float(time_limit_sec))
+    # unsat cores are only reported by the single-worker search
+    solver.parameters.num_search_workers = 1
+    solver.parameters.random_seed = int(seed)
+    solver.parameters.log_search_progress = False
+    status = solver.Solve(model)
+    model.ClearAssumptions()
+
+    core: List[int] = []
+    if status == cp_model.INFEASIBLE:  # type: ignore
+        core = [int(index) for index in solver.SufficientAssumptionsForInfeasibility()]
+    return {"status": solver.StatusName(status), "core": core}
 
+
+@traced("cp_sat.solve")
 def solve_cp_model(
     bundle: Dict[str, Any],
     *,
-    time_limit_sec: int,
+    time_limit_sec: float,
     workers: int,
     seed: int,
     stop_after_first: bool = False,
     hints: Optional[Dict[str, int]] = None,
+    should_stop: Optional[Callable[[], bool]] = None,
+    params: Optional[Dict[str, Any]] = None,
 ) -> Dict[str, Any]:
-    if not ORTOOLS_AVAILABLE:
+    cp_model = _load_cp_model()
+    if cp_model is None:
         return {"status": "not_available", "assignments": [], "objective": None}
 
     model = bundle["model"]
@@ -179,16 +268,37 @@ def solve_cp_model(
             model.AddHint(var, 1)
 
     solver = cp_model.CpSolver()  # type: ignore
-    solver.parameters.max_time_in_seconds = max(1, int(time_limit_sec))
+    # sub-second caps are honoured; whole-second callers are unaffected
+    solver.parameters.max_time_in_seconds = max(0.05, float(time_limit_sec))
     solver.parameters.num_search_workers = max(1, int(workers))
     solver.parameters.random_seed = int(seed)
     solver.parameters.log_search_progress = False
+    # preset / tuning overrides, e.g. linearization_level or symmetry_level
+    for name, value in (params or {}).items():
+        setattr(solver.parameters, name, value)
+
+    watcher = None
+    solving_done = threading.Event()
+    if should_stop is not None:
+        def watch() -> None:
+            while not solving_done.wait(0.1):
+                if should_stop():
+                    solver.StopSearch()
+                    return
+
+        watcher = threading.Thread(target=watch, daemon=True)
+        watcher.start()
 
-    if stop_after_first:
-        callback = _StopAtFirstSolution()
-        status = solver.Solve(model, callback)
-    else:
-        status = solver.Solve(model)
+    try:
+        if stop_after_first:
+            callback = _stop_at_first_solution()
+            status = solver.Solve(model, callback)
+        else:
+            status = solver.Solve(model)
+    finally:
+        solving_done.set()
+        if watcher is not None:
+            watcher.join()
 
     status_name = solver.StatusName(status)
     if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):  # type: ignore
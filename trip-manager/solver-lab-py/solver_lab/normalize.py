@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
 from .constraints import (
     is_valid_date,
@@ -68,6 +68,34 @@ def _extract_schema_view(payload: Dict[str, Any]) -> Tuple[str, Dict[str, Any],
     raise ValueError(f"Unsupported schema: {schema or 'unknown'}")
 
 
+def normalize_group_row(row: Any) -> Optional[Dict[str, Any]]:
+    if not isinstance(row, dict):
+        return None
+    group_id = _as_int(row.get("id"))
+    if group_id <= 0:
+        return None
+    group_start = str(row.get("startDate", row.get("start_date", ""))).strip()
+    group_end = str(row.get("endDate", row.get("end_date", ""))).strip()
+    if not is_valid_date(group_start) or not is_valid_date(group_end) or group_start > group_end:
+        return None
+    student_count = max(0, _as_int(row.get("studentCount", row.get("student_count", 0)), 0))
+    teacher_count = max(0, _as_int(row.get("teacherCount", row.get("teacher_count", 0)), 0))
+    participant_count = _as_int(
+        row.get("participantCount", student_count + teacher_count),
+        student_count + teacher_count,
+    )
+    if participant_count <= 0:
+        participant_count = max(1, student_count + teacher_count)
+    return {
+        "id": group_id,
+        "name": str(row.get("name", "")).strip() or f"#{group_id}",
+        "type": str(row.get("type", "all")).strip() or "all",
+        "start_date": group_start,
+        "end_date": group_end,
+        "participant_count": participant_count,
+    }
+
+
 def normalize_input(payload: Dict[str, Any]) -> Dict[str, Any]:
     if not isinstance(payload, dict):
         raise ValueError("Input payload must be an object")
@@ -98,33 +126,9 @@ def normalize_input(payload: Dict[str, Any]) -> Dict[str, Any]:
 
     groups: List[Dict[str, Any]] = []
     for row in data.get("groups", []):
-        if not isinstance(row, dict):
-            continue
-        group_id = _as_int(row.get("id"))
-        if group_id <= 0:
-            continue
-        group_start = str(row.get("startDate", row.get("start_date", ""))).strip()
-        group_end = str(row.get("endDate", row.get("end_date", ""))).strip()
-        if not is_valid_date(group_start) or not is_valid_date(group_end) or group_start > group_end:
-            continue
-        student_count = max(0, _as_int(row.get("studentCount", row.get("student_count", 0)), 0))
-        teacher_count = max(0, _as_int(row.get("teacherCount", row.get("teacher_count", 0)), 0))
-        participant_count = _as_int(
-            row.get("participantCount", student_count + teacher_count),
-            student_count + teacher_count,
-        )
-        if participant_count <= 0:
-            participant_count = max(1, student_count + teacher_count)
-        groups.append(
-            {
-                "id": group_id,
-                "name": str(row.get("name", "")).strip() or f"#{group_id}",
-                "type": str(row.get("type", "all")).strip() or "all",
-                "start_date": group_start,
-                "end_date": group_end,
-                "participant_count": participant_count,
-            }
-        )
+        group = normalize_group_row(row)
+        if group is not None:
+            groups.append(group)
 
     locations: List[Dict[str, Any]] = []
     for row in data.get("locations", []):
@@ -1,11 +1,23 @@
 from __future__ import annotations
 
+import gc
+import math
 import random
 import time
-from typing import Any, Dict, List, Set, Tuple
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
 
 from .constraints import make_group_slot_key, make_usage_key
+from .memory import MemoryMonitor
 from .model_cp_sat import build_cp_model, is_cp_sat_available, solve_cp_model
+from .tracing import span, traced
+from .validate import IncrementalValidator
+
+CURVE_MAX_POINTS = 500
+CURVE_TRIM_BATCH = 64
+ITERATION_LOG_SIZE = 200
+# Upper edges (ms) of the build/solve histograms; the last bucket is open.
+HISTOGRAM_EDGES_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000]
 
 
 def _assignment_index(assignments: List[Dict[str, Any]]) -> Dict[str, int]:
@@ -152,6 +164,61 @@ def _release_mode_name_zh(mode: str) -> str:
     return mapping.get(str(mode), str(mode))
 
 
+def _stop_reason_name_zh(reason: str) -> str:
+    mapping = {
+        "time_limit": "时间用尽",
+        "optimal": "已证明最优",
+        "gap": "达到目标差距",
+        "stall_iterations": "连续多轮无提升",
+        "stall_seconds": "长时间无提升",
+        "no_tasks": "无可优化任务",
+        "cancelled": "已取消",
+        "memory_budget": "超出内存预算",
+        "iteration_limit": "达到迭代上限",
+    }
+    return mapping.get(str(reason), str(reason))
+
+
+def _score_upper_bound(normalized: Dict[str, Any], best_bound: Any) -> Any:
+    # CP-SAT objective omits the coverage terms of _score_solution; the full
+    # model enforces every required pair, so the score bound is shifted by
+    # the coverage reward of all pairs.
+    if not isinstance(best_bound, (int, float)) or not math.isfinite(best_bound):
+        return None
+    required_count = sum(len(v) for v in normalized["required_by_group"].values())
+    return int(math.floor(float(best_bound) + 1e-6)) + required_count * 200
+
+
+def _check_stop(
+    *,
+    config: Dict[str, Any],
+    best_score: int,
+    score_bound: Any,
+    stall_iterations: int,
+    stall_sec: float,
+    iterations: int = 0,
+) -> str:
+    if score_bound is not None:
+        gap_abs = max(0, int(score_bound) - int(best_score))
+        if gap_abs <= 0:
+            return "optimal"
+        if gap_abs <= int(config.get("gap_abs", 0) or 0):
+            return "gap"
+        gap_rel_limit = float(config.get("gap_rel", 0.0) or 0.0)
+        if gap_rel_limit > 0 and gap_abs / max(1.0, abs(float(score_bound))) <= gap_rel_limit:
+            return "gap"
+    max_iterations = int(config.get("lns_max_iterations", 0) or 0)
+    if max_iterations > 0 and iterations >= max_iterations:
+        return "iteration_limit"
+    stall_iterations_limit = int(config.get("stall_iterations", 0) or 0)
+    if stall_iterations_limit > 0 and stall_iterations >= stall_iterations_limit:
+        return "stall_iterations"
+    stall_sec_limit = float(config.get("stall_sec", 0) or 0)
+    if stall_sec_limit > 0 and stall_sec >= stall_sec_limit:
+        return "stall_seconds"
+    return ""
+
+
 def _build_curve_note_zh(point: Dict[str, Any]) -> str:
     iter_value = point.get("iter")
     iter_score = point.get("iterScore")
@@ -168,6 +235,9 @@ def _build_curve_note_zh(point: Dict[str, Any]) -> str:
             return f"基础优化后得分提升到 {best_score}。"
         return f"基础优化得分 {iter_score}，未超过当前最优 {best_score}。"
     if iter_value == "final":
+        stop_reason = point.get("stopReason")
+        if stop_reason:
+            return f"优化结束（{_stop_reason_name_zh(str(stop_reason))}），最终得分 {best_score}。"
         return f"优化结束，最终得分 {best_score}。"
 
     ratio_text = ""
@@ -185,15 +255,244 @@ def _build_curve_note_zh(point: Dict[str, Any]) -> str:
     )
 
 
-def _append_curve_point(curve: List[Dict[str, Any]], point: Dict[str, Any], max_points: int = 500) -> None:
+def _trim_curve(curve: List[Dict[str, Any]], max_points: int = CURVE_MAX_POINTS) -> None:
+    # Keep phase1 baseline point while limiting report size.
+    if len(curve) > max_points:
+        del curve[1 : len(curve) - max_points + 1]
+
+
+def _append_curve_point(
+    curve: List[Dict[str, Any]], point: Dict[str, Any], max_points: int = CURVE_MAX_POINTS
+) -> None:
     if "note_zh" not in point:
         point["note_zh"] = _build_curve_note_zh(point)
     curve.append(point)
-    if len(curve) > max_points:
-        # Keep phase1 baseline point while limiting report size.
-        del curve[1]
+    # Trim in batches so a long run does not shift the whole list per point;
+    # optimize_with_lns trims to max_points once more at the end.
+    if len(curve) > max_points + CURVE_TRIM_BATCH:
+        _trim_curve(curve, max_points)
 
 
+def _new_histogram() -> Dict[str, Any]:
+    return {
+        "edges_ms": list(HISTOGRAM_EDGES_MS),
+        "counts": [0] * (len(HISTOGRAM_EDGES_MS) + 1),
+        "total_ms": 0.0,
+        "max_ms": 0.0,
+    }
+
+
+def _add_to_histogram(histogram: Dict[str, Any], value_ms: float) -> None:
+    index = 0
+    while index < len(HISTOGRAM_EDGES_MS) and value_ms > HISTOGRAM_EDGES_MS[index]:
+        index += 1
+    histogram["counts"][index] += 1
+    histogram["total_ms"] = round(histogram["total_ms"] + value_ms, 3)
+    histogram["max_ms"] = max(histogram["max_ms"], round(value_ms, 3))
+
+
+def _new_iteration_stats() -> Dict[str, Any]:
+    return {
+        "models": 0,
+        "status_counts": {},
+        "build_ms": _new_histogram(),
+        "solve_ms": _new_histogram(),
+        "model_vars": {"min": None, "max": None, "total": 0},
+        "model_constraints": {"min": None, "max": None, "total": 0},
+        "build_share": None,
+    }
+
+
+def _record_model_run(
+    log: Any,
+    stats: Dict[str, Any],
+    *,
+    iteration: Any,
+    bundle: Dict[str, Any],
+    result: Dict[str, Any],
+    build_ms: float,
+    solve_ms: float,
+    released: int,
+    mode: str,
+) -> Dict[str, Any]:
+    # One entry per CP-SAT model (base run and each LNS iteration): the last
+    # ITERATION_LOG_SIZE go to the ring buffer, all of them to the histograms.
+    proto = bundle["model"].Proto()
+    record = {
+        "iter": iteration,
+        "releasedCount": int(released),
+        "releaseMode": mode,
+        "vars": len(proto.variables),
+        "constraints": len(proto.constraints),
+        "buildMs": round(build_ms, 3),
+        "solveMs": round(solve_ms, 3),
+        "status": str(result.get("status")),
+        "objective": result.get("objective"),
+        "bestBound": result.get("best_bound"),
+        "iterScore": None,
+        "accepted": False,
+    }
+    log.append(record)
+    stats["models"] += 1
+    stats["status_counts"][record["status"]] = stats["status_counts"].get(record["status"], 0) + 1
+    _add_to_histogram(stats["build_ms"], build_ms)
+    _add_to_histogram(stats["solve_ms"], solve_ms)
+    for key, value in (("model_vars", record["vars"]), ("model_constraints", record["constraints"])):
+        summary = stats[key]
+        summary["min"] = value if summary["min"] is None else min(summary["min"], value)
+        summary["max"] = value if summary["max"] is None else max(summary["max"], value)
+        summary["total"] += value
+    spent = stats["build_ms"]["total_ms"] + stats["solve_ms"]["total_ms"]
+    stats["build_share"] = round(stats["build_ms"]["total_ms"] / spent, 4) if spent > 0 else None
+    return record
+
+
+def _build_released_model(
+    normalized: Dict[str, Any],
+    task_space: Dict[str, Any],
+    incumbent: Dict[str, int],
+    release_keys: Set[str],
+) -> Optional[Dict[str, Any]]:
+    # Sub-model over the released tasks only: fixed tasks become reserved
+    # capacity, the required pairs they already cover are no longer forced,
+    # and the cluster days they already use are open at no cost. Far smaller
+    # than the full model with pinned tasks, with the same objective on the
+    # released tasks as _score_solution.
+    tasks = [task for task in task_space["tasks"] if task["key"] in release_keys]
+    cluster_location_ids = set(normalized.get("cluster_location_ids", set()))
+    reserved: Dict[str, int] = {}
+    covered: Set[Tuple[int, int]] = set()
+    open_days: Set[Tuple[int, str]] = set()
+    for task in task_space["tasks"]:
+        location_id = incumbent.get(task["key"])
+        if location_id is None or task["key"] in release_keys:
+            continue
+        usage_key = make_usage_key(task["date"], task["time_slot"], int(location_id))
+        reserved[usage_key] = reserved.get(usage_key, 0) + int(task["participant_count"])
+        covered.add((int(task["group_id"]), int(location_id)))
+        if int(location_id) in cluster_location_ids:
+            open_days.add((int(location_id), str(task["date"])))
+    uncovered = {
+        group_id: {location_id for location_id in ids if (int(group_id), int(location_id)) not in covered}
+        for group_id, ids in normalized["required_by_group"].items()
+    }
+    tasks_by_group: Dict[int, List[Dict[str, Any]]] = {}
+    for task in tasks:
+        tasks_by_group.setdefault(task["group_id"], []).append(task)
+    sub_space = {"tasks": tasks, "tasks_by_key": {task["key"]: task for task in tasks}, "tasks_by_group": tasks_by_group}
+    return build_cp_model(
+        normalized,
+        sub_space,
+        with_objective=True,
+        reserved_usage=reserved,
+        enforced_required=uncovered,
+        open_cluster_days=open_days,
+    )
+
+
+def _merge_released(
+    task_space: Dict[str, Any],
+    incumbent: Dict[str, int],
+    release_keys: Set[str],
+    released_rows: List[Dict[str, Any]],
+) -> List[Dict[str, Any]]:
+    solved = {make_group_slot_key(row["group_id"], row["date"], row["time_slot"]): row for row in released_rows}
+    merged: List[Dict[str, Any]] = []
+    for task in task_space["tasks"]:
+        row = solved.get(task["key"])
+        if row is None and task["key"] not in release_keys and task["key"] in incumbent:
+            row = {
+                "group_id": int(task["group_id"]),
+                "location_id": int(incumbent[task["key"]]),
+                "date": task["date"],
+                "time_slot": task["time_slot"],
+                "participant_count": int(task["participant_count"]),
+            }
+        if row is not None:
+            merged.append(row)
+    return merged
+
+
+@traced("lns.polish")
+def _polish(
+    normalized: Dict[str, Any],
+    task_space: Dict[str, Any],
+    assignments: List[Dict[str, Any]],
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    # Greedy pass over the final plan: fill tasks LNS left empty and move a
+    # task to another candidate when that raises _score_solution. Moves are
+    # checked on an IncrementalValidator, so no full validation per step.
+    state = IncrementalValidator(normalized, assignments)
+    stats: Dict[str, Any] = {"added": 0, "moved": 0, "gain": 0}
+    if state.rejected:
+        stats["skipped"] = "invalid_plan"
+        return assignments, stats
+    existing = _build_existing_index(normalized)
+    required_by_group = normalized["required_by_group"]
+    cluster_location_ids = set(normalized.get("cluster_location_ids", set()))
+    cluster_day_penalty = max(0, int(normalized.get("cluster_day_penalty", 40) or 40))
+    cluster_days: Dict[Tuple[int, str], int] = {}
+    for row in state.rows.values():
+        if row["location_id"] in cluster_location_ids:
+            day = (row["location_id"], row["date"])
+            cluster_days[day] = cluster_days.get(day, 0) + 1
+
+    def worth(task: Dict[str, Any], location_id: int, placed: bool) -> int:
+        # Score of this row given the rest of the plan; placed: the row is in
+        # the plan, so its own coverage and cluster day do not count as others.
+        own = 1 if placed else 0
+        value = 1
+        if existing.get(task["key"]) == location_id:
+            value += 60
+        if location_id in required_by_group.get(task["group_id"], set()):
+            value += 20
+            if state.coverage.get((task["group_id"], location_id), 0) == own:
+                value += 600
+        if location_id in cluster_location_ids and cluster_days.get((location_id, task["date"]), 0) == own:
+            value -= cluster_day_penalty
+        return value
+
+    for task in task_space["tasks"]:
+        current = state.rows.get(task["key"])
+        current_value = worth(task, current["location_id"], True) if current is not None else 0
+        best: Optional[Tuple[int, Dict[str, Any]]] = None
+        for location_id in task["candidate_location_ids"]:
+            if current is not None and location_id == current["location_id"]:
+                continue
+            gain = worth(task, location_id, False) - current_value
+            if gain <= 0 or (best is not None and gain <= best[0]):
+                continue
+            if current is not None:
+                move = {"op": "move", "key": task["key"], "location_id": location_id}
+            else:
+                move = {
+                    "op": "add",
+                    "row": {
+                        "group_id": int(task["group_id"]),
+                        "location_id": int(location_id),
+                        "date": task["date"],
+                        "time_slot": task["time_slot"],
+                        "participant_count": int(task["participant_count"]),
+                    },
+                }
+            if state.check(move) is None:
+                best = (gain, move)
+        if best is None:
+            continue
+        gain, move = best
+        state.apply(move)
+        if current is not None and current["location_id"] in cluster_location_ids:
+            cluster_days[(current["location_id"], task["date"])] -= 1
+        location_id = state.rows[task["key"]]["location_id"]
+        if location_id in cluster_location_ids:
+            day = (location_id, task["date"])
+            cluster_days[day] = cluster_days.get(day, 0) + 1
+        stats["moved" if current is not None else "added"] += 1
+        stats["gain"] += gain
+    return (state.assignments() if stats["gain"] else assignments), stats
+
+
+@traced("lns.pick_release")
 def _pick_release_keys(
     *,
     normalized: Dict[str, Any],
@@ -204,6 +503,7 @@ def _pick_release_keys(
     existing_index: Dict[str, int],
     rng: random.Random,
     iteration: int,
+    max_release_ratio: Optional[float] = None,
 ) -> Dict[str, Any]:
     task_count = len(all_task_keys)
     if task_count <= 1:
@@ -229,6 +529,8 @@ def _pick_release_keys(
     elif iteration % 40 == 0:
         # Periodic shake-up to avoid local minima.
         release_ratio = 0.25
+    if max_release_ratio:
+        release_ratio = min(release_ratio, float(max_release_ratio))
 
     release_target = int(max(2, min(task_count - 1, round(task_count * release_ratio))))
     release_keys: Set[str] = set()
@@ -299,6 +601,13 @@ def optimize_with_lns(
     phase1: Dict[str, Any],
     config: Dict[str, Any],
     started_at: float,
+    *,
+    resume_state: Optional[Dict[str, Any]] = None,
+    on_checkpoint: Optional[Callable[[Dict[str, Any]], None]] = None,
+    should_stop: Optional[Callable[[], bool]] = None,
+    task_space: Optional[Dict[str, Any]] = None,
+    on_improvement: Optional[Callable[[Dict[str, Any], List[Dict[str, Any]]], None]] = None,
+    memory: Optional[MemoryMonitor] = None,
 ) -> Dict[str, Any]:
     best_assignments = list(phase1["assignments"])
     best_score = _score_solution(normalized, best_assignments)
@@ -317,12 +626,15 @@ def optimize_with_lns(
             "displaced_existing": 0,
             "random": 0,
         },
+        "iteration_log": [],
+        "iteration_stats": _new_iteration_stats(),
     }
     _append_curve_point(
         diagnostics["curve"],
         {
             "iter": 0,
             "iterScore": best_score,
+            "tMs": int((time.time() - started_at) * 1000),
             "bestScore": best_score,
             "accepted": True,
             "releasedCount": 0,
@@ -330,6 +642,24 @@ def optimize_with_lns(
         },
     )
 
+    if resume_state is not None:
+        # Before the early returns, so they hand back the checkpointed
+        # incumbent rather than phase1.
+        best_assignments = list(resume_state["best_assignments"])
+        best_score = int(resume_state["best_score"])
+        diagnostics = resume_state["diagnostics"]
+        diagnostics["iteration_log"] = list(diagnostics.get("iteration_log") or [])
+        diagnostics.setdefault("iteration_stats", _new_iteration_stats())
+        diagnostics["resumed_from_iteration"] = int(diagnostics["lns_iterations"])
+
+    if config.get("lns_disabled"):
+        diagnostics["reason"] = "memory_budget"
+        return {
+            "engine": f"{phase1.get('engine')}+no_lns",
+            "assignments": best_assignments,
+            "diagnostics": diagnostics,
+        }
+
     if not is_cp_sat_available():
         diagnostics["reason"] = "ortools_not_available"
         return {
@@ -351,28 +681,82 @@ def optimize_with_lns(
 
     diagnostics["cp_sat_used"] = True
 
-    from .task_space import build_task_space
+    if task_space is None:
+        from .task_space import build_task_space
 
-    task_space = build_task_space(normalized)
+        task_space = build_task_space(normalized)
     all_task_keys = [row["key"] for row in task_space["tasks"]]
     group_location_tasks = _build_group_location_task_index(task_space)
     existing_index = _build_existing_index(normalized)
     rng = random.Random(int(config["seed"]))
     incumbent = _assignment_index(best_assignments)
 
-    # Small first optimize run with incumbent hints.
-    base_bundle = build_cp_model(normalized, task_space, with_objective=True)
+    score_bound = None
+    stop_reason = ""
+    last_improvement_iter = 0
+    # Memory budget: sub-models over the released tasks instead of the full
+    # model with pinned tasks, optionally with smaller neighbourhoods.
+    submodel = bool(config.get("lns_submodel"))
+    max_release_ratio = config.get("lns_max_release_ratio")
+    solve_stop = memory.should_stop(should_stop) if memory is not None else should_stop
+
+    if resume_state is not None:
+        rng.setstate(resume_state["rng_state"])
+        score_bound = resume_state.get("score_bound")
+        last_improvement_iter = int(resume_state.get("last_improvement_iter", 0))
+
+    iteration_log = deque(diagnostics.get("iteration_log") or [], maxlen=ITERATION_LOG_SIZE)
+    diagnostics["iteration_log"] = iteration_log
+    iteration_stats = diagnostics["iteration_stats"]
+
+    def checkpoint_state() -> Dict[str, Any]:
+        return {
+            "best_assignments": best_assignments,
+            "best_score": best_score,
+            "rng_state": rng.getstate(),
+            "score_bound": score_bound,
+            "last_improvement_iter": last_improvement_iter,
+            "diagnostics": diagnostics,
+        }
+
+    # Small first optimize run with incumbent hints (already done when resuming).
+    base_bundle = None
+    base_result: Dict[str, Any] = {}
+    if resume_state is None and not submodel:
+        with span("lns.base"):
+            build_started = time.perf_counter()
+            base_bundle = build_cp_model(normalized, task_space, with_objective=True)
+            build_ms = (time.perf_counter() - build_started) * 1000
+            if base_bundle is not None:
+                solve_started = time.perf_counter()
+                base_result = solve_cp_model(
+                    base_bundle,
+                    time_limit_sec=max(1, min(remaining_sec // 3, 20)),
+                    workers=config["workers"],
+                    seed=config["seed"],
+                    stop_after_first=False,
+                    hints=incumbent,
+                    should_stop=solve_stop,
+                    params=config.get("cp_sat_params"),
+                )
+                base_record = _record_model_run(
+                    iteration_log,
+                    iteration_stats,
+                    iteration="base",
+                    bundle=base_bundle,
+                    result=base_result,
+                    build_ms=build_ms,
+                    solve_ms=(time.perf_counter() - solve_started) * 1000,
+                    released=len(all_task_keys),
+                    mode="base_optimize",
+                )
     if base_bundle is not None:
-        base_result = solve_cp_model(
-            base_bundle,
-            time_limit_sec=max(1, min(remaining_sec // 3, 20)),
-            workers=config["workers"],
-            seed=config["seed"],
-            stop_after_first=False,
-            hints=incumbent,
-        )
+        # Only the full model yields a global bound; LNS sub-models are
+        # restricted by their fixed tasks.
+        score_bound = _score_upper_bound(normalized, base_result.get("best_bound"))
         if base_result["assignments"]:
             base_score = _score_solution(normalized, base_result["assignments"])
+            base_record["iterScore"] = base_score
             base_accepted = False
             if base_score > best_score:
                 best_assignments = base_result["assignments"]
@@ -380,11 +764,24 @@ def optimize_with_lns(
                 incumbent = _assignment_index(best_assignments)
                 diagnostics["improvements"] += 1
                 base_accepted = True
+                base_record["accepted"] = True
+                if on_improvement is not None:
+                    on_improvement(
+                        {
+                            "iter": "base",
+                            "score": best_score,
+                            "bound": score_bound,
+                            "released": 0,
+                            "mode": "base_optimize",
+                        },
+                        best_assignments,
+                    )
             _append_curve_point(
                 diagnostics["curve"],
                 {
                     "iter": "base",
                     "iterScore": base_score,
+                    "tMs": int((time.time() - started_at) * 1000),
                     "bestScore": best_score,
                     "accepted": base_accepted,
                     "releasedCount": 0,
@@ -392,99 +789,209 @@ def optimize_with_lns(
                 },
             )
 
+    diagnostics["score_bound"] = score_bound
     loop_deadline = started_at + total_sec
     checkpoint_every = 50
-    while time.time() + 1.0 < loop_deadline:
-        diagnostics["lns_iterations"] += 1
-        task_count = len(all_task_keys)
-        if task_count == 0:
+    checkpoint_every_sec = float(config.get("checkpoint_every_sec", 0) or 0)
+    last_checkpoint_at = time.time()
+    last_improvement_at = time.time()
+    while True:
+        if on_checkpoint is not None and checkpoint_every_sec > 0:
+            if time.time() - last_checkpoint_at >= checkpoint_every_sec:
+                on_checkpoint(checkpoint_state())
+                last_checkpoint_at = time.time()
+        if time.time() + 1.0 >= loop_deadline:
+            stop_reason = "time_limit"
             break
-
-        release_data = _pick_release_keys(
-            normalized=normalized,
-            task_space=task_space,
-            incumbent=incumbent,
-            all_task_keys=all_task_keys,
-            group_location_tasks=group_location_tasks,
-            existing_index=existing_index,
-            rng=rng,
-            iteration=int(diagnostics["lns_iterations"]),
-        )
-        release_keys = release_data["release_keys"]
-        if not release_keys and task_count > 1:
-            # Safety fallback: always release at least one task if possible.
-            release_keys = {rng.choice(all_task_keys)}
-            release_data["release_mode"] = "random"
-            release_data["sources"]["random"] += 1
-
-        for source_key, count in release_data["sources"].items():
-            diagnostics["hotspot_totals"][source_key] += int(count)
-
-        fixed_keys = set(all_task_keys) - set(release_keys)
-        fixed_tasks: Dict[str, int] = {}
-        for key in fixed_keys:
-            location_id = incumbent.get(key)
-            if location_id is not None:
-                fixed_tasks[key] = int(location_id)
-
-        bundle = build_cp_model(
-            normalized=normalized,
-            task_space=task_space,
-            fixed_tasks=fixed_tasks,
-            with_objective=True,
-        )
-        if bundle is None:
+        if should_stop is not None and should_stop():
+            stop_reason = "cancelled"
             break
-
-        iter_time_sec = 2
-        if len(release_keys) > max(4, task_count // 4):
-            iter_time_sec = 3
-
-        iter_result = solve_cp_model(
-            bundle,
-            time_limit_sec=iter_time_sec,
-            workers=config["workers"],
-            seed=config["seed"] + diagnostics["lns_iterations"],
-            stop_after_first=False,
-            hints=incumbent,
+        if memory is not None and memory.over_budget.is_set():
+            # Step down once to sub-models, once to smaller neighbourhoods,
+            # then give up and keep the incumbent.
+            if submodel and (max_release_ratio or 1.0) <= 0.05:
+                stop_reason = "memory_budget"
+                break
+            step = "smaller_neighborhoods" if submodel else "submodel_lns"
+            submodel = True
+            max_release_ratio = 0.05 if step == "smaller_neighborhoods" else min(max_release_ratio or 0.15, 0.15)
+            base_bundle = None
+            gc.collect()
+            memory.rearm()
+            memory.degrade(step, "over_budget", maxReleaseRatio=max_release_ratio)
+        stop_reason = _check_stop(
+            config=config,
+            best_score=best_score,
+            score_bound=score_bound,
+            stall_iterations=int(diagnostics["lns_iterations"]) - last_improvement_iter,
+            stall_sec=time.time() - last_improvement_at,
+            iterations=int(diagnostics["lns_iterations"]),
         )
-        if not iter_result["assignments"]:
-            continue
+        if stop_reason:
+            break
+        diagnostics["lns_iterations"] += 1
+        with span("lns.iteration", iter=int(diagnostics["lns_iterations"])):
+            task_count = len(all_task_keys)
+            if task_count == 0:
+                stop_reason = "no_tasks"
+                break
 
-        iter_score = _score_solution(normalized, iter_result["assignments"])
-        accepted = False
-        if iter_score > best_score:
-            best_assignments = iter_result["assignments"]
-            best_score = iter_score
-            incumbent = _assignment_index(best_assignments)
-            diagnostics["improvements"] += 1
-            accepted = True
+            release_data = _pick_release_keys(
+                normalized=normalized,
+                task_space=task_space,
+                incumbent=incumbent,
+                all_task_keys=all_task_keys,
+                group_location_tasks=group_location_tasks,
+                existing_index=existing_index,
+                rng=rng,
+                iteration=int(diagnostics["lns_iterations"]),
+                max_release_ratio=max_release_ratio,
+            )
+            release_keys = release_data["release_keys"]
+            if not release_keys and task_count > 1:
+                # Safety fallback: always release at least one task if possible.
+                release_keys = {rng.choice(all_task_keys)}
+                release_data["release_mode"] = "random"
+                release_data["sources"]["random"] += 1
+
+            for source_key, count in release_data["sources"].items():
+                diagnostics["hotspot_totals"][source_key] += int(count)
+
+            build_started = time.perf_counter()
+            if submodel:
+                bundle = _build_released_model(normalized, task_space, incumbent, set(release_keys))
+            else:
+                fixed_keys = set(all_task_keys) - set(release_keys)
+                fixed_tasks: Dict[str, int] = {}
+                for key in fixed_keys:
+                    location_id = incumbent.get(key)
+                    if location_id is not None:
+                        fixed_tasks[key] = int(location_id)
+                bundle = build_cp_model(
+                    normalized=normalized,
+                    task_space=task_space,
+                    fixed_tasks=fixed_tasks,
+                    with_objective=True,
+                )
+            build_ms = (time.perf_counter() - build_started) * 1000
+            if bundle is None:
+                break
 
-        if accepted or diagnostics["lns_iterations"] % checkpoint_every == 0:
-            _append_curve_point(
-                diagnostics["curve"],
-                {
-                    "iter": int(diagnostics["lns_iterations"]),
-                    "iterScore": int(iter_score),
-                    "bestScore": int(best_score),
-                    "accepted": bool(accepted),
-                    "releasedCount": int(len(release_keys)),
-                    "releaseMode": str(release_data["release_mode"]),
-                    "releaseRatio": float(release_data["release_ratio"]),
-                },
+            iter_time_sec = float(config.get("lns_iter_time_sec", 0) or 0)
+            if iter_time_sec <= 0:
+                iter_time_sec = 3 if len(release_keys) > max(4, task_count // 4) else 2
+
+            solve_started = time.perf_counter()
+            iter_result = solve_cp_model(
+                bundle,
+                time_limit_sec=iter_time_sec,
+                workers=config["workers"],
+                seed=config["seed"] + diagnostics["lns_iterations"],
+                stop_after_first=False,
+                hints={key: incumbent[key] for key in release_keys if key in incumbent} if submodel else incumbent,
+                should_stop=solve_stop,
+                params=config.get("cp_sat_params"),
             )
+            record = _record_model_run(
+                iteration_log,
+                iteration_stats,
+                iteration=int(diagnostics["lns_iterations"]),
+                bundle=bundle,
+                result=iter_result,
+                build_ms=build_ms,
+                solve_ms=(time.perf_counter() - solve_started) * 1000,
+                released=len(release_keys),
+                mode=str(release_data["release_mode"]),
+            )
+            if not iter_result["assignments"]:
+                continue
+            if submodel:
+                iter_result["assignments"] = _merge_released(
+                    task_space, incumbent, set(release_keys), iter_result["assignments"]
+                )
+
+            iter_score = _score_solution(normalized, iter_result["assignments"])
+            record["iterScore"] = int(iter_score)
+            accepted = False
+            if iter_score > best_score:
+                best_assignments = iter_result["assignments"]
+                best_score = iter_score
+                incumbent = _assignment_index(best_assignments)
+                diagnostics["improvements"] += 1
+                accepted = True
+                record["accepted"] = True
+                last_improvement_iter = int(diagnostics["lns_iterations"])
+                last_improvement_at = time.time()
+                if on_improvement is not None:
+                    on_improvement(
+                        {
+                            "iter": last_improvement_iter,
+                            "score": best_score,
+                            "bound": score_bound,
+                            "released": len(release_keys),
+                            "mode": str(release_data["release_mode"]),
+                        },
+                        best_assignments,
+                    )
+
+            if accepted or diagnostics["lns_iterations"] % checkpoint_every == 0:
+                _append_curve_point(
+                    diagnostics["curve"],
+                    {
+                        "iter": int(diagnostics["lns_iterations"]),
+                        "iterScore": int(iter_score),
+                        "tMs": int((time.time() - started_at) * 1000),
+                        "bestScore": int(best_score),
+                        "accepted": bool(accepted),
+                        "releasedCount": int(len(release_keys)),
+                        "releaseMode": str(release_data["release_mode"]),
+                        "releaseRatio": float(release_data["release_ratio"]),
+                    },
+                )
+
+    if stop_reason == "cancelled":
+        # A cancelled run returns what it has; no more work after the stop.
+        diagnostics["polish"] = {"added": 0, "moved": 0, "gain": 0, "skipped": "cancelled"}
+    else:
+        polished, diagnostics["polish"] = _polish(normalized, task_space, best_assignments)
+        if diagnostics["polish"]["gain"] > 0:
+            best_assignments = polished
+            best_score += int(diagnostics["polish"]["gain"])
+            if on_improvement is not None:
+                on_improvement(
+                    {
+                        "iter": "polish",
+                        "score": best_score,
+                        "bound": score_bound,
+                        "released": int(diagnostics["polish"]["added"] + diagnostics["polish"]["moved"]),
+                        "mode": "polish",
+                    },
+                    best_assignments,
+                )
+
+    if on_checkpoint is not None:
+        # Saved before the final point so a resumed run continues the curve.
+        on_checkpoint(checkpoint_state())
 
     _append_curve_point(
         diagnostics["curve"],
         {
             "iter": "final",
             "iterScore": int(best_score),
+            "tMs": int((time.time() - started_at) * 1000),
             "bestScore": int(best_score),
             "accepted": True,
             "releasedCount": 0,
             "releaseMode": "final",
+            "stopReason": stop_reason,
         },
     )
+    _trim_curve(diagnostics["curve"])
+    diagnostics["iteration_log"] = list(iteration_log)
+    diagnostics["stop_reason"] = stop_reason
+    if score_bound is not None:
+        diagnostics["gap_abs"] = max(0, int(score_bound) - int(best_score))
+        diagnostics["gap_rel"] = round(diagnostics["gap_abs"] / max(1.0, abs(float(score_bound))), 6)
     diagnostics["curve_tail_zh"] = [str(row.get("note_zh", "")) for row in diagnostics["curve"][-12:]]
     diagnostics["final_score"] = best_score
     return {
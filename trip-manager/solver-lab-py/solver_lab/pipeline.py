@@ -0,0 +1,468 @@
+from __future__ import annotations
+
+import gc
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .checkpoint import checkpoint_dir_for, compute_input_hash, load_checkpoint, write_base, write_state
+from .exporter import build_report_payload, build_result_payload
+from .jsonio import write_json_atomic
+from .memory import MemoryMonitor, candidate_pairs, estimate_model_mb
+from .normalize import normalize_input
+from .optimize_lns import _score_solution, optimize_with_lns
+from .precheck import run_precheck
+from .presets import apply_preset, list_presets, load_preset, pick_preset
+from .progress import ProgressEmitter
+from .replan import load_previous_assignments, replan
+from .result_cache import ResultCache, cache_key
+from .solve_feasible import solve_feasible
+from .task_space import build_task_space
+from .time_budget import instance_features, load_time_model, predict_time
+from .tracing import Tracer, span
+from .validate import validate_solution
+
+
+def build_config(
+    *,
+    seed: int = 42,
+    time_limit_sec: int = 300,
+    workers: int = 8,
+    phase1_ratio: float = 0.25,
+    explain_infeasible: bool = False,
+    gap_rel: float = 0.0,
+    gap_abs: int = 0,
+    stall_iterations: int = 0,
+    stall_sec: float = 0.0,
+    checkpoint_every_sec: float = 0.0,
+    max_memory_mb: float = 0.0,
+    trace_memory: bool = False,
+    preset: str = "",
+    preset_keep: Sequence[str] = (),
+    lns_iter_time_sec: float = 0.0,
+    lns_max_iterations: int = 0,
+    cp_sat_params: Optional[Dict[str, Any]] = None,
+    time_auto: bool = False,
+    time_quality: float = 0.99,
+    time_model_path: str = "",
+) -> Dict[str, Any]:
+    return {
+        "seed": int(seed),
+        "time_limit_sec": max(1, int(time_limit_sec)),
+        "workers": max(1, int(workers)),
+        "phase1_ratio": min(0.9, max(0.05, float(phase1_ratio))),
+        "explain_infeasible": bool(explain_infeasible),
+        "gap_rel": max(0.0, float(gap_rel)),
+        "gap_abs": max(0, int(gap_abs)),
+        "stall_iterations": max(0, int(stall_iterations)),
+        "stall_sec": max(0.0, float(stall_sec)),
+        "checkpoint_every_sec": max(0.0, float(checkpoint_every_sec)),
+        "max_memory_mb": max(0.0, float(max_memory_mb)),
+        "trace_memory": bool(trace_memory),
+        "preset": str(preset or ""),
+        "preset_keep": sorted(preset_keep),
+        "lns_iter_time_sec": max(0.0, float(lns_iter_time_sec)),
+        "lns_max_iterations": max(0, int(lns_max_iterations)),
+        "cp_sat_params": dict(cp_sat_params or {}),
+        "time_auto": bool(time_auto),
+        "time_quality": min(1.0, max(0.5, float(time_quality))),
+        "time_model_path": str(time_model_path or ""),
+    }
+
+
+def run_pipeline(
+    raw_payload: Dict[str, Any],
+    config: Dict[str, Any],
+    *,
+    tracer: Optional[Tracer] = None,
+    memory: Optional[MemoryMonitor] = None,
+    **options: Any,
+) -> Dict[str, Any]:
+    # Keyword options are those of _run_pipeline. Every run is traced; the
+    # per-phase aggregate goes into report["timings"] and the tracer itself
+    # is returned for a Chrome trace export. Per-phase memory and any budget
+    # step-downs go into report["memory"].
+    tracer = Tracer() if tracer is None else tracer
+    if memory is None:
+        memory = MemoryMonitor(config.get("max_memory_mb", 0.0), trace_python=bool(config.get("trace_memory")))
+    memory.start()
+    try:
+        with tracer.activate():
+            out = _run_pipeline(raw_payload, config, tracer=tracer, memory=memory, **options)
+    finally:
+        memory.stop()
+    out["report"]["timings"] = tracer.summary()
+    out["report"]["memory"] = memory.summary()
+    out["tracer"] = tracer
+    return out
+
+
+def _cache_config(config: Dict[str, Any]) -> Dict[str, Any]:
+    # The options plus the files they point to: a preset name or a time model
+    # path says nothing once the file behind it is retuned or refitted.
+    # "auto" picks among all presets, so all of them count.
+    out = dict(config)
+    if config.get("preset") == "auto":
+        out["preset_contents"] = [
+            {
+                "name": preset["name"],
+                "candidatePairs": (preset.get("tunedOn") or {}).get("candidatePairs"),
+                "config": preset.get("config", {}),
+                "cpSat": preset.get("cpSat", {}),
+            }
+            for preset in list_presets()
+        ]
+    elif config.get("preset"):
+        preset = load_preset(config["preset"])
+        out["preset_contents"] = {"config": preset.get("config", {}), "cpSat": preset.get("cpSat", {})}
+    if config.get("time_auto"):
+        out["time_model"] = load_time_model(config.get("time_model_path", ""))
+    return out
+
+
+def _fit_memory_budget(
+    memory: MemoryMonitor,
+    normalized: Dict[str, Any],
+    task_space: Dict[str, Any],
+    config: Dict[str, Any],
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    # Step down until the estimated CP-SAT footprint fits the headroom:
+    # drop the raw payload, fewer search workers, greedy phase1 with LNS on
+    # sub-models of the released tasks only (shrinking neighborhoods), and
+    # finally greedy only.
+    if not memory.budget_mb:
+        return normalized, config
+    pairs = candidate_pairs(task_space["tasks"])
+    workers = int(config["workers"])
+    if memory.fits(estimate_model_mb(pairs, workers)):
+        return normalized, config
+    run_config = dict(config)
+    raw = normalized.get("raw")
+    if isinstance(raw, dict) and "data" in raw:
+        normalized = dict(normalized, raw={key: raw.get(key) for key in ("schema", "meta", "scope")})
+        gc.collect()
+        memory.degrade("drop_raw_payload", "model_estimate", estimateMb=round(estimate_model_mb(pairs, workers)))
+        if memory.fits(estimate_model_mb(pairs, workers)):
+            return normalized, run_config
+    while workers > 1 and not memory.fits(estimate_model_mb(pairs, workers)):
+        workers = max(1, workers // 2)
+    if workers != int(config["workers"]):
+        run_config["workers"] = workers
+        memory.degrade(
+            "fewer_workers", "model_estimate", workers=workers, estimateMb=round(estimate_model_mb(pairs, workers))
+        )
+        if memory.fits(estimate_model_mb(pairs, workers)):
+            return normalized, run_config
+    run_config["phase1_greedy"] = True
+    memory.degrade("greedy_phase1", "model_estimate", estimateMb=round(estimate_model_mb(pairs, workers)))
+    for ratio in (0.15, 0.1, 0.05):
+        needed = estimate_model_mb(int(pairs * ratio), workers)
+        if memory.fits(needed):
+            run_config["lns_submodel"] = True
+            run_config["lns_max_release_ratio"] = ratio
+            memory.degrade("submodel_lns", "model_estimate", releaseRatio=ratio, estimateMb=round(needed))
+            return normalized, run_config
+    run_config["lns_disabled"] = True
+    memory.degrade("no_lns", "model_estimate")
+    return normalized, run_config
+
+
+def _run_pipeline(
+    raw_payload: Dict[str, Any],
+    config: Dict[str, Any],
+    *,
+    tracer: Tracer,
+    memory: MemoryMonitor,
+    started_at: Optional[float] = None,
+    previous_assignments: Optional[List[Dict[str, Any]]] = None,
+    checkpoint_root: str = "",
+    resume: bool = False,
+    should_stop: Optional[Callable[[], bool]] = None,
+    progress: Optional[ProgressEmitter] = None,
+    best_result_path: str = "",
+    normalized: Optional[Dict[str, Any]] = None,
+    precheck: Optional[Dict[str, Any]] = None,
+    cache: Optional[ResultCache] = None,
+    cache_warm_start: bool = False,
+) -> Dict[str, Any]:
+    started_at = time.time() if started_at is None else started_at
+    checkpoint_dir = ""
+    input_hash = ""
+    if checkpoint_root:
+        input_hash = compute_input_hash(raw_payload)
+        checkpoint_dir = checkpoint_dir_for(checkpoint_root, input_hash)
+    resumed = None
+    if resume and checkpoint_dir and previous_assignments is None:
+        resumed = load_checkpoint(checkpoint_dir, input_hash)
+
+    def phase_start(phase: str) -> None:
+        tracer.start(phase)
+        memory.phase_start(phase)
+        if progress is not None:
+            progress.phase_start(phase)
+
+    def phase_end(phase: str, **fields: Any) -> None:
+        tracer.stop(phase)
+        memory.phase_end(phase)
+        if progress is not None:
+            progress.phase_end(phase, **fields)
+
+    if progress is not None:
+        memory.on_degrade = lambda row: progress.emit("degrade", **row)
+
+    def publish_best(
+        normalized: Dict[str, Any],
+        assignments: List[Dict[str, Any]],
+        diagnostics: Dict[str, Any],
+    ) -> None:
+        if best_result_path:
+            write_json_atomic(
+                best_result_path,
+                build_result_payload(
+                    normalized=normalized,
+                    assignments=assignments,
+                    config=config,
+                    diagnostics=diagnostics,
+                    elapsed_ms=int((time.time() - started_at) * 1000),
+                ),
+            )
+
+    cache_info: Optional[Dict[str, Any]] = None
+    if resumed is not None:
+        phase_start("resume")
+        normalized = resumed["normalized"]
+        # Checkpoints keep precheck without the task space; rebuild it once.
+        precheck = dict(resumed["precheck"], task_space=build_task_space(normalized))
+        phase1 = resumed["phase1"]
+        phase_end("resume", groups=len(normalized["groups"]), tasks=len(precheck["task_space"]["tasks"]))
+    else:
+        if normalized is None:
+            phase_start("normalize")
+            normalized = normalize_input(raw_payload)
+            phase_end("normalize", groups=len(normalized["groups"]), locations=len(normalized["locations"]))
+        if cache is not None and previous_assignments is None:
+            phase_start("cache")
+            cached_config = _cache_config(config)
+            key = cache_key(normalized, cached_config)
+            entry = cache.get(key)
+            if entry is not None:
+                phase_end("cache", hit=True, key=key[:16])
+                return _cached_run(normalized, entry, started_at)
+            near = cache.find_near(normalized, cached_config)
+            cache_info = {"hit": False, "key": key[:16], "stored": False}
+            if near is not None:
+                cache_info["nearHit"] = {"key": near["entry"]["key"][:16], "similarity": near["similarity"]}
+                if cache_warm_start:
+                    previous_assignments = load_previous_assignments(near["entry"]["result"])
+                    cache_info["warmStart"] = True
+            phase_end("cache", **cache_info)
+        if precheck is None:
+            phase_start("precheck")
+            precheck = run_precheck(normalized)
+            phase_end(
+                "precheck",
+                tasks=len(precheck["task_space"]["tasks"]),
+                blockingErrors=len(precheck["blocking_errors"]),
+                warnings=len(precheck["warnings"]),
+            )
+
+    run_config = config
+    preset = None
+    if config.get("preset"):
+        if config["preset"] == "auto":
+            preset = pick_preset(candidate_pairs(precheck["task_space"]["tasks"]))
+        else:
+            preset = load_preset(config["preset"])
+        run_config = apply_preset(config, preset)
+    features = instance_features(normalized, precheck["task_space"])
+    prediction = None
+    if config.get("time_auto"):
+        # The predicted time counts from the start of the run, like --time.
+        prediction = predict_time(
+            features, load_time_model(config.get("time_model_path", "")), quality=config["time_quality"]
+        )
+        elapsed_sec = time.time() - started_at
+        run_config = dict(run_config, time_limit_sec=max(prediction["timeLimitSec"], int(elapsed_sec) + 5))
+        if prediction["phase1Ratio"] is not None and "phase1_ratio" not in config.get("preset_keep", ()):
+            run_config["phase1_ratio"] = prediction["phase1Ratio"]
+    normalized, run_config = _fit_memory_budget(memory, normalized, precheck["task_space"], run_config)
+    solve_stop = memory.should_stop(should_stop) if memory.budget_mb else should_stop
+
+    if previous_assignments is not None:
+        phase_start("replan")
+        phase1 = replan(normalized, precheck, previous_assignments, run_config, should_stop=solve_stop)
+        optimized = {
+            "engine": phase1["engine"],
+            "assignments": phase1["assignments"],
+            "diagnostics": phase1["diagnostics"],
+        }
+        phase_end(
+            "replan",
+            engine=phase1["engine"],
+            score=_score_solution(normalized, phase1["assignments"]),
+            escalation=phase1["diagnostics"].get("escalation"),
+        )
+    else:
+        if resumed is None:
+            phase_start("feasible")
+            phase1 = solve_feasible(normalized, run_config, precheck, should_stop=solve_stop, started_at=started_at)
+            if (
+                memory.over_budget.is_set()
+                and phase1.get("engine") == "greedy_feasible"
+                and not run_config.get("phase1_greedy")
+            ):
+                memory.degrade("greedy_fallback", "over_budget")
+            phase1_score = _score_solution(normalized, phase1["assignments"])
+            phase_end("feasible", engine=phase1.get("engine"), status=phase1.get("status"), score=phase1_score)
+            if progress is not None:
+                progress.best_score = phase1_score
+            publish_best(normalized, phase1["assignments"], {"phase1_engine": phase1.get("engine")})
+
+        on_checkpoint = None
+        if checkpoint_dir and config.get("checkpoint_every_sec", 0) > 0:
+            if resumed is None:
+                write_base(
+                    checkpoint_dir,
+                    input_hash=input_hash,
+                    normalized=normalized,
+                    precheck=precheck,
+                    phase1=phase1,
+                )
+
+            def on_checkpoint(state: Dict[str, Any]) -> None:
+                write_state(checkpoint_dir, input_hash=input_hash, state=state)
+
+        on_improvement = None
+        if progress is not None or best_result_path:
+
+            def on_improvement(event: Dict[str, Any], assignments: List[Dict[str, Any]]) -> None:
+                if progress is not None:
+                    progress.improvement(**event)
+                publish_best(
+                    normalized,
+                    assignments,
+                    {"phase1_engine": phase1.get("engine"), "best_score": event["score"]},
+                )
+
+        phase_start("optimize")
+        optimized = optimize_with_lns(
+            normalized,
+            phase1,
+            run_config,
+            started_at,
+            resume_state=resumed["state"] if resumed is not None else None,
+            on_checkpoint=on_checkpoint,
+            should_stop=should_stop,
+            task_space=precheck["task_space"],
+            on_improvement=on_improvement,
+            memory=memory if memory.budget_mb else None,
+        )
+        diagnostics = optimized.get("diagnostics", {})
+        phase_end(
+            "optimize",
+            engine=optimized.get("engine"),
+            score=diagnostics.get("final_score", diagnostics.get("phase1_score")),
+            bound=diagnostics.get("score_bound"),
+            iterations=diagnostics.get("lns_iterations", 0),
+            stopReason=diagnostics.get("stop_reason") or diagnostics.get("reason"),
+        )
+
+    phase_start("validate")
+    out = finish_run(normalized, precheck, phase1, optimized, run_config, started_at)
+    phase_end(
+        "validate",
+        hardViolations=len(out["audit"]["hard_violations"]),
+        mustVisitMissing=len(out["audit"]["must_visit_missing"]),
+    )
+    out["resumed"] = resumed is not None
+    out["checkpoint_dir"] = checkpoint_dir
+    out["report"]["instance"] = features
+    if prediction is not None:
+        out["report"]["timePrediction"] = dict(
+            prediction, timeLimitSec=run_config["time_limit_sec"], phase1Ratio=run_config["phase1_ratio"]
+        )
+    if preset is not None:
+        out["report"]["preset"] = {
+            "requested": config["preset"],
+            "name": preset["name"],
+            "config": {key: run_config.get(key) for key in preset["config"]},
+            "cpSat": preset["cpSat"],
+        }
+    if cache_info is not None:
+        stop_reason = out["optimized"].get("diagnostics", {}).get("stop_reason")
+        # Warm-started, resumed or cancelled runs are not full answers for this key.
+        if not cache_info.get("warmStart") and resumed is None and stop_reason != "cancelled":
+            cache.put(key, normalized, cached_config, out["result"], out["report"])
+            cache_info["stored"] = True
+        out["report"]["cache"] = cache_info
+    return out
+
+
+def _cached_run(normalized: Dict[str, Any], entry: Dict[str, Any], started_at: float) -> Dict[str, Any]:
+    report = entry["report"]
+    report["cache"] = {
+        "hit": True,
+        "key": entry["key"][:16],
+        "storedAt": entry["storedAt"],
+        "ageSec": int(time.time() - float(entry["storedAt"])),
+        "solver": entry["solver"],
+    }
+    assignments = load_previous_assignments(entry["result"])
+    optimized = {
+        "engine": report["optimize"]["engine"],
+        "assignments": assignments,
+        "diagnostics": report["optimize"]["diagnostics"],
+    }
+    return {
+        "normalized": normalized,
+        "precheck": None,
+        "phase1": report["phase1"],
+        "optimized": optimized,
+        "audit": {
+            "hard_violations": report["audit"]["hardViolations"],
+            "must_visit_missing": report["audit"]["mustVisitMissing"],
+        },
+        "elapsed_ms": int((time.time() - started_at) * 1000),
+        "result": entry["result"],
+        "report": report,
+        "resumed": False,
+        "checkpoint_dir": "",
+        "cached": True,
+    }
+
+
+def finish_run(
+    normalized: Dict[str, Any],
+    precheck: Dict[str, Any],
+    phase1: Dict[str, Any],
+    optimized: Dict[str, Any],
+    config: Dict[str, Any],
+    started_at: float,
+) -> Dict[str, Any]:
+    audit = validate_solution(normalized, optimized["assignments"])
+    elapsed_ms = int((time.time() - started_at) * 1000)
+    with span("export"):
+        result_payload = build_result_payload(
+            normalized=normalized,
+            assignments=optimized["assignments"],
+            config=config,
+            diagnostics=optimized.get("diagnostics", {}),
+            elapsed_ms=elapsed_ms,
+        )
+        report_payload = build_report_payload(
+            normalized=normalized,
+            precheck=precheck,
+            phase1=phase1,
+            optimized=optimized,
+            audit=audit,
+            elapsed_ms=elapsed_ms,
+        )
+    return {
+        "normalized": normalized,
+        "precheck": precheck,
+        "phase1": phase1,
+        "optimized": optimized,
+        "audit": audit,
+        "elapsed_ms": elapsed_ms,
+        "result": result_payload,
+        "report": report_payload,
+    }
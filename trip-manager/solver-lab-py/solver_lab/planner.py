@@ -0,0 +1,266 @@
+"""In-process planning API.
+
+    from solver_lab.planner import Planner
+
+    planner = Planner(time_limit_sec=60, workers=4)
+    plan = planner.solve(input_dict, on_progress=print)
+    plan.result        # ec-planning-result@1 dict, same as cli.py --out
+    plan.score, plan.ok
+
+Phases can also be run one by one: ``normalize`` -> ``precheck`` ->
+``feasible`` -> ``optimize`` -> ``validate``. A planner keeps the last few
+normalized snapshots (keyed by input hash) together with their task space,
+so repeated calls on the same input skip normalize and precheck.
+"""
+
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from .checkpoint import compute_input_hash
+from .normalize import normalize_input
+from .optimize_lns import _score_solution, optimize_with_lns
+from .pipeline import build_config, run_pipeline
+from .precheck import run_precheck
+from .progress import ProgressEmitter
+from .solve_feasible import solve_feasible
+from .validate import validate_solution
+
+ProgressCallback = Callable[[Dict[str, Any]], None]
+
+
+@dataclass
+class Snapshot:
+    normalized: Dict[str, Any]
+    input_hash: str = ""
+    precheck: Optional["PrecheckResult"] = None
+
+    @property
+    def groups(self) -> int:
+        return len(self.normalized["groups"])
+
+    @property
+    def locations(self) -> int:
+        return len(self.normalized["locations"])
+
+
+@dataclass
+class PrecheckResult:
+    blocking_errors: List[Dict[str, Any]]
+    warnings: List[Dict[str, Any]]
+    task_space: Dict[str, Any] = field(repr=False)
+
+    @property
+    def ok(self) -> bool:
+        return not self.blocking_errors
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"task_space": self.task_space, "blocking_errors": self.blocking_errors, "warnings": self.warnings}
+
+
+@dataclass
+class FeasibleResult:
+    engine: str
+    status: str
+    score: int
+    assignments: List[Dict[str, Any]] = field(repr=False)
+    raw: Dict[str, Any] = field(repr=False, default_factory=dict)
+
+
+@dataclass
+class OptimizeResult:
+    engine: str
+    score: int
+    bound: Optional[int]
+    stop_reason: str
+    iterations: int
+    assignments: List[Dict[str, Any]] = field(repr=False)
+    diagnostics: Dict[str, Any] = field(repr=False, default_factory=dict)
+
+
+@dataclass
+class ValidationResult:
+    hard_violations: List[Dict[str, Any]]
+    must_visit_missing: List[Dict[str, Any]]
+
+    @property
+    def ok(self) -> bool:
+        return not self.hard_violations and not self.must_visit_missing
+
+
+@dataclass
+class PlanResult:
+    score: int
+    elapsed_ms: int
+    feasible: FeasibleResult
+    optimized: OptimizeResult
+    validation: ValidationResult
+    result: Dict[str, Any] = field(repr=False)
+    report: Dict[str, Any] = field(repr=False)
+
+    @property
+    def ok(self) -> bool:
+        return self.validation.ok
+
+    @property
+    def assignments(self) -> List[Dict[str, Any]]:
+        return self.optimized.assignments
+
+
+def _feasible_result(normalized: Dict[str, Any], phase1: Dict[str, Any]) -> FeasibleResult:
+    return FeasibleResult(
+        engine=str(phase1.get("engine")),
+        status=str(phase1.get("status")),
+        score=_score_solution(normalized, phase1["assignments"]),
+        assignments=phase1["assignments"],
+        raw=phase1,
+    )
+
+
+def _optimize_result(normalized: Dict[str, Any], optimized: Dict[str, Any]) -> OptimizeResult:
+    diagnostics = optimized.get("diagnostics", {})
+    return OptimizeResult(
+        engine=str(optimized.get("engine")),
+        score=_score_solution(normalized, optimized["assignments"]),
+        bound=diagnostics.get("score_bound"),
+        stop_reason=str(diagnostics.get("stop_reason") or diagnostics.get("reason") or ""),
+        iterations=int(diagnostics.get("lns_iterations", 0) or 0),
+        assignments=optimized["assignments"],
+        diagnostics=diagnostics,
+    )
+
+
+def _validation_result(audit: Dict[str, Any]) -> ValidationResult:
+    return ValidationResult(
+        hard_violations=audit["hard_violations"],
+        must_visit_missing=audit["must_visit_missing"],
+    )
+
+
+class Planner:
+    """Solver front end that keeps warm state between calls.
+
+    Keyword options are those of ``pipeline.build_config`` (``seed``,
+    ``time_limit_sec``, ``workers``, ``phase1_ratio``, ``gap_rel`` ...).
+    """
+
+    def __init__(self, *, cache_size: int = 4, **options: Any) -> None:
+        self.config = build_config(**options)
+        self.cache_size = max(0, int(cache_size))
+        self._snapshots: "OrderedDict[str, Snapshot]" = OrderedDict()
+
+    def _config(self, overrides: Dict[str, Any]) -> Dict[str, Any]:
+        if not overrides:
+            return self.config
+        options = dict(self.config)
+        options.update(overrides)
+        return build_config(**options)
+
+    def normalize(self, source: Union[Dict[str, Any], Snapshot]) -> Snapshot:
+        """Input dict -> Snapshot; cached by input hash, snapshots pass through."""
+        if isinstance(source, Snapshot):
+            return source
+        input_hash = compute_input_hash(source)
+        cached = self._snapshots.get(input_hash)
+        if cached is not None:
+            self._snapshots.move_to_end(input_hash)
+            return cached
+        snapshot = Snapshot(normalized=normalize_input(source), input_hash=input_hash)
+        if self.cache_size:
+            self._snapshots[input_hash] = snapshot
+            while len(self._snapshots) > self.cache_size:
+                self._snapshots.popitem(last=False)
+        return snapshot
+
+    def precheck(self, source: Union[Dict[str, Any], Snapshot]) -> PrecheckResult:
+        snapshot = self.normalize(source)
+        if snapshot.precheck is None:
+            raw = run_precheck(snapshot.normalized)
+            snapshot.precheck = PrecheckResult(
+                blocking_errors=raw["blocking_errors"],
+                warnings=raw["warnings"],
+                task_space=raw["task_space"],
+            )
+        return snapshot.precheck
+
+    def feasible(self, source: Union[Dict[str, Any], Snapshot], **overrides: Any) -> FeasibleResult:
+        snapshot = self.normalize(source)
+        precheck = self.precheck(snapshot)
+        phase1 = solve_feasible(snapshot.normalized, self._config(overrides), precheck.as_dict())
+        return _feasible_result(snapshot.normalized, phase1)
+
+    def optimize(
+        self,
+        source: Union[Dict[str, Any], Snapshot],
+        start: FeasibleResult,
+        *,
+        should_stop: Optional[Callable[[], bool]] = None,
+        **overrides: Any,
+    ) -> OptimizeResult:
+        """Run LNS from ``start``; ``time_limit_sec`` counts from this call."""
+        snapshot = self.normalize(source)
+        optimized = optimize_with_lns(
+            snapshot.normalized,
+            start.raw,
+            self._config(overrides),
+            time.time(),
+            should_stop=should_stop,
+            task_space=self.precheck(snapshot).task_space,
+        )
+        return _optimize_result(snapshot.normalized, optimized)
+
+    def validate(self, source: Union[Dict[str, Any], Snapshot], assignments: List[Dict[str, Any]]) -> ValidationResult:
+        return _validation_result(validate_solution(self.normalize(source).normalized, assignments))
+
+    def solve(
+        self,
+        source: Union[Dict[str, Any], Snapshot],
+        *,
+        on_progress: Optional[ProgressCallback] = None,
+        should_stop: Optional[Callable[[], bool]] = None,
+        previous_assignments: Optional[List[Dict[str, Any]]] = None,
+        heartbeat_sec: float = 0.0,
+        **overrides: Any,
+    ) -> PlanResult:
+        """All phases in one call, same outputs as the CLI.
+
+        ``on_progress`` receives the same events as ``cli.py --progress ndjson``
+        as dicts.
+        """
+        started_at = time.time()
+        snapshot = self.normalize(source)
+        precheck = self.precheck(snapshot)
+        progress = None
+        if on_progress is not None:
+            progress = ProgressEmitter(sink=on_progress, started_at=started_at, heartbeat_sec=heartbeat_sec)
+            progress.start(timeLimitSec=self._config(overrides)["time_limit_sec"])
+        try:
+            run = run_pipeline(
+                snapshot.normalized["raw"],
+                self._config(overrides),
+                started_at=started_at,
+                previous_assignments=previous_assignments,
+                should_stop=should_stop,
+                progress=progress,
+                normalized=snapshot.normalized,
+                precheck=precheck.as_dict(),
+            )
+        except BaseException as error:
+            if progress is not None:
+                progress.close(ok=False, error=f"{type(error).__name__}: {error}")
+            raise
+        optimized = _optimize_result(snapshot.normalized, run["optimized"])
+        if progress is not None:
+            progress.close(ok=True, elapsedMs=run["elapsed_ms"])
+        return PlanResult(
+            score=optimized.score,
+            elapsed_ms=run["elapsed_ms"],
+            feasible=_feasible_result(snapshot.normalized, run["phase1"]),
+            optimized=optimized,
+            validation=_validation_result(run["audit"]),
+            result=run["result"],
+            report=run["report"],
+        )
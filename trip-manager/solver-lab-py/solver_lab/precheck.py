@@ -1,12 +1,13 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 from .task_space import build_task_space
 
 
-def run_precheck(normalized: Dict[str, Any]) -> Dict[str, Any]:
-    task_space = build_task_space(normalized)
+def run_precheck(normalized: Dict[str, Any], task_space: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    if task_space is None:
+        task_space = build_task_space(normalized)
     groups_by_id = normalized["groups_by_id"]
     locations_by_id = normalized["locations_by_id"]
     required_by_group = normalized["required_by_group"]
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import math
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from .jsonio import read_json, write_json
+
+PRESET_SCHEMA = "ec-planning-preset@1"
+PRESET_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "presets")
+# What a preset may set: pipeline config keys, and CP-SAT parameters applied
+# to every solve on top of time limit / workers / seed.
+CONFIG_KEYS = ("workers", "phase1_ratio", "lns_iter_time_sec", "lns_max_iterations")
+CP_SAT_KEYS = ("linearization_level", "cp_model_presolve", "symmetry_level", "cp_model_probing_level")
+# A tuned preset is picked by --preset auto for instances within this factor
+# of the candidate-pair range it was tuned on.
+AUTO_RANGE_FACTOR = 2.0
+
+BUILTIN_PRESETS: Dict[str, Dict[str, Any]] = {
+    "default": {"schema": PRESET_SCHEMA, "name": "default", "config": {}, "cpSat": {}},
+}
+
+
+def _check_preset(preset: Dict[str, Any], source: str) -> Dict[str, Any]:
+    if preset.get("schema") != PRESET_SCHEMA:
+        raise ValueError(f"{source}: expected schema {PRESET_SCHEMA}")
+    unknown = set(preset.get("config", {})) - set(CONFIG_KEYS)
+    unknown |= set(preset.get("cpSat", {})) - set(CP_SAT_KEYS)
+    if unknown:
+        raise ValueError(f"{source}: unknown preset keys {', '.join(sorted(unknown))}")
+    return preset
+
+
+def list_presets(preset_dir: str = PRESET_DIR) -> List[Dict[str, Any]]:
+    presets = dict(BUILTIN_PRESETS)
+    if os.path.isdir(preset_dir):
+        for file_name in sorted(os.listdir(preset_dir)):
+            if file_name.endswith(".json"):
+                path = os.path.join(preset_dir, file_name)
+                preset = _check_preset(read_json(path), path)
+                presets[preset["name"]] = preset
+    return list(presets.values())
+
+
+def load_preset(name: str, preset_dir: str = PRESET_DIR) -> Dict[str, Any]:
+    path = os.path.join(preset_dir, f"{name}.json")
+    if os.path.exists(path):
+        return _check_preset(read_json(path), path)
+    if name in BUILTIN_PRESETS:
+        return BUILTIN_PRESETS[name]
+    raise ValueError(f"unknown preset {name!r}; see {preset_dir}")
+
+
+def save_preset(name: str, preset: Dict[str, Any], preset_dir: str = PRESET_DIR) -> str:
+    path = os.path.join(preset_dir, f"{name}.json")
+    write_json(path, _check_preset(dict(preset, name=name), path))
+    return path
+
+
+def pick_preset(pairs: int, preset_dir: str = PRESET_DIR) -> Dict[str, Any]:
+    # Tuned preset whose candidate-pair range (widened by AUTO_RANGE_FACTOR)
+    # holds this instance, closest range midpoint on a log scale first.
+    best: Optional[Tuple[float, Dict[str, Any]]] = None
+    for preset in list_presets(preset_dir):
+        low, high = (preset.get("tunedOn") or {}).get("candidatePairs") or (None, None)
+        if not low or not high or not low / AUTO_RANGE_FACTOR <= pairs <= high * AUTO_RANGE_FACTOR:
+            continue
+        distance = abs(math.log(max(1, pairs)) - (math.log(low) + math.log(high)) / 2)
+        if best is None or distance < best[0]:
+            best = (distance, preset)
+    return best[1] if best is not None else BUILTIN_PRESETS["default"]
+
+
+def apply_preset(config: Dict[str, Any], preset: Dict[str, Any]) -> Dict[str, Any]:
+    # Keys listed in config["preset_keep"] were set explicitly and win.
+    keep = set(config.get("preset_keep") or ())
+    run_config = dict(config)
+    for key, value in preset.get("config", {}).items():
+        if key not in keep:
+            run_config[key] = value
+    run_config["cp_sat_params"] = dict(run_config.get("cp_sat_params") or {}, **preset.get("cpSat", {}))
+    return run_config
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import json
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, TextIO, Tuple
+
+PROGRESS_SCHEMA = "ec-planning-progress@1"
+
+
+def open_progress_stream(target: str) -> Tuple[TextIO, bool]:
+    # "-" or "" is stdout; anything else is a file or FIFO path opened for
+    # writing (a FIFO blocks here until the reader connects).
+    if not target or target == "-":
+        return sys.stdout, False
+    return open(target, "w", encoding="utf-8", buffering=1), True
+
+
+# One JSON object per line, flushed immediately, or one dict per call when a
+# sink callback is given instead of a stream. Every event carries "event" and
+# "tMs" (milliseconds since run start); heartbeats repeat the current phase
+# and best score so a reader can tell a busy solver from a dead one.
+class ProgressEmitter:
+    def __init__(
+        self,
+        stream: Optional[TextIO] = None,
+        *,
+        sink: Optional[Callable[[Dict[str, Any]], None]] = None,
+        started_at: Optional[float] = None,
+        heartbeat_sec: float = 2.0,
+    ) -> None:
+        self.stream = stream
+        self.sink = sink
+        self.started_at = time.time() if started_at is None else started_at
+        self.heartbeat_sec = float(heartbeat_sec)
+        self.phase = ""
+        self.best_score: Optional[int] = None
+        self.bound: Optional[int] = None
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def emit(self, event: str, **fields: Any) -> None:
+        payload: Dict[str, Any] = {"event": event, "tMs": int((time.time() - self.started_at) * 1000)}
+        payload.update(fields)
+        if self.sink is not None:
+            with self._lock:
+                self.sink(payload)
+            return
+        if self.stream is None:
+            return
+        line = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+        with self._lock:
+            try:
+                self.stream.write(line + "\n")
+                self.stream.flush()
+            except (BrokenPipeError, ValueError):
+                # Reader went away; the solve itself carries on.
+                self._stopped.set()
+
+    def phase_start(self, phase: str, **fields: Any) -> None:
+        self.phase = phase
+        self.emit("phase_start", phase=phase, **fields)
+
+    def phase_end(self, phase: str, **fields: Any) -> None:
+        self.emit("phase_end", phase=phase, **fields)
+
+    def improvement(self, **fields: Any) -> None:
+        self.best_score = fields.get("score", self.best_score)
+        if fields.get("bound") is not None:
+            self.bound = fields["bound"]
+        self.emit("improvement", phase=self.phase, **fields)
+
+    def start(self, **fields: Any) -> None:
+        self.emit("run_start", schema=PROGRESS_SCHEMA, **fields)
+        if self.heartbeat_sec > 0:
+            self._thread = threading.Thread(target=self._heartbeat_loop, name="progress-heartbeat", daemon=True)
+            self._thread.start()
+
+    def _heartbeat_loop(self) -> None:
+        while not self._stopped.wait(self.heartbeat_sec):
+            self.emit("heartbeat", phase=self.phase, bestScore=self.best_score, bound=self.bound)
+
+    def close(self, **fields: Any) -> None:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.emit("run_end", **fields)
@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+import time
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from .constraints import make_group_slot_key, make_usage_key
+from .model_cp_sat import build_cp_model, is_cp_sat_available, solve_cp_model
+from .solve_feasible import _solve_greedy_feasible
+
+
+def load_previous_assignments(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+    if not isinstance(payload, dict):
+        raise ValueError("Previous result must be an object")
+    schema = str(payload.get("schema") or "").strip()
+    if schema != "ec-planning-result@1":
+        raise ValueError(f"Unsupported previous result schema: {schema or 'unknown'}")
+    out: List[Dict[str, Any]] = []
+    for row in payload.get("assignments", []):
+        if not isinstance(row, dict):
+            continue
+        try:
+            group_id = int(row.get("groupId", row.get("group_id")))
+            location_id = int(row.get("locationId", row.get("location_id")))
+        except (TypeError, ValueError):
+            continue
+        out.append(
+            {
+                "group_id": group_id,
+                "location_id": location_id,
+                "date": str(row.get("date", "")).strip(),
+                "time_slot": str(row.get("timeSlot", row.get("time_slot", ""))).upper().strip(),
+                "participant_count": int(row.get("participantCount", row.get("participant_count", 1)) or 1),
+            }
+        )
+    return out
+
+
+def find_affected_tasks(
+    normalized: Dict[str, Any],
+    task_space: Dict[str, Any],
+    previous_index: Dict[str, int],
+) -> Dict[str, Any]:
+    tasks_by_key = task_space["tasks_by_key"]
+    locations_by_id = normalized["locations_by_id"]
+    required_by_group = normalized["required_by_group"]
+    affected: Set[str] = set()
+    reasons = {
+        "dropped": 0,
+        "location_unavailable": 0,
+        "new_group": 0,
+        "capacity": 0,
+        "missing_required": 0,
+        "capacity_neighbors": 0,
+    }
+
+    def mark(keys: List[str], reason: str) -> None:
+        for key in keys:
+            if key not in affected:
+                affected.add(key)
+                reasons[reason] += 1
+
+    # previous rows that no longer map to a valid task/candidate
+    valid_index: Dict[str, int] = {}
+    for key, location_id in previous_index.items():
+        task = tasks_by_key.get(key)
+        if task is None:
+            reasons["dropped"] += 1
+            continue
+        if location_id not in task["candidate_location_ids"]:
+            mark([key], "location_unavailable")
+            continue
+        valid_index[key] = location_id
+
+    # groups without any previous assignment
+    for group_id, tasks in task_space["tasks_by_group"].items():
+        if tasks and not any(task["key"] in previous_index for task in tasks):
+            mark([task["key"] for task in tasks], "new_group")
+
+    # usage keys over their (possibly reduced) capacity
+    usage_people: Dict[str, int] = {}
+    usage_tasks: Dict[str, List[str]] = {}
+    for key, location_id in valid_index.items():
+        task = tasks_by_key[key]
+        usage_key = make_usage_key(task["date"], task["time_slot"], location_id)
+        usage_people[usage_key] = usage_people.get(usage_key, 0) + int(task["participant_count"])
+        usage_tasks.setdefault(usage_key, []).append(key)
+    for usage_key, people in usage_people.items():
+        location = locations_by_id.get(int(usage_key.split("|")[2]))
+        capacity = int(location.get("capacity", 0) or 0) if location else 0
+        if capacity > 0 and people > capacity:
+            mark(usage_tasks[usage_key], "capacity")
+
+    # required pairs the surviving assignments no longer cover
+    covered = {
+        (tasks_by_key[key]["group_id"], location_id)
+        for key, location_id in valid_index.items()
+        if key not in affected
+    }
+    missing_pairs = []
+    for group_id, required_set in required_by_group.items():
+        for location_id in required_set:
+            if (group_id, location_id) in covered:
+                continue
+            missing_pairs.append((group_id, location_id))
+            group_tasks = task_space["tasks_by_group"].get(group_id, [])
+            mark(
+                [task["key"] for task in group_tasks if location_id in task["candidate_location_ids"]],
+                "missing_required",
+            )
+
+    # one hop: free room at capacity-limited required locations
+    for group_id, location_id in missing_pairs:
+        location = locations_by_id.get(location_id)
+        if not location or int(location.get("capacity", 0) or 0) <= 0:
+            continue
+        for task in task_space["tasks_by_group"].get(group_id, []):
+            usage_key = make_usage_key(task["date"], task["time_slot"], location_id)
+            mark(usage_tasks.get(usage_key, []), "capacity_neighbors")
+
+    return {"task_keys": affected, "reasons": reasons, "valid_index": valid_index}
+
+
+def _reference_task_space(task_space: Dict[str, Any], previous_index: Dict[str, int]) -> Dict[str, Any]:
+    tasks = [dict(task, existing_location_id=previous_index.get(task["key"])) for task in task_space["tasks"]]
+    tasks_by_group: Dict[int, List[Dict[str, Any]]] = {group_id: [] for group_id in task_space["tasks_by_group"]}
+    for task in tasks:
+        tasks_by_group[task["group_id"]].append(task)
+    return {"tasks": tasks, "tasks_by_key": {task["key"]: task for task in tasks}, "tasks_by_group": tasks_by_group}
+
+
+def replan(
+    normalized: Dict[str, Any],
+    precheck: Dict[str, Any],
+    previous_assignments: List[Dict[str, Any]],
+    config: Dict[str, Any],
+    should_stop: Optional[Callable[[], bool]] = None,
+) -> Dict[str, Any]:
+    task_space = precheck["task_space"]
+    previous_index = {
+        make_group_slot_key(row["group_id"], row["date"], row["time_slot"]): int(row["location_id"])
+        for row in previous_assignments
+    }
+    # The previous result is the reference plan: matching it earns the
+    # existing-assignment bonus, so the solver moves as little as possible.
+    # The greedy fallback reads it from existing_assignments, CP-SAT from
+    # each task's existing_location_id.
+    reference = dict(normalized)
+    reference["existing_assignments"] = [
+        row for row in previous_assignments if row["time_slot"] in normalized["slot_keys"]
+    ]
+    reference_space = _reference_task_space(task_space, previous_index)
+    affected = find_affected_tasks(normalized, task_space, previous_index)
+    valid_index = affected["valid_index"]
+    diagnostics: Dict[str, Any] = {
+        "phase1_engine": "greedy_replan",
+        "previous_assignments": len(previous_assignments),
+        "affected_tasks": len(affected["task_keys"]),
+        "affected_reasons": affected["reasons"],
+        "escalation": "none",
+    }
+
+    result = None
+    if is_cp_sat_available():
+        affected_groups = {task_space["tasks_by_key"][key]["group_id"] for key in affected["task_keys"]}
+        neighborhoods = [
+            ("affected_tasks", set(affected["task_keys"])),
+            (
+                "affected_groups",
+                set(affected["task_keys"])
+                | {key for key in valid_index if task_space["tasks_by_key"][key]["group_id"] in affected_groups},
+            ),
+            ("full", set(task_space["tasks_by_key"].keys())),
+        ]
+        deadline = time.time() + max(1, int(config["time_limit_sec"]))
+        for name, release_keys in neighborhoods:
+            remaining_sec = int(deadline - time.time())
+            if remaining_sec < 1 or (should_stop is not None and should_stop()):
+                break
+            if name != "full":
+                remaining_sec = max(1, remaining_sec // 2)
+            fixed_tasks = {key: loc for key, loc in valid_index.items() if key not in release_keys}
+            bundle = build_cp_model(reference, reference_space, fixed_tasks=fixed_tasks, with_objective=True)
+            if bundle is None:
+                break
+            solved = solve_cp_model(
+                bundle,
+                time_limit_sec=remaining_sec,
+                workers=config["workers"],
+                seed=config["seed"],
+                hints=previous_index,
+                should_stop=should_stop,
+                params=config.get("cp_sat_params"),
+            )
+            if solved["assignments"]:
+                diagnostics["phase1_engine"] = "cp_sat_replan"
+                diagnostics["escalation"] = name
+                diagnostics["released_tasks"] = len(release_keys)
+                diagnostics["best_bound"] = solved.get("best_bound")
+                result = {
+                    "engine": "cp_sat_replan",
+                    "status": solved["status"],
+                    "assignments": solved["assignments"],
+                    "objective": solved.get("objective"),
+                }
+                break
+
+    if result is None:
+        fallback = _solve_greedy_feasible(reference, task_space)
+        diagnostics.update(fallback["diagnostics"])
+        result = {
+            "engine": fallback["engine"].replace("feasible", "replan"),
+            "status": fallback["status"],
+            "assignments": fallback["assignments"],
+            "objective": None,
+        }
+
+    final_index = {
+        make_group_slot_key(row["group_id"], row["date"], row["time_slot"]): int(row["location_id"])
+        for row in result["assignments"]
+    }
+    moved = [key for key, location_id in valid_index.items() if final_index.get(key) != location_id]
+    diagnostics["kept_assignments"] = len(valid_index) - len(moved)
+    diagnostics["moved_assignments"] = len(moved)
+    diagnostics["added_assignments"] = sum(1 for key in final_index if key not in previous_index)
+    result["diagnostics"] = diagnostics
+    return result
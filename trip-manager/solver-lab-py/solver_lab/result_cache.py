@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Set
+
+SOLVER_VERSION = "solver-lab-py@1"
+CACHE_VERSION = 1
+# Config keys that do not change the answer.
+_IGNORED_CONFIG_KEYS = {"checkpoint_every_sec", "explain_infeasible", "trace_memory"}
+
+
+def _canonical(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {str(key): _canonical(item) for key, item in value.items()}
+    if isinstance(value, (set, frozenset)):
+        return sorted(_canonical(item) for item in value)
+    if isinstance(value, (list, tuple)):
+        return [_canonical(item) for item in value]
+    return value
+
+
+def _digest(value: Any) -> str:
+    text = json.dumps(_canonical(value), ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def solver_version() -> str:
+    # Package metadata, so cache lookups and the run registry do not pay for
+    # importing ortools.
+    try:
+        from importlib.metadata import version
+
+        return f"{SOLVER_VERSION}+ortools-{version('ortools')}"
+    except Exception:
+        return f"{SOLVER_VERSION}+greedy"
+
+
+def normalized_signature(normalized: Dict[str, Any]) -> List[str]:
+    # One short hash per input row; two inputs are "close" when most rows match.
+    rows: List[Any] = [("scope", normalized["scope"], normalized["slot_keys"], normalized["slot_windows"])]
+    rows.extend(("group", row) for row in normalized["groups"])
+    rows.extend(("location", row) for row in normalized["locations"])
+    rows.extend(("required", group_id, ids) for group_id, ids in normalized["required_by_group"].items())
+    rows.extend(("existing", row) for row in normalized["existing_assignments"])
+    return sorted({_digest(row)[:16] for row in rows})
+
+
+def cache_key(normalized: Dict[str, Any], config: Dict[str, Any]) -> str:
+    # The raw payload is left out: meta fields such as exportedAt differ
+    # between otherwise identical exports.
+    view = {key: value for key, value in normalized.items() if key != "raw"}
+    options = {key: value for key, value in config.items() if key not in _IGNORED_CONFIG_KEYS}
+    return _digest({"input": view, "config": options, "solver": solver_version()})
+
+
+def _config_key(config: Dict[str, Any]) -> str:
+    return _digest({key: value for key, value in config.items() if key not in _IGNORED_CONFIG_KEYS})
+
+
+class ResultCache:
+    def __init__(
+        self,
+        directory: str,
+        *,
+        max_entries: int = 200,
+        max_bytes: int = 256 * 1024 * 1024,
+        max_age_sec: float = 14 * 24 * 3600,
+        near_threshold: float = 0.9,
+    ) -> None:
+        self.directory = directory
+        self.max_entries = max(1, int(max_entries))
+        self.max_bytes = max(1, int(max_bytes))
+        self.max_age_sec = float(max_age_sec)
+        self.near_threshold = float(near_threshold)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key[:32]}.json")
+
+    def _entries(self) -> List[os.DirEntry]:
+        if not os.path.isdir(self.directory):
+            return []
+        return [entry for entry in os.scandir(self.directory) if entry.is_file() and entry.name.endswith(".json")]
+
+    def _read(self, path: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(path, "r", encoding="utf-8") as handle:
+                entry = json.load(handle)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(entry, dict) or entry.get("version") != CACHE_VERSION:
+            return None
+        return entry
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self._path(key)
+        entry = self._read(path) if os.path.isfile(path) else None
+        if entry is None or entry.get("key") != key:
+            return None
+        if time.time() - os.path.getmtime(path) > self.max_age_sec:
+            return None
+        os.utime(path)  # mtime is the last-used time; age limits count from it
+        return entry
+
+    def find_near(self, normalized: Dict[str, Any], config: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        signature: Set[str] = set(normalized_signature(normalized))
+        config_key = _config_key(config)
+        best: Optional[Dict[str, Any]] = None
+        best_similarity = 0.0
+        now = time.time()
+        for item in self._entries():
+            if now - item.stat().st_mtime > self.max_age_sec:
+                continue
+            entry = self._read(item.path)
+            if entry is None or entry.get("configKey") != config_key:
+                continue
+            other = set(entry.get("signature", []))
+            union = len(signature | other)
+            similarity = len(signature & other) / union if union else 0.0
+            if similarity > best_similarity:
+                best, best_similarity = entry, similarity
+        if best is None or best_similarity < self.near_threshold:
+            return None
+        return {"entry": best, "similarity": round(best_similarity, 4)}
+
+    def put(
+        self,
+        key: str,
+        normalized: Dict[str, Any],
+        config: Dict[str, Any],
+        result: Dict[str, Any],
+        report: Dict[str, Any],
+    ) -> None:
+        entry = {
+            "version": CACHE_VERSION,
+            "key": key,
+            "configKey": _config_key(config),
+            "solver": solver_version(),
+            "storedAt": time.time(),
+            "signature": normalized_signature(normalized),
+            "result": result,
+            "report": report,
+        }
+        os.makedirs(self.directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(prefix=".tmp-", dir=self.directory)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                json.dump(entry, handle, ensure_ascii=False, separators=(",", ":"))
+            os.replace(temp_path, self._path(key))
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        self.evict()
+
+    def evict(self) -> int:
+        now = time.time()
+        entries = sorted(self._entries(), key=lambda item: item.stat().st_mtime)
+        total = sum(item.stat().st_size for item in entries)
+        removed = 0
+        for index, item in enumerate(entries):
+            remaining = len(entries) - index
+            expired = now - item.stat().st_mtime > self.max_age_sec
+            if not expired and remaining <= self.max_entries and total <= self.max_bytes:
+                break
+            total -= item.stat().st_size
+            try:
+                os.remove(item.path)
+                removed += 1
+            except OSError:
+                pass
+        return removed
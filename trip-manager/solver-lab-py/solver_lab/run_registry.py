@@ -0,0 +1,389 @@
+from __future__ import annotations
+
+import json
+import math
+import os
+import re
+import sqlite3
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from .result_cache import solver_version
+
+SCHEMA_VERSION = 1
+# Size classes by candidate (task, location) pairs, roughly the generator's
+# xs..xl presets.
+SIZE_CLASSES = (("xs", 1000), ("s", 5000), ("m", 20000), ("l", 80000))
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at TEXT NOT NULL,
+    source TEXT NOT NULL,
+    solver TEXT NOT NULL,
+    input_hash TEXT,
+    input_path TEXT,
+    snapshot_id TEXT,
+    groups INTEGER,
+    locations INTEGER,
+    tasks INTEGER,
+    candidate_pairs INTEGER,
+    candidates_per_task REAL,
+    capacity_tightness REAL,
+    required_pairs INTEGER,
+    size_class TEXT,
+    config TEXT NOT NULL,
+    preset TEXT,
+    time_limit_sec INTEGER,
+    workers INTEGER,
+    engine TEXT,
+    stop_reason TEXT,
+    cache_hit INTEGER NOT NULL DEFAULT 0,
+    final_score INTEGER,
+    score_bound INTEGER,
+    gap_abs INTEGER,
+    gap_rel REAL,
+    lns_iterations INTEGER,
+    hard_violations INTEGER,
+    must_visit_missing INTEGER,
+    total_ms REAL,
+    cpu_ms REAL,
+    peak_rss_mb REAL
+);
+CREATE INDEX IF NOT EXISTS runs_created ON runs (created_at);
+CREATE INDEX IF NOT EXISTS runs_size_created ON runs (size_class, created_at);
+CREATE INDEX IF NOT EXISTS runs_input ON runs (input_hash, created_at);
+CREATE TABLE IF NOT EXISTS run_spans (
+    run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    wall_ms REAL NOT NULL,
+    cpu_ms REAL NOT NULL,
+    PRIMARY KEY (run_id, name)
+);
+CREATE INDEX IF NOT EXISTS run_spans_name ON run_spans (name, run_id);
+"""
+# Query metrics: a runs column, or span:<name> for a timing span summed over
+# the run (span:optimize, span:cp_sat.solve, ...).
+METRIC_COLUMNS = (
+    "total_ms",
+    "cpu_ms",
+    "peak_rss_mb",
+    "final_score",
+    "gap_abs",
+    "gap_rel",
+    "lns_iterations",
+    "hard_violations",
+    "must_visit_missing",
+)
+# Metrics where a larger value is better, for regression direction.
+HIGHER_IS_BETTER = {"final_score", "lns_iterations"}
+GROUP_COLUMNS = {
+    "size": "size_class",
+    "solver": "solver",
+    "preset": "preset",
+    "engine": "engine",
+    "input": "substr(input_hash, 1, 12)",
+    "source": "source",
+    "day": "substr(created_at, 1, 10)",
+    "week": "strftime('%Y-W%W', created_at)",
+    "month": "substr(created_at, 1, 7)",
+}
+STATS = ("count", "mean", "p50", "p90", "p95", "max", "min")
+
+
+def size_class(pairs: int) -> str:
+    for name, limit in SIZE_CLASSES:
+        if pairs < limit:
+            return name
+    return "xl"
+
+
+def connect(db_path: str) -> sqlite3.Connection:
+    os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+    connection = sqlite3.connect(db_path, timeout=10)
+    connection.row_factory = sqlite3.Row
+    connection.execute("PRAGMA foreign_keys = ON")
+    if connection.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+        connection.executescript(SCHEMA_SQL)
+        connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    return connection
+
+
+def _span_totals(rows: List[Dict[str, Any]], totals: Dict[str, List[float]]) -> Dict[str, List[float]]:
+    for row in rows:
+        entry = totals.setdefault(row["name"], [0, 0.0, 0.0])
+        entry[0] += int(row.get("count", 0))
+        entry[1] += float(row.get("wallMs", 0.0))
+        entry[2] += float(row.get("cpuMs", 0.0))
+        _span_totals(row.get("children", []), totals)
+    return totals
+
+
+def record_run(
+    db_path: str,
+    report: Dict[str, Any],
+    config: Dict[str, Any],
+    *,
+    input_hash: str = "",
+    input_path: str = "",
+    snapshot_id: str = "",
+    source: str = "solve",
+) -> int:
+    features = report.get("instance") or {}
+    diagnostics = report.get("optimize", {}).get("diagnostics", {})
+    audit = report.get("audit", {})
+    timings = report.get("timings") or {}
+    prediction = report.get("timePrediction") or {}
+    preset = report.get("preset") or {}
+    pairs = features.get("candidatePairs")
+    row = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "source": source,
+        "solver": solver_version(),
+        "input_hash": input_hash or None,
+        "input_path": input_path or None,
+        "snapshot_id": snapshot_id or None,
+        "groups": (report.get("summary") or {}).get("groups"),
+        "locations": (report.get("summary") or {}).get("locations"),
+        "tasks": features.get("tasks"),
+        "candidate_pairs": pairs,
+        "candidates_per_task": features.get("candidatesPerTask"),
+        "capacity_tightness": features.get("capacityTightness"),
+        "required_pairs": features.get("requiredPairs"),
+        "size_class": size_class(pairs) if pairs is not None else None,
+        "config": json.dumps(config, ensure_ascii=False, sort_keys=True, default=str),
+        "preset": preset.get("name") or config.get("preset") or None,
+        "time_limit_sec": prediction.get("timeLimitSec", config.get("time_limit_sec")),
+        "workers": config.get("workers"),
+        "engine": report.get("optimize", {}).get("engine"),
+        "stop_reason": diagnostics.get("stop_reason") or diagnostics.get("reason"),
+        "cache_hit": int(bool((report.get("cache") or {}).get("hit"))),
+        "final_score": diagnostics.get("final_score", diagnostics.get("phase1_score")),
+        "score_bound": diagnostics.get("score_bound"),
+        "gap_abs": diagnostics.get("gap_abs"),
+        "gap_rel": diagnostics.get("gap_rel"),
+        "lns_iterations": diagnostics.get("lns_iterations"),
+        "hard_violations": len(audit.get("hardViolations", [])),
+        "must_visit_missing": len(audit.get("mustVisitMissing", [])),
+        "total_ms": timings.get("totalMs", (report.get("summary") or {}).get("elapsedMs")),
+        "cpu_ms": timings.get("cpuMs"),
+        "peak_rss_mb": (report.get("memory") or {}).get("peakRssMb"),
+    }
+    connection = connect(db_path)
+    try:
+        with connection:
+            cursor = connection.execute(
+                f"INSERT INTO runs ({', '.join(row)}) VALUES ({', '.join('?' for _ in row)})",
+                list(row.values()),
+            )
+            run_id = int(cursor.lastrowid)
+            connection.executemany(
+                "INSERT INTO run_spans (run_id, name, count, wall_ms, cpu_ms) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (run_id, name, int(count), round(wall, 3), round(cpu, 3))
+                    for name, (count, wall, cpu) in _span_totals(timings.get("spans", []), {}).items()
+                ],
+            )
+    finally:
+        connection.close()
+    return run_id
+
+
+def parse_since(text: str, now: Optional[datetime] = None) -> str:
+    # today, week, month, <N>d, or a YYYY-MM-DD date -> ISO timestamp.
+    now = now or datetime.now()
+    text = text.strip()
+    if text == "today":
+        start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    elif text == "week":
+        start = (now - timedelta(days=now.weekday())).replace(hour=0, minute=0, second=0, microsecond=0)
+    elif text == "month":
+        start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    elif re.fullmatch(r"\d+d", text):
+        start = now - timedelta(days=int(text[:-1]))
+    elif re.fullmatch(r"\d{4}-\d{2}-\d{2}", text):
+        start = datetime.strptime(text, "%Y-%m-%d")
+    else:
+        raise ValueError(f"expected today, week, month, <N>d or YYYY-MM-DD: {text}")
+    return start.strftime("%Y-%m-%dT%H:%M:%S")
+
+
+def _metric_sql(metric: str) -> Tuple[str, str]:
+    # -> (value expression, extra join)
+    if metric.startswith("span:"):
+        return "s.wall_ms", "JOIN run_spans s ON s.run_id = r.id AND s.name = :span"
+    if metric not in METRIC_COLUMNS:
+        raise ValueError(f"unknown metric {metric!r}; use span:<name> or one of {', '.join(METRIC_COLUMNS)}")
+    return f"r.{metric}", ""
+
+
+def _percentile(values: List[float], share: float) -> float:
+    # Nearest-rank percentile.
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(share * len(ordered)) - 1)]
+
+
+def _stat(values: List[float], stat: str) -> Optional[float]:
+    if stat == "count":
+        return len(values)
+    if not values:
+        return None
+    if stat == "mean":
+        return sum(values) / len(values)
+    if stat == "max":
+        return max(values)
+    if stat == "min":
+        return min(values)
+    return _percentile(values, int(stat[1:]) / 100)
+
+
+def _metric_values(
+    connection: sqlite3.Connection,
+    metric: str,
+    group_by: List[str],
+    where: List[str],
+    params: Dict[str, Any],
+) -> Dict[Tuple[Any, ...], List[float]]:
+    value_sql, join_sql = _metric_sql(metric)
+    group_sql = [GROUP_COLUMNS[name] for name in group_by]
+    params = dict(params, span=metric[len("span:"):] if metric.startswith("span:") else None)
+    sql = (
+        f"SELECT {', '.join(group_sql + [value_sql]) if group_sql else value_sql} AS value "
+        f"FROM runs r {join_sql} WHERE {' AND '.join(where + [f'{value_sql} IS NOT NULL'])}"
+    )
+    groups: Dict[Tuple[Any, ...], List[float]] = {}
+    for row in connection.execute(sql, params):
+        key = tuple(row[index] for index in range(len(group_sql)))
+        groups.setdefault(key, []).append(float(row["value"]))
+    return groups
+
+
+def _filters(
+    since: str = "",
+    until: str = "",
+    include_cache_hits: bool = False,
+    source: str = "",
+) -> Tuple[List[str], Dict[str, Any]]:
+    where = ["1 = 1"]
+    params: Dict[str, Any] = {}
+    if since:
+        where.append("r.created_at >= :since")
+        params["since"] = since
+    if until:
+        where.append("r.created_at < :until")
+        params["until"] = until
+    if not include_cache_hits:
+        where.append("r.cache_hit = 0")
+    if source:
+        where.append("r.source = :source")
+        params["source"] = source
+    return where, params
+
+
+def query_trend(
+    db_path: str,
+    *,
+    metric: str = "total_ms",
+    group_by: Optional[List[str]] = None,
+    stats: Optional[List[str]] = None,
+    since: str = "",
+    until: str = "",
+    include_cache_hits: bool = False,
+    source: str = "",
+) -> Dict[str, Any]:
+    group_by = list(group_by or [])
+    stats = list(stats or ["count", "p50", "p95"])
+    for name in group_by:
+        if name not in GROUP_COLUMNS:
+            raise ValueError(f"unknown group {name!r}; choose from {', '.join(GROUP_COLUMNS)}")
+    for stat in stats:
+        if stat not in STATS:
+            raise ValueError(f"unknown stat {stat!r}; choose from {', '.join(STATS)}")
+    where, params = _filters(since, until, include_cache_hits, source)
+    connection = connect(db_path)
+    try:
+        groups = _metric_values(connection, metric, group_by, where, params)
+    finally:
+        connection.close()
+    rows = []
+    for key in sorted(groups, key=lambda value: tuple("" if item is None else str(item) for item in value)):
+        row: Dict[str, Any] = dict(zip(group_by, key))
+        for stat in stats:
+            value = _stat(groups[key], stat)
+            row[stat] = None if value is None else round(value, 3)
+        rows.append(row)
+    return {"metric": metric, "groupBy": group_by, "stats": stats, "since": since, "until": until, "rows": rows}
+
+
+def find_regressions(
+    db_path: str,
+    *,
+    metric: str = "total_ms",
+    since: str,
+    group_by: Optional[List[str]] = None,
+    stat: str = "p50",
+    tolerance: float = 0.2,
+    min_runs: int = 3,
+) -> List[Dict[str, Any]]:
+    # Compares runs since `since` with all earlier runs, per group (size
+    # class by default); groups with fewer than min_runs on either side are
+    # left out.
+    group_by = list(group_by or ["size"])
+    connection = connect(db_path)
+    try:
+        where, params = _filters(since=since)
+        recent = _metric_values(connection, metric, group_by, where, params)
+        where, params = _filters(until=since)
+        before = _metric_values(connection, metric, group_by, where, params)
+    finally:
+        connection.close()
+    regressions = []
+    for key, values in recent.items():
+        baseline = before.get(key, [])
+        if len(values) < min_runs or len(baseline) < min_runs:
+            continue
+        old, new = _stat(baseline, stat), _stat(values, stat)
+        if old is None or new is None:
+            continue
+        if metric in HIGHER_IS_BETTER:
+            worse = new < old - abs(old) * tolerance
+        else:
+            worse = new > old + abs(old) * tolerance
+        if worse:
+            regressions.append(
+                dict(
+                    zip(group_by, key),
+                    metric=metric,
+                    stat=stat,
+                    baseline=round(old, 3),
+                    current=round(new, 3),
+                    baselineRuns=len(baseline),
+                    currentRuns=len(values),
+                )
+            )
+    return regressions
+
+
+def list_runs(db_path: str, *, limit: int = 20, since: str = "") -> List[Dict[str, Any]]:
+    where, params = _filters(since=since, include_cache_hits=True)
+    connection = connect(db_path)
+    try:
+        rows = connection.execute(
+            "SELECT id, created_at, source, size_class, tasks, engine, stop_reason, final_score, gap_rel, "
+            "hard_violations + must_visit_missing AS violations, total_ms, peak_rss_mb, cache_hit "
+            f"FROM runs r WHERE {' AND '.join(where)} ORDER BY id DESC LIMIT :limit",
+            dict(params, limit=int(limit)),
+        ).fetchall()
+    finally:
+        connection.close()
+    return [dict(row) for row in rows]
+
+
+def format_rows(rows: List[Dict[str, Any]]) -> List[str]:
+    if not rows:
+        return ["(no runs)"]
+    header = list(rows[0])
+    lines = [header] + [["" if row.get(name) is None else str(row.get(name)) for name in header] for row in rows]
+    widths = [max(len(line[index]) for line in lines) for index in range(len(header))]
+    return ["  ".join(cell.ljust(widths[index]) for index, cell in enumerate(line)).rstrip() for line in lines]
@@ -0,0 +1,328 @@
+from __future__ import annotations
+
+import gc
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from .constraints import is_location_available, make_group_slot_key, parse_closed_dates, uniq_ints
+from .normalize import normalize_group_row, normalize_input
+from .optimize_lns import _score_solution, optimize_with_lns
+from .pipeline import finish_run
+from .precheck import run_precheck
+from .solve_feasible import solve_feasible
+from .task_space import build_task_space
+
+# Base snapshot shared with pool workers. Under fork the children read it
+# through copy-on-write pages; other start methods receive it once per worker
+# via the pool initializer.
+_BASE: Optional[Dict[str, Any]] = None
+
+
+def _id_map(value: Any) -> Dict[int, Any]:
+    out: Dict[int, Any] = {}
+    if isinstance(value, dict):
+        for key, item in value.items():
+            try:
+                out[int(key)] = item
+            except (TypeError, ValueError):
+                continue
+    return out
+
+
+def load_scenarios(payload: Any) -> List[Dict[str, Any]]:
+    rows = payload.get("scenarios") if isinstance(payload, dict) else payload
+    if not isinstance(rows, list):
+        raise ValueError("scenario file must be a list or an object with a scenarios list")
+    scenarios: List[Dict[str, Any]] = []
+    names: Set[str] = set()
+    for index, row in enumerate(rows):
+        if not isinstance(row, dict):
+            continue
+        name = str(row.get("name", "")).strip() or f"scenario-{index + 1}"
+        if name in names:
+            raise ValueError(f"duplicate scenario name: {name}")
+        names.add(name)
+        scenarios.append(
+            {
+                "name": name,
+                "close_location_ids": uniq_ints(row.get("closeLocations") or []),
+                "closed_dates": {
+                    key: parse_closed_dates(value) for key, value in _id_map(row.get("closedDates")).items()
+                },
+                "capacity": {key: max(0, int(value)) for key, value in _id_map(row.get("capacity")).items()},
+                "add_groups": [
+                    group for group in (normalize_group_row(item) for item in row.get("addGroups") or []) if group
+                ],
+                "remove_group_ids": uniq_ints(row.get("removeGroups") or []),
+                "required_by_group": {
+                    key: uniq_ints(value or []) for key, value in _id_map(row.get("requiredLocationsByGroup")).items()
+                },
+            }
+        )
+    return scenarios
+
+
+def _patch_locations(
+    normalized: Dict[str, Any], scenario: Dict[str, Any]
+) -> Tuple[List[Dict[str, Any]], Set[int]]:
+    # Only patched rows are copied; the rest stay shared with the base.
+    changed: Dict[int, Dict[str, Any]] = {}
+    locations_by_id = normalized["locations_by_id"]
+
+    def row_for(location_id: int) -> Optional[Dict[str, Any]]:
+        if location_id not in locations_by_id:
+            return None
+        if location_id not in changed:
+            changed[location_id] = dict(locations_by_id[location_id])
+        return changed[location_id]
+
+    availability_changed: Set[int] = set()
+    for location_id in scenario["close_location_ids"]:
+        row = row_for(location_id)
+        if row is not None:
+            row["is_active"] = False
+            availability_changed.add(location_id)
+    for location_id, dates in scenario["closed_dates"].items():
+        row = row_for(location_id)
+        if row is not None:
+            row["closed_dates"] = set(row.get("closed_dates", set())) | set(dates)
+            availability_changed.add(location_id)
+    for location_id, capacity in scenario["capacity"].items():
+        row = row_for(location_id)
+        if row is not None:
+            row["capacity"] = capacity
+    locations = [changed.get(row["id"], row) for row in normalized["locations"]]
+    return locations, availability_changed
+
+
+def apply_scenario(
+    normalized: Dict[str, Any], task_space: Dict[str, Any], scenario: Dict[str, Any]
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    # Candidate lists are recomputed only for locations whose availability
+    # changed; new groups get their own tasks, removed groups are dropped.
+    locations, availability_changed = _patch_locations(normalized, scenario)
+    locations_by_id = {row["id"]: row for row in locations}
+    removed = set(scenario["remove_group_ids"])
+    added = [row for row in scenario["add_groups"] if row["id"] not in normalized["groups_by_id"]]
+    groups = [row for row in normalized["groups"] if row["id"] not in removed] + added
+
+    required_by_group = {
+        group_id: ids for group_id, ids in normalized["required_by_group"].items() if group_id not in removed
+    }
+    required_by_group.update(
+        {group_id: ids for group_id, ids in scenario["required_by_group"].items() if group_id not in removed}
+    )
+
+    view = dict(normalized)
+    view.update(
+        {
+            "groups": groups,
+            "locations": locations,
+            "groups_by_id": {row["id"]: row for row in groups},
+            "locations_by_id": locations_by_id,
+            "required_by_group": required_by_group,
+            "existing_assignments": [
+                row for row in normalized["existing_assignments"] if row["group_id"] not in removed
+            ],
+        }
+    )
+
+    location_order = [int(row["id"]) for row in locations]
+    tasks: List[Dict[str, Any]] = []
+    for task in task_space["tasks"]:
+        if task["group_id"] in removed:
+            continue
+        if availability_changed:
+            group = view["groups_by_id"][task["group_id"]]
+            current = set(task["candidate_location_ids"])
+            candidates = [
+                location_id
+                for location_id in location_order
+                if (
+                    is_location_available(
+                        location=locations_by_id[location_id],
+                        group=group,
+                        date=task["date"],
+                        slot_window=view["slot_windows"][task["time_slot"]],
+                    )
+                    if location_id in availability_changed
+                    else location_id in current
+                )
+            ]
+            if candidates != task["candidate_location_ids"]:
+                task = dict(task, candidate_location_ids=candidates)
+        tasks.append(task)
+
+    if added:
+        added_view = dict(view, groups=added, existing_assignments=[])
+        tasks.extend(build_task_space(added_view)["tasks"])
+
+    tasks_by_group: Dict[int, List[Dict[str, Any]]] = {row["id"]: [] for row in groups}
+    for task in tasks:
+        tasks_by_group[task["group_id"]].append(task)
+    patched_space = {
+        "tasks": tasks,
+        "tasks_by_key": {task["key"]: task for task in tasks},
+        "tasks_by_group": tasks_by_group,
+    }
+    return view, patched_space
+
+
+def _set_base(base: Optional[Dict[str, Any]]) -> None:
+    global _BASE
+    _BASE = base
+
+
+def _solve_scenario(index: int, config: Dict[str, Any]) -> Dict[str, Any]:
+    started_at = time.time()
+    base = _BASE
+    if base is None:
+        raise RuntimeError("scenario base is not loaded in this worker")
+    scenario = base["scenarios"][index]
+    if scenario is None:
+        normalized, task_space = base["normalized"], base["task_space"]
+    else:
+        normalized, task_space = apply_scenario(base["normalized"], base["task_space"], scenario)
+    patch_ms = int((time.time() - started_at) * 1000)
+    precheck = run_precheck(normalized, task_space)
+    phase1 = solve_feasible(normalized, config, precheck, started_at=started_at)
+    optimized = optimize_with_lns(normalized, phase1, config, started_at, task_space=task_space)
+    run = finish_run(normalized, precheck, phase1, optimized, config, started_at)
+    audit = run["audit"]
+    hard = len(audit["hard_violations"])
+    missing = len(audit["must_visit_missing"])
+    return {
+        "name": "base" if scenario is None else scenario["name"],
+        "status": "ok" if not hard and not missing else "violations",
+        "score": _score_solution(normalized, optimized["assignments"]),
+        "hardViolations": hard,
+        "mustVisitMissing": missing,
+        "blockingErrors": len(precheck["blocking_errors"]),
+        "groups": len(normalized["groups"]),
+        "tasks": len(task_space["tasks"]),
+        "engine": optimized.get("engine"),
+        "patchMs": patch_ms,
+        "elapsedMs": run["elapsed_ms"],
+        "assignments": optimized["assignments"],
+        "result": run["result"],
+        "report": run["report"],
+    }
+
+
+def _changed_tasks(base_rows: List[Dict[str, Any]], rows: List[Dict[str, Any]]) -> int:
+    def index(items: List[Dict[str, Any]]) -> Dict[str, int]:
+        return {
+            make_group_slot_key(row["group_id"], row["date"], row["time_slot"]): int(row["location_id"])
+            for row in items
+        }
+
+    before = index(base_rows)
+    after = index(rows)
+    return sum(1 for key in set(before) | set(after) if before.get(key) != after.get(key))
+
+
+def run_scenarios(
+    raw_payload: Dict[str, Any],
+    scenarios: List[Dict[str, Any]],
+    config: Dict[str, Any],
+    *,
+    processes: Optional[int] = None,
+    include_base: bool = True,
+) -> Dict[str, Any]:
+    started_at = time.time()
+    normalized = normalize_input(raw_payload)
+    task_space = build_task_space(normalized)
+    entries: List[Optional[Dict[str, Any]]] = ([None] if include_base else []) + list(scenarios)
+    base = {"normalized": normalized, "task_space": task_space, "scenarios": entries}
+    prepare_ms = int((time.time() - started_at) * 1000)
+
+    cores = max(1, os.cpu_count() or 1)
+    if not processes or processes <= 0:
+        processes = max(1, cores // max(1, int(config["workers"])))
+    processes = max(1, min(int(processes), len(entries) or 1))
+
+    rows: List[Dict[str, Any]] = []
+    if processes == 1:
+        _set_base(base)
+        rows = [_solve_scenario(index, config) for index in range(len(entries))]
+    else:
+        if "fork" in multiprocessing.get_all_start_methods():
+            _set_base(base)
+            # Keep the base out of the collector so refcount-free pages stay shared.
+            gc.collect()
+            if hasattr(gc, "freeze"):
+                gc.freeze()
+            pool = ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context("fork"))
+        else:
+            pool = ProcessPoolExecutor(max_workers=processes, initializer=_set_base, initargs=(base,))
+        try:
+            with pool:
+                rows = list(pool.map(_solve_scenario, range(len(entries)), [config] * len(entries)))
+        finally:
+            if hasattr(gc, "unfreeze"):
+                gc.unfreeze()
+    _set_base(None)
+
+    reference = rows[0] if include_base and rows else None
+    for row in rows:
+        if reference is not None:
+            row["scoreDelta"] = row["score"] - reference["score"]
+            row["changedTasks"] = _changed_tasks(reference["assignments"], row["assignments"])
+    return {
+        "scenarios": len(scenarios),
+        "processes": processes,
+        "workersPerJob": int(config["workers"]),
+        "prepareMs": prepare_ms,
+        "elapsedMs": int((time.time() - started_at) * 1000),
+        "rows": rows,
+    }
+
+
+def build_comparison_report(outcome: Dict[str, Any]) -> Dict[str, Any]:
+    keys = (
+        "name",
+        "status",
+        "score",
+        "scoreDelta",
+        "changedTasks",
+        "hardViolations",
+        "mustVisitMissing",
+        "blockingErrors",
+        "groups",
+        "tasks",
+        "engine",
+        "patchMs",
+        "elapsedMs",
+    )
+    return {
+        "schema": "ec-planning-scenarios@1",
+        "scenarios": outcome["scenarios"],
+        "processes": outcome["processes"],
+        "workersPerJob": outcome["workersPerJob"],
+        "prepareMs": outcome["prepareMs"],
+        "elapsedMs": outcome["elapsedMs"],
+        "rows": [{key: row[key] for key in keys if key in row} for row in outcome["rows"]],
+    }
+
+
+def format_comparison_table(report: Dict[str, Any]) -> List[str]:
+    header = ["scenario", "status", "score", "delta", "changed", "hard", "missing", "elapsed_ms"]
+    lines = [header]
+    for row in report["rows"]:
+        lines.append(
+            [
+                str(row["name"]),
+                str(row["status"]),
+                str(row["score"]),
+                "" if row.get("scoreDelta") is None else f"{row['scoreDelta']:+d}",
+                str(row.get("changedTasks", "")),
+                str(row["hardViolations"]),
+                str(row["mustVisitMissing"]),
+                str(row["elapsedMs"]),
+            ]
+        )
+    widths = [max(len(line[index]) for line in lines) for index in range(len(header))]
+    return ["  ".join(cell.ljust(widths[index]) for index, cell in enumerate(line)).rstrip() for line in lines]
@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import heapq
+import itertools
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+PRIORITY_RANKS = {"interactive": 0, "normal": 1, "batch": 2}
+
+
+def priority_rank(value: Any) -> int:
+    if isinstance(value, str) and value in PRIORITY_RANKS:
+        return PRIORITY_RANKS[value]
+    try:
+        return max(0, int(value))
+    except (TypeError, ValueError):
+        return PRIORITY_RANKS["normal"]
+
+
+def default_core_budget() -> int:
+    return max(1, os.cpu_count() or 1)
+
+
+class ScheduledJob:
+    def __init__(
+        self,
+        job_id: str,
+        run: Callable[["ScheduledJob"], None],
+        *,
+        priority: int,
+        cores_requested: int,
+    ) -> None:
+        self.id = job_id
+        self.run = run
+        self.priority = priority
+        self.cores_requested = max(1, int(cores_requested))
+        self.cores = 0
+        self.cancel_event = threading.Event()
+        self.done_event = threading.Event()
+        self.status = "queued"
+        self.submitted_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.error: Optional[str] = None
+
+    def metrics(self) -> Dict[str, Any]:
+        now = time.time()
+        queue_end = self.started_at or self.finished_at or now
+        return {
+            "priority": self.priority,
+            "coresRequested": self.cores_requested,
+            "cores": self.cores,
+            "queueWaitMs": int((queue_end - self.submitted_at) * 1000),
+            "runMs": int(((self.finished_at or now) - self.started_at) * 1000) if self.started_at else 0,
+        }
+
+
+# Priority queue sharing a global CP-SAT core budget between jobs. A job
+# starts once a core is free and gets min(requested, free) cores; lower
+# priority numbers run first, submission order breaks ties. Cancellation is
+# cooperative: queued jobs are dropped, running jobs observe cancel_event and
+# return their best incumbent.
+class JobScheduler:
+    def __init__(self, core_budget: Optional[int] = None, max_running: Optional[int] = None) -> None:
+        self.core_budget = max(1, int(core_budget or default_core_budget()))
+        self.max_running = max(1, int(max_running or self.core_budget))
+        self._queue: List[Tuple[int, int, ScheduledJob]] = []
+        self._sequence = itertools.count()
+        self._running: Dict[str, ScheduledJob] = {}
+        self._cores_in_use = 0
+        self._condition = threading.Condition()
+        self._closed = False
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, name="solver-scheduler", daemon=True)
+        self._dispatcher.start()
+
+    def submit(self, job: ScheduledJob) -> ScheduledJob:
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("scheduler is shut down")
+            heapq.heappush(self._queue, (job.priority, next(self._sequence), job))
+            self._condition.notify_all()
+        return job
+
+    def cancel(self, job: ScheduledJob) -> None:
+        with self._condition:
+            job.cancel_event.set()
+            if job.status == "queued":
+                self._queue = [entry for entry in self._queue if entry[2] is not job]
+                heapq.heapify(self._queue)
+                job.status = "cancelled"
+                job.finished_at = time.time()
+                job.done_event.set()
+            self._condition.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._condition:
+            return {
+                "coreBudget": self.core_budget,
+                "coresInUse": self._cores_in_use,
+                "running": len(self._running),
+                "queued": len(self._queue),
+                "maxRunning": self.max_running,
+            }
+
+    def _dispatch_loop(self) -> None:
+        while True:
+            with self._condition:
+                while not self._closed and not self._can_start():
+                    self._condition.wait()
+                if self._closed:
+                    return
+                _, _, job = heapq.heappop(self._queue)
+                job.cores = min(job.cores_requested, self.core_budget - self._cores_in_use)
+                self._cores_in_use += job.cores
+                self._running[job.id] = job
+                job.status = "running"
+                job.started_at = time.time()
+            threading.Thread(target=self._execute, args=(job,), name=f"solver-job-{job.id}", daemon=True).start()
+
+    def _can_start(self) -> bool:
+        return (
+            bool(self._queue)
+            and len(self._running) < self.max_running
+            and self._cores_in_use < self.core_budget
+        )
+
+    def _execute(self, job: ScheduledJob) -> None:
+        try:
+            job.run(job)
+            job.status = "cancelled" if job.cancel_event.is_set() else "done"
+        except Exception as error:  # pragma: no cover - surfaced through job status
+            job.status = "failed"
+            job.error = f"{type(error).__name__}: {error}"
+        finally:
+            with self._condition:
+                job.finished_at = time.time()
+                self._cores_in_use -= job.cores
+                self._running.pop(job.id, None)
+                job.done_event.set()
+                self._condition.notify_all()
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._condition:
+            self._closed = True
+            queued = [entry[2] for entry in self._queue]
+            running = list(self._running.values())
+            self._condition.notify_all()
+        for job in queued:
+            self.cancel(job)
+        for job in running:
+            job.cancel_event.set()
+        if wait:
+            for job in running:
+                job.done_event.wait()
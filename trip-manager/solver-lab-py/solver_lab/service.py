@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import json
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+
+from .model_cp_sat import is_cp_sat_available
+from .pipeline import build_config, run_pipeline
+from .replan import load_previous_assignments
+from .scheduler import JobScheduler, ScheduledJob, priority_rank
+
+# request option name -> build_config keyword
+OPTION_KEYS = {
+    "seed": "seed",
+    "timeLimitSec": "time_limit_sec",
+    "workers": "workers",
+    "phase1Ratio": "phase1_ratio",
+    "explain": "explain_infeasible",
+    "gapRel": "gap_rel",
+    "gapAbs": "gap_abs",
+    "stallIterations": "stall_iterations",
+    "stallSec": "stall_sec",
+    "preset": "preset",
+}
+MAX_FINISHED_JOBS = 200
+
+
+def config_from_options(options: Any) -> Dict[str, Any]:
+    kwargs: Dict[str, Any] = {}
+    if isinstance(options, dict):
+        for option_key, config_key in OPTION_KEYS.items():
+            if options.get(option_key) is not None:
+                kwargs[config_key] = options[option_key]
+    return build_config(**kwargs)
+
+
+class SolverService:
+    def __init__(self, max_jobs: Optional[int] = None, core_budget: Optional[int] = None) -> None:
+        self.scheduler = JobScheduler(core_budget=core_budget, max_running=max_jobs)
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        # Pay the ortools import at startup, not in the first job.
+        is_cp_sat_available()
+
+    def submit(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        raw_input = payload.get("input")
+        if not isinstance(raw_input, dict):
+            raise ValueError("request body must contain an input object")
+        previous = payload.get("previous")
+        config = config_from_options(payload.get("options"))
+        record: Dict[str, Any] = {
+            "input": raw_input,
+            "previous": load_previous_assignments(previous) if isinstance(previous, dict) else None,
+            "config": config,
+            "result": None,
+            "report": None,
+        }
+
+        def run(job: ScheduledJob) -> None:
+            try:
+                # The scheduler decides how many CP-SAT workers this job gets.
+                job_config = dict(record["config"], workers=job.cores)
+                job_config["preset_keep"] = sorted(set(job_config["preset_keep"]) | {"workers"})
+                outcome = run_pipeline(
+                    record["input"],
+                    job_config,
+                    started_at=job.started_at,
+                    previous_assignments=record["previous"],
+                    should_stop=job.cancel_event.is_set,
+                )
+                record["result"] = outcome["result"]
+                record["report"] = outcome["report"]
+            finally:
+                record["input"] = None
+
+        record["job"] = ScheduledJob(
+            uuid.uuid4().hex[:12],
+            run,
+            priority=priority_rank(payload.get("priority", "normal")),
+            cores_requested=config["workers"],
+        )
+        with self._lock:
+            self._jobs[record["job"].id] = record
+            self._trim_finished()
+        self.scheduler.submit(record["job"])
+        return self.describe(record["job"].id)
+
+    def _trim_finished(self) -> None:
+        finished = [record for record in self._jobs.values() if record["job"].done_event.is_set()]
+        if len(finished) <= MAX_FINISHED_JOBS:
+            return
+        finished.sort(key=lambda record: record["job"].finished_at or 0)
+        for record in finished[: len(finished) - MAX_FINISHED_JOBS]:
+            self._jobs.pop(record["job"].id, None)
+
+    def get(self, job_id: str) -> Dict[str, Any]:
+        with self._lock:
+            record = self._jobs.get(job_id)
+        if record is None:
+            raise KeyError(job_id)
+        return record
+
+    def describe(self, job_id: str, *, include_payloads: bool = False) -> Dict[str, Any]:
+        job = self.get(job_id)["job"]
+        out: Dict[str, Any] = {
+            "jobId": job.id,
+            "status": job.status,
+            "createdAt": job.submitted_at,
+            "startedAt": job.started_at,
+            "finishedAt": job.finished_at,
+            **job.metrics(),
+        }
+        if job.error:
+            out["error"] = job.error
+        if include_payloads and job.done_event.is_set():
+            record = self.get(job_id)
+            out["result"] = record["result"]
+            out["report"] = record["report"]
+        return out
+
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> Dict[str, Any]:
+        self.get(job_id)["job"].done_event.wait(timeout)
+        return self.describe(job_id, include_payloads=True)
+
+    def cancel(self, job_id: str) -> Dict[str, Any]:
+        # Running jobs stop at the next check and keep their best incumbent.
+        self.scheduler.cancel(self.get(job_id)["job"])
+        return self.describe(job_id)
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            counts: Dict[str, int] = {}
+            for record in self._jobs.values():
+                status = record["job"].status
+                counts[status] = counts.get(status, 0) + 1
+        return {"ok": True, "cpSat": is_cp_sat_available(), "jobs": counts, **self.scheduler.stats()}
+
+    def shutdown(self) -> None:
+        self.scheduler.shutdown(wait=True)
+
+
+def _make_handler(service: SolverService):
+    class Handler(BaseHTTPRequestHandler):
+        server_version = "solver-lab-py"
+
+        def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+            return
+
+        def _send(self, status: int, payload: Dict[str, Any]) -> None:
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _read_body(self) -> Dict[str, Any]:
+            length = int(self.headers.get("Content-Length") or 0)
+            if length <= 0:
+                return {}
+            payload = json.loads(self.rfile.read(length).decode("utf-8"))
+            if not isinstance(payload, dict):
+                raise ValueError("request body must be an object")
+            return payload
+
+        def _route(self) -> Tuple[str, ...]:
+            path = self.path.split("?", 1)[0]
+            return tuple(part for part in path.split("/") if part)
+
+        def do_GET(self) -> None:  # noqa: N802
+            parts = self._route()
+            try:
+                if parts == ("health",):
+                    self._send(200, service.status())
+                elif len(parts) == 2 and parts[0] == "jobs":
+                    self._send(200, service.describe(parts[1], include_payloads=True))
+                else:
+                    self._send(404, {"error": "not_found"})
+            except KeyError:
+                self._send(404, {"error": "job_not_found"})
+
+        def do_POST(self) -> None:  # noqa: N802
+            parts = self._route()
+            try:
+                if parts == ("jobs",):
+                    payload = self._read_body()
+                    job = service.submit(payload)
+                    if payload.get("wait"):
+                        self._send(200, service.wait(job["jobId"]))
+                    else:
+                        self._send(202, job)
+                elif len(parts) == 3 and parts[0] == "jobs" and parts[2] == "cancel":
+                    self._send(200, service.cancel(parts[1]))
+                else:
+                    self._send(404, {"error": "not_found"})
+            except KeyError:
+                self._send(404, {"error": "job_not_found"})
+            except ValueError as error:
+                self._send(400, {"error": str(error)})
+
+    return Handler
+
+
+def serve(
+    host: str = "127.0.0.1",
+    port: int = 8765,
+    max_jobs: Optional[int] = None,
+    core_budget: Optional[int] = None,
+) -> None:
+    service = SolverService(max_jobs=max_jobs, core_budget=core_budget)
+    server = ThreadingHTTPServer((host, int(port)), _make_handler(service))
+    server.daemon_threads = True
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.shutdown()
@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+import json
+import struct
+from array import array
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional, Tuple
+
+from .constraints import iter_dates, make_group_slot_key
+
+SHARED_LAYOUT_VERSION = 1
+_HEADER = struct.Struct("<III")  # layout version, json length, data start
+_ALIGN = 8
+
+# One shared memory block per dataset: a small JSON header (string tables and
+# array offsets) followed by flat int32/uint8 arrays. Workers attach by block
+# name and get memoryview casts over the same pages, so start-up cost does not
+# grow with the dataset and the data exists once regardless of worker count.
+# The views are stdlib memoryviews so attaching imports nothing heavy;
+# numpy.frombuffer(view, dtype) wraps one as an ndarray without copying.
+#
+#   location_*           per location (index = position in locations)
+#   group_participants   per group
+#   task_group/date/slot per task (indexes into groups, dates, slot_keys)
+#   task_participants    per task
+#   availability         tasks x locations, 1 = candidate
+#   cand_offsets/cand_locations  candidate lists in CSR form
+#   incumbent            per task location index, -1 = unassigned (owner writes)
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Before Python 3.13 attaching always registers with the resource
+        # tracker; pool workers share the creator's tracker, so this only
+        # re-adds the same name and the owner's unlink stays authoritative.
+        return shared_memory.SharedMemory(name=name)
+
+
+def _pack_arrays(normalized: Dict[str, Any], task_space: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Tuple[str, List[int]]]]:
+    locations = normalized["locations"]
+    groups = normalized["groups"]
+    tasks = task_space["tasks"]
+    scope = normalized["scope"]
+    slot_keys = list(normalized["slot_keys"])
+    dates = list(iter_dates(scope["start_date"], scope["end_date"]))
+
+    location_index = {int(row["id"]): index for index, row in enumerate(locations)}
+    group_index = {int(row["id"]): index for index, row in enumerate(groups)}
+    date_index = {date: index for index, date in enumerate(dates)}
+    slot_index = {slot: index for index, slot in enumerate(slot_keys)}
+    cluster_ids = normalized["cluster_location_ids"]
+
+    location_count = len(locations)
+    availability = [0] * (len(tasks) * location_count)
+    cand_offsets = [0]
+    cand_locations: List[int] = []
+    for task_position, task in enumerate(tasks):
+        row_start = task_position * location_count
+        for location_id in task["candidate_location_ids"]:
+            position = location_index[int(location_id)]
+            availability[row_start + position] = 1
+            cand_locations.append(position)
+        cand_offsets.append(len(cand_locations))
+
+    arrays: Dict[str, Tuple[str, List[int]]] = {
+        "location_ids": ("i", [int(row["id"]) for row in locations]),
+        "location_capacity": ("i", [int(row.get("capacity", 0) or 0) for row in locations]),
+        "location_active": ("B", [1 if row.get("is_active") else 0 for row in locations]),
+        "location_cluster": ("B", [1 if int(row["id"]) in cluster_ids else 0 for row in locations]),
+        "group_ids": ("i", [int(row["id"]) for row in groups]),
+        "group_participants": ("i", [int(row["participant_count"]) for row in groups]),
+        "task_group": ("i", [group_index[int(task["group_id"])] for task in tasks]),
+        "task_date": ("i", [date_index[task["date"]] for task in tasks]),
+        "task_slot": ("i", [slot_index[task["time_slot"]] for task in tasks]),
+        "task_participants": ("i", [int(task["participant_count"]) for task in tasks]),
+        "availability": ("B", availability),
+        "cand_offsets": ("i", cand_offsets),
+        "cand_locations": ("i", cand_locations),
+        "incumbent": ("i", [-1] * len(tasks)),
+    }
+    tables = {
+        "dates": dates,
+        "slot_keys": slot_keys,
+        "counts": {"locations": location_count, "groups": len(groups), "tasks": len(tasks)},
+    }
+    return tables, arrays
+
+
+class SharedDataset:
+    def __init__(
+        self,
+        shm: shared_memory.SharedMemory,
+        header: Dict[str, Any],
+        data_start: int,
+        *,
+        owner: bool,
+        writable: bool,
+    ) -> None:
+        self._shm = shm
+        self._owner = owner
+        self.name = shm.name
+        self.dates: List[str] = header["dates"]
+        self.slot_keys: List[str] = header["slot_keys"]
+        self.counts: Dict[str, int] = header["counts"]
+        self.arrays: Dict[str, memoryview] = {}
+        buffer = shm.buf
+        for key, (typecode, offset, length) in header["arrays"].items():
+            begin = data_start + offset
+            view = buffer[begin : begin + length * struct.calcsize(typecode)].cast(typecode)
+            if not writable:
+                view = view.toreadonly()
+            self.arrays[key] = view
+
+    @classmethod
+    def create(
+        cls,
+        normalized: Dict[str, Any],
+        task_space: Dict[str, Any],
+        incumbent: Optional[List[Dict[str, Any]]] = None,
+    ) -> "SharedDataset":
+        tables, arrays = _pack_arrays(normalized, task_space)
+        packed = {key: array(typecode, values) for key, (typecode, values) in arrays.items()}
+        layout: Dict[str, Tuple[str, int, int]] = {}
+        offset = 0
+        for key, values in packed.items():
+            layout[key] = (values.typecode, offset, len(values))
+            offset += (len(values) * values.itemsize + _ALIGN - 1) // _ALIGN * _ALIGN
+        header_dict = {**tables, "arrays": layout}
+        header = json.dumps(header_dict, separators=(",", ":")).encode("utf-8")
+        data_start = (_HEADER.size + len(header) + _ALIGN - 1) // _ALIGN * _ALIGN
+
+        shm = shared_memory.SharedMemory(create=True, size=max(1, data_start + offset))
+        _HEADER.pack_into(shm.buf, 0, SHARED_LAYOUT_VERSION, len(header), data_start)
+        shm.buf[_HEADER.size : _HEADER.size + len(header)] = header
+        for key, values in packed.items():
+            begin = data_start + layout[key][1]
+            shm.buf[begin : begin + len(values) * values.itemsize] = values.tobytes()
+        dataset = cls(shm, header_dict, data_start, owner=True, writable=True)
+        if incumbent:
+            dataset.set_incumbent(normalized, task_space, incumbent)
+        return dataset
+
+    @classmethod
+    def attach(cls, name: str) -> "SharedDataset":
+        shm = _attach(name)
+        version, header_length, data_start = _HEADER.unpack_from(shm.buf, 0)
+        if version != SHARED_LAYOUT_VERSION:
+            shm.close()
+            raise ValueError(f"unsupported shared dataset layout: {version}")
+        header = json.loads(bytes(shm.buf[_HEADER.size : _HEADER.size + header_length]).decode("utf-8"))
+        return cls(shm, header, data_start, owner=False, writable=False)
+
+    def set_incumbent(
+        self,
+        normalized: Dict[str, Any],
+        task_space: Dict[str, Any],
+        assignments: List[Dict[str, Any]],
+    ) -> None:
+        location_index = {int(row["id"]): index for index, row in enumerate(normalized["locations"])}
+        task_index = {task["key"]: index for index, task in enumerate(task_space["tasks"])}
+        incumbent = self.arrays["incumbent"]
+        for position in range(len(incumbent)):
+            incumbent[position] = -1
+        for row in assignments:
+            position = task_index.get(make_group_slot_key(row["group_id"], row["date"], row["time_slot"]))
+            location = location_index.get(int(row["location_id"]))
+            if position is not None and location is not None:
+                incumbent[position] = location
+
+    def candidates(self, task_position: int) -> memoryview:
+        offsets = self.arrays["cand_offsets"]
+        return self.arrays["cand_locations"][offsets[task_position] : offsets[task_position + 1]]
+
+    def incumbent_usage(self) -> Dict[Tuple[int, int, int], int]:
+        # (date index, slot index, location index) -> participants, from the
+        # shared incumbent vector.
+        usage: Dict[Tuple[int, int, int], int] = {}
+        incumbent = self.arrays["incumbent"]
+        task_date = self.arrays["task_date"]
+        task_slot = self.arrays["task_slot"]
+        participants = self.arrays["task_participants"]
+        for position in range(len(incumbent)):
+            location = incumbent[position]
+            if location < 0:
+                continue
+            key = (task_date[position], task_slot[position], location)
+            usage[key] = usage.get(key, 0) + participants[position]
+        return usage
+
+    def close(self) -> None:
+        for view in self.arrays.values():
+            view.release()
+        self.arrays = {}
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+
+    def __enter__(self) -> "SharedDataset":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
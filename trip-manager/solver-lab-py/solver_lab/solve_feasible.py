@@ -1,17 +1,18 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List
+import time
+from typing import Any, Callable, Dict, Optional
 
-from .constraints import has_capacity, make_group_slot_key, make_usage_key
+from .explain_infeasible import explain_infeasibility
 from .model_cp_sat import build_cp_model, is_cp_sat_available, solve_cp_model
+from .validate import IncrementalValidator
 
 
 def _solve_greedy_feasible(normalized: Dict[str, Any], task_space: Dict[str, Any]) -> Dict[str, Any]:
     groups_by_id = normalized["groups_by_id"]
     locations_by_id = normalized["locations_by_id"]
     required_by_group = normalized["required_by_group"]
-    slot_map: Dict[str, Dict[str, Any]] = {}
-    usage_map: Dict[str, int] = {}
+    state = IncrementalValidator(normalized)
     diagnostics = {
         "kept_existing": 0,
         "added_required": 0,
@@ -20,35 +21,10 @@ def _solve_greedy_feasible(normalized: Dict[str, Any], task_space: Dict[str, Any
 
     # keep existing assignments if still valid and conflict-free
     for row in normalized["existing_assignments"]:
-        group = groups_by_id.get(row["group_id"])
-        location = locations_by_id.get(row["location_id"])
-        if group is None or location is None:
-            continue
-        task_key = make_group_slot_key(row["group_id"], row["date"], row["time_slot"])
-        if task_key in slot_map:
-            continue
-        if row["location_id"] not in task_space["tasks_by_key"].get(task_key, {}).get(
-            "candidate_location_ids", []
-        ):
-            continue
-        if not has_capacity(
-            usage_map=usage_map,
-            location=location,
-            date=row["date"],
-            slot=row["time_slot"],
-            participants=int(row["participant_count"]),
-        ):
-            continue
-        slot_map[task_key] = dict(row)
-        usage_key = make_usage_key(row["date"], row["time_slot"], row["location_id"])
-        usage_map[usage_key] = int(usage_map.get(usage_key, 0)) + int(row["participant_count"])
-        diagnostics["kept_existing"] += 1
-
-    def has_required(group_id: int, location_id: int) -> bool:
-        for assignment in slot_map.values():
-            if assignment["group_id"] == group_id and assignment["location_id"] == location_id:
-                return True
-        return False
+        move = {"op": "add", "row": row}
+        if state.check(move) is None:
+            state.apply(move)
+            diagnostics["kept_existing"] += 1
 
     # force required locations
     for group_id, required_set in required_by_group.items():
@@ -57,10 +33,9 @@ def _solve_greedy_feasible(normalized: Dict[str, Any], task_space: Dict[str, Any
         if group is None:
             continue
         for location_id in sorted(required_set):
-            if has_required(group_id, location_id):
+            if state.covers(group_id, location_id):
                 continue
-            location = locations_by_id.get(location_id)
-            if location is None:
+            if locations_by_id.get(location_id) is None:
                 diagnostics["unplaced_required"].append(
                     {"group_id": group_id, "location_id": location_id, "reason": "location_missing"}
                 )
@@ -69,27 +44,19 @@ def _solve_greedy_feasible(normalized: Dict[str, Any], task_space: Dict[str, Any
             for task in tasks:
                 if location_id not in task["candidate_location_ids"]:
                     continue
-                task_key = task["key"]
-                if task_key in slot_map:
-                    continue
-                if not has_capacity(
-                    usage_map=usage_map,
-                    location=location,
-                    date=task["date"],
-                    slot=task["time_slot"],
-                    participants=int(group["participant_count"]),
-                ):
-                    continue
-                assignment = {
-                    "group_id": group_id,
-                    "location_id": location_id,
-                    "date": task["date"],
-                    "time_slot": task["time_slot"],
-                    "participant_count": int(group["participant_count"]),
+                move = {
+                    "op": "add",
+                    "row": {
+                        "group_id": group_id,
+                        "location_id": location_id,
+                        "date": task["date"],
+                        "time_slot": task["time_slot"],
+                        "participant_count": int(group["participant_count"]),
+                    },
                 }
-                slot_map[task_key] = assignment
-                usage_key = make_usage_key(task["date"], task["time_slot"], location_id)
-                usage_map[usage_key] = int(usage_map.get(usage_key, 0)) + int(group["participant_count"])
+                if state.check(move) is not None:
+                    continue
+                state.apply(move)
                 diagnostics["added_required"] += 1
                 placed = True
                 break
@@ -98,7 +65,7 @@ def _solve_greedy_feasible(normalized: Dict[str, Any], task_space: Dict[str, Any
                     {"group_id": group_id, "location_id": location_id, "reason": "no_slot"}
                 )
 
-    assignments = list(slot_map.values())
+    assignments = state.assignments()
     assignments.sort(
         key=lambda row: (row["group_id"], row["date"], normalized["slot_keys"].index(row["time_slot"]))
     )
@@ -115,11 +82,19 @@ def solve_feasible(
     normalized: Dict[str, Any],
     config: Dict[str, Any],
     precheck: Dict[str, Any],
+    should_stop: Optional[Callable[[], bool]] = None,
+    started_at: Optional[float] = None,
 ) -> Dict[str, Any]:
+    # started_at: when the run began (default: now); --explain only gets the
+    # part of the run's time limit that is still left.
+    if started_at is None:
+        started_at = time.time()
     task_space = precheck["task_space"]
     phase1_sec = max(1, int(config["time_limit_sec"] * config["phase1_ratio"]))
+    infeasibility = None
 
-    if is_cp_sat_available():
+    # phase1_greedy: set by the memory budget when the full model would not fit.
+    if is_cp_sat_available() and not config.get("phase1_greedy"):
         cp_bundle = build_cp_model(
             normalized=normalized,
             task_space=task_space,
@@ -132,6 +107,8 @@ def solve_feasible(
                 workers=config["workers"],
                 seed=config["seed"],
                 stop_after_first=True,
+                should_stop=should_stop,
+                params=config.get("cp_sat_params"),
             )
             if cp_result["assignments"]:
                 return {
@@ -144,8 +121,21 @@ def solve_feasible(
                         "best_bound": cp_result.get("best_bound"),
                     },
                 }
+            if cp_result["status"] == "INFEASIBLE" and config.get("explain_infeasible"):
+                remaining_sec = float(config["time_limit_sec"]) - (time.time() - started_at)
+                if remaining_sec >= 1:
+                    infeasibility = explain_infeasibility(
+                        normalized,
+                        task_space,
+                        time_limit_sec=min(float(phase1_sec), remaining_sec),
+                        seed=config["seed"],
+                    )
+                else:
+                    infeasibility = {"status": "no_time", "conflicts": [], "groups": [], "locations": []}
 
     fallback = _solve_greedy_feasible(normalized, task_space)
     fallback["diagnostics"]["phase1_time_sec"] = phase1_sec
+    if infeasibility is not None:
+        fallback["infeasibility"] = infeasibility
     return fallback
 
@@ -0,0 +1,247 @@
+from __future__ import annotations
+
+import json
+import math
+import pathlib
+import re
+import sqlite3
+from typing import Any, Dict, List, Optional, Set
+
+from .constraints import is_valid_date
+from .normalize import DEFAULT_SLOT_WINDOWS, normalize_input
+
+AI_RULES_KEY = "ai_schedule_rules"
+# DEFAULT_AI_RULES in backend/src/utils/aiConfig.js
+DEFAULT_AI_RULES = {
+    "timeSlots": ["MORNING", "AFTERNOON"],
+    "slotWindows": DEFAULT_SLOT_WINDOWS,
+    "requireAllPlanItems": False,
+    "maxItemsPerGroup": 8,
+}
+GROUP_COLUMNS = [
+    "id",
+    "name",
+    "type",
+    "student_count",
+    "teacher_count",
+    "start_date",
+    "end_date",
+    "manual_must_visit_location_ids",
+]
+LOCATION_COLUMNS = [
+    "id",
+    "name",
+    "capacity",
+    "cluster_prefer_same_day",
+    "blocked_weekdays",
+    "open_hours",
+    "closed_dates",
+    "target_groups",
+    "is_active",
+]
+
+
+def _connect_read_only(db_path: str) -> sqlite3.Connection:
+    path = pathlib.Path(db_path).resolve()
+    if not path.is_file():
+        raise ValueError(f"database not found: {path}")
+    connection = sqlite3.connect(f"{path.as_uri()}?mode=ro", uri=True)
+    connection.row_factory = sqlite3.Row
+    return connection
+
+
+def _columns(connection: sqlite3.Connection, table: str) -> Set[str]:
+    return {row["name"] for row in connection.execute(f"PRAGMA table_info({table})")}
+
+
+def _select(columns: Set[str], wanted: List[str]) -> str:
+    # Older databases miss some migrated columns; select NULL in their place.
+    return ", ".join(name if name in columns else f"NULL AS {name}" for name in wanted)
+
+
+def _parse_json(value: Any, fallback: Any) -> Any:
+    if not value:
+        return fallback
+    try:
+        return json.loads(value)
+    except (TypeError, ValueError):
+        return fallback
+
+
+def _location_id_list(value: Any) -> List[int]:
+    # Mirrors normalizeLocationIdList in backend/src/routes/planning.js.
+    if isinstance(value, str):
+        parsed = _parse_json(value.strip(), None)
+        items = parsed if isinstance(parsed, list) else re.split(r"[,，、;|]", value)
+    elif isinstance(value, list):
+        items = value
+    else:
+        return []
+    out: List[int] = []
+    for item in items:
+        try:
+            number = int(str(item).strip())
+        except (TypeError, ValueError):
+            continue
+        if number > 0 and number not in out:
+            out.append(number)
+    return out
+
+
+def _finite_number(value: Any) -> Optional[float]:
+    if isinstance(value, bool):
+        return float(value)
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if math.isfinite(number) else None
+
+
+def _normalize_rules(rules: Dict[str, Any]) -> Dict[str, Any]:
+    # Mirrors normalizeAiRules in backend/src/utils/aiConfig.js.
+    raw_slots = rules.get("timeSlots")
+    slots = [slot for slot in raw_slots if slot in DEFAULT_SLOT_WINDOWS] if isinstance(raw_slots, list) else []
+    raw_windows = rules.get("slotWindows")
+    if not isinstance(raw_windows, dict):
+        raw_windows = {}
+    windows: Dict[str, Dict[str, float]] = {}
+    for slot, default_window in DEFAULT_SLOT_WINDOWS.items():
+        window = raw_windows.get(slot)
+        if not isinstance(window, dict):
+            window = {}
+        start = _finite_number(window.get("start"))
+        end = _finite_number(window.get("end"))
+        windows[slot] = {
+            "start": default_window["start"] if start is None else start,
+            "end": default_window["end"] if end is None else end,
+        }
+    max_items = _finite_number(rules.get("maxItemsPerGroup"))
+    return {
+        "timeSlots": slots or list(DEFAULT_AI_RULES["timeSlots"]),
+        "slotWindows": windows,
+        "requireAllPlanItems": (
+            bool(rules["requireAllPlanItems"])
+            if rules.get("requireAllPlanItems") is not None
+            else DEFAULT_AI_RULES["requireAllPlanItems"]
+        ),
+        "maxItemsPerGroup": (
+            math.floor(max_items) if max_items is not None and max_items > 0 else DEFAULT_AI_RULES["maxItemsPerGroup"]
+        ),
+    }
+
+
+def _load_rules(connection: sqlite3.Connection) -> Dict[str, Any]:
+    # Same rules as getAiRules: a missing or unreadable row means the
+    # backend defaults, never "no rules" (which would enable EVENING).
+    try:
+        row = connection.execute("SELECT value FROM system_config WHERE key = ?", (AI_RULES_KEY,)).fetchone()
+    except sqlite3.OperationalError:
+        row = None
+    rules = _parse_json(row["value"], None) if row else None
+    if not isinstance(rules, dict):
+        return _normalize_rules({})
+    return _normalize_rules(rules)
+
+
+def load_sqlite_input(
+    db_path: str,
+    *,
+    start_date: str,
+    end_date: str,
+    group_ids: Optional[List[int]] = None,
+    include_existing: bool = True,
+) -> Dict[str, Any]:
+    # Same rows as POST /planning/export, read with one query per table
+    # instead of going through the JSON file.
+    if not is_valid_date(start_date) or not is_valid_date(end_date) or start_date > end_date:
+        raise ValueError("Invalid scope date range")
+    connection = _connect_read_only(db_path)
+    try:
+        group_columns = _columns(connection, "groups")
+        location_columns = _columns(connection, "locations")
+        if not group_columns or not location_columns:
+            raise ValueError(f"database has no groups/locations tables: {db_path}")
+        group_sql = (
+            f"SELECT {_select(group_columns, GROUP_COLUMNS)} FROM groups"
+            " WHERE start_date <= ? AND end_date >= ?"
+        )
+        params: List[Any] = [end_date, start_date]
+        if group_ids:
+            group_sql += " AND id IN (SELECT value FROM json_each(?))"
+            params.append(json.dumps([int(value) for value in group_ids]))
+        group_rows = connection.execute(group_sql + " ORDER BY id", params).fetchall()
+
+        location_rows = connection.execute(
+            f"SELECT {_select(location_columns, LOCATION_COLUMNS)} FROM locations WHERE is_active ORDER BY id"
+        ).fetchall()
+
+        activity_rows = []
+        if include_existing:
+            activity_rows = connection.execute(
+                "SELECT group_id, location_id, activity_date, time_slot, participant_count"
+                " FROM activities WHERE activity_date BETWEEN ? AND ?",
+                (start_date, end_date),
+            ).fetchall()
+        rules = _load_rules(connection)
+    finally:
+        connection.close()
+
+    groups = [
+        {
+            "id": row["id"],
+            "name": row["name"],
+            "type": row["type"],
+            "studentCount": row["student_count"],
+            "teacherCount": row["teacher_count"],
+            "participantCount": (row["student_count"] or 0) + (row["teacher_count"] or 0),
+            "startDate": row["start_date"],
+            "endDate": row["end_date"],
+        }
+        for row in group_rows
+    ]
+    locations = []
+    for row in location_rows:
+        closed_dates = _parse_json(row["closed_dates"], [])
+        open_hours = _parse_json(row["open_hours"], None)
+        locations.append(
+            {
+                "id": row["id"],
+                "name": row["name"],
+                "capacity": row["capacity"],
+                "clusterPreferSameDay": bool(row["cluster_prefer_same_day"]),
+                "blockedWeekdays": row["blocked_weekdays"] or "",
+                "closedDates": closed_dates if isinstance(closed_dates, list) else [],
+                "openHours": open_hours if isinstance(open_hours, dict) else None,
+                "targetGroups": row["target_groups"],
+                "isActive": bool(row["is_active"]),
+            }
+        )
+    return {
+        "schema": "ec-planning-input@2",
+        "meta": {"source": "sqlite"},
+        "scope": {"startDate": start_date, "endDate": end_date, "groupIds": [row["id"] for row in group_rows]},
+        "rules": rules,
+        "data": {
+            "groups": groups,
+            "locations": locations,
+            "requiredLocationsByGroup": {
+                str(row["id"]): {"locationIds": _location_id_list(row["manual_must_visit_location_ids"])}
+                for row in group_rows
+            },
+            "existingAssignments": [
+                {
+                    "groupId": row["group_id"],
+                    "locationId": row["location_id"],
+                    "date": row["activity_date"],
+                    "timeSlot": row["time_slot"],
+                    "participantCount": row["participant_count"],
+                }
+                for row in activity_rows
+            ],
+        },
+    }
+
+
+def normalize_from_sqlite(db_path: str, **scope: Any) -> Dict[str, Any]:
+    return normalize_input(load_sqlite_input(db_path, **scope))
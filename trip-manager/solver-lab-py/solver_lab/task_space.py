@@ -3,8 +3,10 @@ from __future__ import annotations
 from typing import Any, Dict, List
 
 from .constraints import clamp_range, is_location_available, iter_dates, make_group_slot_key
+from .tracing import traced
 
 
+@traced("build_task_space")
 def build_task_space(normalized: Dict[str, Any]) -> Dict[str, Any]:
     tasks: List[Dict[str, Any]] = []
     tasks_by_key: Dict[str, Dict[str, Any]] = {}
@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+import math
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .jsonio import read_json, write_json
+from .memory import candidate_pairs
+
+TIME_MODEL_SCHEMA = "ec-planning-time-model@1"
+# Score levels relative to a run's final best; a run "reaches" 0.99 once its
+# best score is within 1% of where it ended.
+QUALITY_LEVELS = (0.95, 0.99, 0.995, 0.999, 1.0)
+# In order of use: a fit with few samples keeps only the leading features.
+FEATURE_NAMES = ("logTasks", "logCandidatesPerTask", "capacityTightness", "logRequiredPairs")
+SAMPLES_PER_COEFFICIENT = 4
+MIN_TIME_SEC = 10
+MAX_TIME_SEC = 3600
+# Fewer samples than this and --time auto falls back to the size heuristic.
+MIN_SAMPLES = 6
+RIDGE = 1e-3
+
+
+def instance_features(normalized: Dict[str, Any], task_space: Dict[str, Any]) -> Dict[str, Any]:
+    # Capacity tightness as in the generator: peak people in one slot over
+    # the capacity of the locations they could use, where an uncapped
+    # location counts as taking the whole peak.
+    tasks = task_space["tasks"]
+    demand: Dict[Tuple[str, str], int] = {}
+    used_locations = set()
+    for task in tasks:
+        slot = (task["date"], task["time_slot"])
+        demand[slot] = demand.get(slot, 0) + int(task["participant_count"])
+        used_locations.update(task["candidate_location_ids"])
+    peak = max(demand.values()) if demand else 0
+    capacity = 0
+    for location_id in used_locations:
+        location = normalized["locations_by_id"].get(location_id)
+        if location is not None:
+            capacity += int(location.get("capacity", 0) or 0) or peak
+    pairs = candidate_pairs(tasks)
+    return {
+        "tasks": len(tasks),
+        "candidatePairs": pairs,
+        "candidatesPerTask": round(pairs / max(1, len(tasks)), 3),
+        "capacityTightness": round(peak / capacity, 4) if capacity else 0.0,
+        "requiredPairs": sum(len(ids) for ids in normalized["required_by_group"].values()),
+    }
+
+
+def _vector(features: Dict[str, Any], width: int = len(FEATURE_NAMES) + 1) -> List[float]:
+    return [
+        1.0,
+        math.log(max(1, features["tasks"])),
+        math.log(max(1.0, features["candidatesPerTask"])),
+        float(features["capacityTightness"]),
+        math.log1p(features["requiredPairs"]),
+    ][:width]
+
+
+def time_sample(report: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    # One training sample per solved report: when the best score first got
+    # within each quality level of the final score, plus the phase1 time.
+    # Reports from before curve points carried tMs are skipped.
+    features = report.get("instance")
+    curve = report.get("optimize", {}).get("diagnostics", {}).get("curve") or []
+    points = [point for point in curve if "tMs" in point and isinstance(point.get("bestScore"), int)]
+    if not features or not points:
+        return None
+    final = points[-1]["bestScore"]
+    reach_ms: Dict[str, int] = {}
+    for level in QUALITY_LEVELS:
+        target = final - (1 - level) * abs(final)
+        reach_ms[str(level)] = next(point["tMs"] for point in points if point["bestScore"] >= target)
+    spans = {row["name"]: row for row in (report.get("timings") or {}).get("spans", [])}
+    return {
+        "instance": features,
+        "reachMs": reach_ms,
+        "feasibleMs": spans["feasible"]["wallMs"] if "feasible" in spans else None,
+        "timeLimitSec": (report.get("timePrediction") or {}).get("timeLimitSec"),
+        "stopReason": points[-1].get("stopReason"),
+    }
+
+
+def collect_samples(paths: List[str]) -> Tuple[List[Dict[str, Any]], int]:
+    # Report json files and benchmark json files (rows carry timeSample);
+    # directories are walked, skipping the result cache and checkpoints.
+    samples: List[Dict[str, Any]] = []
+    skipped = 0
+    files: List[str] = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, names in os.walk(path):
+                dirs[:] = [name for name in dirs if name not in ("cache", "checkpoints")]
+                files.extend(os.path.join(root, name) for name in sorted(names) if name.endswith(".json"))
+        elif os.path.exists(path):
+            files.append(path)
+    for path in files:
+        try:
+            payload = read_json(path)
+        except (OSError, ValueError):
+            skipped += 1
+            continue
+        if not isinstance(payload, dict):
+            continue
+        if payload.get("schema") == "ec-planning-bench@1":
+            rows = [row.get("timeSample") for row in payload.get("rows", [])]
+        elif "optimize" in payload and "summary" in payload:
+            rows = [time_sample(payload)]
+        else:
+            continue
+        for sample in rows:
+            if sample is None:
+                skipped += 1
+            else:
+                samples.append(sample)
+    return samples, skipped
+
+
+def _solve(matrix: List[List[float]], rhs: List[float]) -> List[float]:
+    # Gaussian elimination with partial pivoting; the systems are 5x5.
+    size = len(rhs)
+    rows = [list(matrix[index]) + [rhs[index]] for index in range(size)]
+    for col in range(size):
+        pivot = max(range(col, size), key=lambda row: abs(rows[row][col]))
+        rows[col], rows[pivot] = rows[pivot], rows[col]
+        if abs(rows[col][col]) < 1e-12:
+            continue
+        for row in range(size):
+            if row != col:
+                factor = rows[row][col] / rows[col][col]
+                rows[row] = [a - factor * b for a, b in zip(rows[row], rows[col])]
+    return [
+        rows[index][size] / rows[index][index] if abs(rows[index][index]) >= 1e-12 else 0.0
+        for index in range(size)
+    ]
+
+
+def _fit_log_linear(xs: List[List[float]], ys: List[float]) -> Dict[str, Any]:
+    # Ridge least squares on log(ms) over as many leading features as the
+    # sample count supports; sigma is the residual spread, used to pad
+    # predictions towards the upper tail.
+    width = max(2, min(len(xs[0]), len(ys) // SAMPLES_PER_COEFFICIENT))
+    xs = [x[:width] for x in xs]
+    gram = [
+        [sum(x[i] * x[j] for x in xs) + (RIDGE if i == j and i > 0 else 0.0) for j in range(width)]
+        for i in range(width)
+    ]
+    moment = [sum(x[i] * y for x, y in zip(xs, ys)) for i in range(width)]
+    coef = _solve(gram, moment)
+    residuals = [y - sum(c * v for c, v in zip(coef, x)) for x, y in zip(xs, ys)]
+    sigma = math.sqrt(sum(r * r for r in residuals) / max(1, len(ys) - width)) if len(ys) > width else 0.5
+    return {"coef": [round(value, 6) for value in coef], "sigma": round(sigma, 6), "samples": len(ys)}
+
+
+def fit_time_model(samples: List[Dict[str, Any]]) -> Dict[str, Any]:
+    xs = [_vector(sample["instance"]) for sample in samples]
+    reach = {}
+    for level in QUALITY_LEVELS:
+        ys = [math.log(max(1, sample["reachMs"][str(level)])) for sample in samples]
+        reach[str(level)] = _fit_log_linear(xs, ys) if len(ys) >= MIN_SAMPLES else None
+    feasible = [(x, math.log(sample["feasibleMs"])) for x, sample in zip(xs, samples) if sample.get("feasibleMs")]
+    feasible_fit = None
+    if len(feasible) >= MIN_SAMPLES:
+        feasible_fit = _fit_log_linear([x for x, _ in feasible], [y for _, y in feasible])
+    return {
+        "schema": TIME_MODEL_SCHEMA,
+        "createdAt": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "features": list(FEATURE_NAMES),
+        "samples": len(samples),
+        "reach": reach,
+        "feasible": feasible_fit,
+    }
+
+
+def load_time_model(path: str) -> Optional[Dict[str, Any]]:
+    if not path or not os.path.exists(path):
+        return None
+    model = read_json(path)
+    return model if model.get("schema") == TIME_MODEL_SCHEMA else None
+
+
+def save_time_model(path: str, model: Dict[str, Any]) -> None:
+    write_json(path, model)
+
+
+def _predict_ms(fit: Dict[str, Any], features: Dict[str, Any]) -> float:
+    # exp(mean + sigma): about the 84th percentile of the fitted log-normal.
+    return math.exp(sum(c * v for c, v in zip(fit["coef"], _vector(features, len(fit["coef"])))) + fit["sigma"])
+
+
+def predict_time(
+    features: Dict[str, Any],
+    model: Optional[Dict[str, Any]],
+    *,
+    quality: float = 0.99,
+) -> Dict[str, Any]:
+    # Recommended time limit and phase1 ratio for reaching `quality` of the
+    # achievable score. The phase1 cap is three times the predicted time to
+    # a first feasible plan; without a phase1 fit phase1Ratio is None.
+    level = min((value for value in QUALITY_LEVELS if value >= quality), default=QUALITY_LEVELS[-1])
+    fit = (model or {}).get("reach", {}).get(str(level))
+    if fit is not None:
+        source = "model"
+        reach_sec = _predict_ms(fit, features) / 1000
+    else:
+        # No history yet: roughly 10 s plus 2 s per thousand candidate pairs.
+        source = "heuristic"
+        reach_sec = 10 + features["candidatePairs"] / 500
+    feasible_fit = (model or {}).get("feasible")
+    feasible_sec = _predict_ms(feasible_fit, features) / 1000 if feasible_fit is not None else None
+    time_limit = int(min(MAX_TIME_SEC, max(MIN_TIME_SEC, math.ceil(reach_sec * 1.2))))
+    phase1_ratio = None
+    if feasible_sec is not None:
+        phase1_ratio = round(min(0.5, max(0.05, 3 * feasible_sec / time_limit)), 3)
+    return {
+        "source": source,
+        "quality": level,
+        "samples": (model or {}).get("samples", 0),
+        "predictedReachSec": round(reach_sec, 2),
+        "predictedFeasibleSec": None if feasible_sec is None else round(feasible_sec, 2),
+        "timeLimitSec": time_limit,
+        "phase1Ratio": phase1_ratio,
+        "instance": features,
+    }
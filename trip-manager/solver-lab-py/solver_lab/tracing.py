@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import contextvars
+import functools
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Any, Callable, ContextManager, Dict, Iterator, List, Optional, Tuple
+
+TIMINGS_SCHEMA = "ec-planning-timings@1"
+
+# Tracer of the run in progress. A context variable rather than a global so
+# service jobs running in parallel threads each record into their own tracer.
+_CURRENT: "contextvars.ContextVar[Optional[Tracer]]" = contextvars.ContextVar("solver_lab_tracer", default=None)
+
+
+# Nested spans with wall and CPU time. CPU time is process-wide, so it includes
+# the CP-SAT worker threads: cpuMs well above wallMs means parallel search.
+#
+# Every span is folded into a per-path aggregate (count, wall, cpu), which is
+# what the report's "timings" block shows; the raw events for a Chrome trace
+# are kept up to max_events, after which only the aggregates grow.
+class Tracer:
+    def __init__(self, *, max_events: int = 100_000) -> None:
+        self.max_events = max(0, int(max_events))
+        self.dropped_events = 0
+        self.events: List[Dict[str, Any]] = []
+        self._origin_wall = time.perf_counter()
+        self._origin_cpu = time.process_time()
+        self._stack: List[Tuple[str, Tuple[str, ...], float, float, Dict[str, Any]]] = []
+        self._totals: Dict[Tuple[str, ...], List[float]] = {}
+        self._tid = threading.get_ident()
+
+    def start(self, name: str, **args: Any) -> None:
+        path = (self._stack[-1][1] if self._stack else ()) + (name,)
+        self._stack.append((name, path, time.perf_counter(), time.process_time(), args))
+
+    def stop(self, name: str) -> None:
+        # Unmatched stops are ignored: pipeline phases that were skipped
+        # (precheck passed in, resumed runs) still report phase_end.
+        if not self._stack or self._stack[-1][0] != name:
+            return
+        _, path, wall_start, cpu_start, args = self._stack.pop()
+        wall = time.perf_counter() - wall_start
+        cpu = time.process_time() - cpu_start
+        totals = self._totals.setdefault(path, [0, 0.0, 0.0, wall_start])
+        totals[0] += 1
+        totals[1] += wall
+        totals[2] += cpu
+        if len(self.events) >= self.max_events:
+            self.dropped_events += 1
+            return
+        event: Dict[str, Any] = {
+            "name": name,
+            "ph": "X",
+            "ts": round((wall_start - self._origin_wall) * 1e6, 1),
+            "dur": round(wall * 1e6, 1),
+            "pid": os.getpid(),
+            "tid": self._tid,
+            "args": dict(args, cpuMs=round(cpu * 1000, 3)),
+        }
+        self.events.append(event)
+
+    @contextmanager
+    def span(self, name: str, **args: Any) -> Iterator[None]:
+        self.start(name, **args)
+        try:
+            yield
+        finally:
+            self.stop(name)
+
+    @contextmanager
+    def activate(self) -> Iterator["Tracer"]:
+        token = _CURRENT.set(self)
+        try:
+            yield self
+        finally:
+            _CURRENT.reset(token)
+
+    def summary(self) -> Dict[str, Any]:
+        root: Dict[str, Any] = {"children": {}}
+        for path, (count, wall, cpu, first_start) in self._totals.items():
+            node = root
+            for name in path:
+                node = node["children"].setdefault(name, {"name": name, "children": {}, "first": first_start})
+            node.update(
+                first=first_start, count=int(count), wallMs=round(wall * 1000, 3), cpuMs=round(cpu * 1000, 3)
+            )
+
+        def export(node: Dict[str, Any]) -> List[Dict[str, Any]]:
+            rows = []
+            # Paths close children-first; list siblings in start order instead.
+            for child in sorted(node["children"].values(), key=lambda row: row["first"]):
+                row = {key: child[key] for key in ("name", "count", "wallMs", "cpuMs") if key in child}
+                children = export(child)
+                if children:
+                    row["children"] = children
+                rows.append(row)
+            return rows
+
+        return {
+            "schema": TIMINGS_SCHEMA,
+            "totalMs": round((time.perf_counter() - self._origin_wall) * 1000, 3),
+            "cpuMs": round((time.process_time() - self._origin_cpu) * 1000, 3),
+            "spans": export(root),
+            "droppedEvents": self.dropped_events,
+        }
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        # Load in chrome://tracing or https://ui.perfetto.dev.
+        return {
+            "traceEvents": list(self.events),
+            "displayTimeUnit": "ms",
+            "otherData": {"schema": TIMINGS_SCHEMA, "droppedEvents": self.dropped_events},
+        }
+
+
+def current_tracer() -> Optional[Tracer]:
+    return _CURRENT.get()
+
+
+def span(name: str, **args: Any) -> ContextManager[Any]:
+    tracer = _CURRENT.get()
+    if tracer is None:
+        return nullcontext()
+    return tracer.span(name, **args)
+
+
+def traced(name: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    def decorate(function: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(function)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            tracer = _CURRENT.get()
+            if tracer is None:
+                return function(*args, **kwargs)
+            with tracer.span(name):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
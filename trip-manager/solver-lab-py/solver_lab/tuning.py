@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import itertools
+import random
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from .benchmark import run_benchmark
+from .presets import CONFIG_KEYS, CP_SAT_KEYS, PRESET_SCHEMA
+
+TUNING_SCHEMA = "ec-planning-tuning@1"
+# Default search space; lns_iter_time_sec 0 keeps the built-in 2-3 s per
+# iteration, lns_max_iterations 0 means no limit.
+SEARCH_SPACE: Dict[str, List[Any]] = {
+    "workers": [1, 2, 4, 8],
+    "phase1_ratio": [0.1, 0.25, 0.4],
+    "lns_iter_time_sec": [0, 1, 3],
+    "lns_max_iterations": [0, 50],
+    "linearization_level": [0, 1, 2],
+    "cp_model_presolve": [True, False],
+    "symmetry_level": [0, 2],
+}
+
+
+def grid_trials(space: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    names = sorted(space)
+    return [dict(zip(names, values)) for values in itertools.product(*(space[name] for name in names))]
+
+
+def random_trials(space: Dict[str, List[Any]], count: int, seed: int) -> List[Dict[str, Any]]:
+    # Distinct draws; stops early when the space is smaller than count.
+    rng = random.Random(int(seed))
+    names = sorted(space)
+    total = 1
+    for name in names:
+        total *= len(space[name])
+    trials: List[Dict[str, Any]] = []
+    seen = set()
+    while len(trials) < min(int(count), total):
+        values = tuple(rng.choice(space[name]) for name in names)
+        if values not in seen:
+            seen.add(values)
+            trials.append(dict(zip(names, values)))
+    return trials
+
+
+def trial_config(base_config: Dict[str, Any], params: Dict[str, Any]) -> Dict[str, Any]:
+    unknown = set(params) - set(CONFIG_KEYS) - set(CP_SAT_KEYS)
+    if unknown:
+        raise ValueError(f"cannot tune {', '.join(sorted(unknown))}; choose from {', '.join(CONFIG_KEYS + CP_SAT_KEYS)}")
+    config = dict(base_config, preset="")
+    config.update({key: value for key, value in params.items() if key in CONFIG_KEYS})
+    config["cp_sat_params"] = {key: value for key, value in params.items() if key in CP_SAT_KEYS}
+    return config
+
+
+def _rank(trials: List[Dict[str, Any]]) -> None:
+    # Quality is the score relative to the best any trial reached on the same
+    # case and seed; ties go to the faster trial.
+    best: Dict[Any, int] = {}
+    for trial in trials:
+        for row in trial["rows"]:
+            key = (row["case"], row["seed"])
+            best[key] = max(best.get(key, row["score"]), row["score"])
+    for trial in trials:
+        rows = trial["rows"]
+        quality = []
+        for row in rows:
+            top = best[(row["case"], row["seed"])]
+            quality.append(1 - (top - row["score"]) / max(1, abs(top)))
+        trial["violations"] = sum(row["hardViolations"] + row["mustVisitMissing"] for row in rows)
+        trial["quality"] = round(sum(quality) / max(1, len(quality)), 6)
+        trial["meanTotalMs"] = round(sum(row["totalMs"] for row in rows) / max(1, len(rows)), 3)
+    trials.sort(key=lambda trial: (trial["violations"], -trial["quality"], trial["meanTotalMs"]))
+    for rank, trial in enumerate(trials, start=1):
+        trial["rank"] = rank
+
+
+def run_tuning(
+    cases: List[Dict[str, Any]],
+    base_config: Dict[str, Any],
+    trials: List[Dict[str, Any]],
+    *,
+    seeds: List[int],
+    on_trial: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
+    # Every trial solves every case once per seed, each in a fresh process.
+    results: List[Dict[str, Any]] = []
+    started_at = time.time()
+    for index, params in enumerate(trials):
+        config = trial_config(base_config, params)
+        rows: List[Dict[str, Any]] = []
+        for seed in seeds:
+            for row in run_benchmark(cases, dict(config, seed=int(seed)))["rows"]:
+                rows.append(
+                    {
+                        "case": row["case"],
+                        "seed": int(seed),
+                        "candidatePairs": row["candidatePairs"],
+                        "score": row["score"],
+                        "totalMs": row["totalMs"],
+                        "lnsIterations": row["lnsIterations"],
+                        "stopReason": row["stopReason"],
+                        "peakRssMb": row["peakRssMb"],
+                        "hardViolations": row["hardViolations"],
+                        "mustVisitMissing": row["mustVisitMissing"],
+                    }
+                )
+        trial = {"trial": index, "params": params, "rows": rows}
+        results.append(trial)
+        if on_trial is not None:
+            on_trial(trial)
+    _rank(results)
+    return {
+        "schema": TUNING_SCHEMA,
+        "createdAt": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "elapsedMs": int((time.time() - started_at) * 1000),
+        "config": base_config,
+        "cases": cases,
+        "seeds": list(seeds),
+        "trials": results,
+    }
+
+
+def best_preset(result: Dict[str, Any], name: str) -> Dict[str, Any]:
+    best = result["trials"][0]
+    pairs = [row["candidatePairs"] for row in best["rows"]]
+    return {
+        "schema": PRESET_SCHEMA,
+        "name": name,
+        "config": {key: value for key, value in best["params"].items() if key in CONFIG_KEYS},
+        "cpSat": {key: value for key, value in best["params"].items() if key in CP_SAT_KEYS},
+        "tunedOn": {
+            "cases": [case["name"] for case in result["cases"]],
+            "candidatePairs": [min(pairs), max(pairs)],
+            "timeLimitSec": result["config"]["time_limit_sec"],
+            "seeds": result["seeds"],
+            "createdAt": result["createdAt"],
+        },
+        "tuning": {
+            "trials": len(result["trials"]),
+            "quality": best["quality"],
+            "meanTotalMs": best["meanTotalMs"],
+        },
+    }
+
+
+def format_tuning_table(result: Dict[str, Any], limit: int = 10) -> List[str]:
+    names = sorted({name for trial in result["trials"] for name in trial["params"]})
+    header = ["rank", "quality", "mean_ms", "viol"] + names
+    lines = [header]
+    for trial in result["trials"][:limit]:
+        lines.append(
+            [str(trial["rank"]), f"{trial['quality']:.4f}", f"{trial['meanTotalMs']:.0f}", str(trial["violations"])]
+            + [str(trial["params"].get(name, "")) for name in names]
+        )
+    widths = [max(len(line[index]) for line in lines) for index in range(len(header))]
+    return ["  ".join(cell.ljust(widths[index]) for index, cell in enumerate(line)).rstrip() for line in lines]
@@ -1,16 +1,57 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List, Set, Tuple
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 from .constraints import (
     has_capacity,
+    is_group_type_allowed,
     is_location_available,
+    is_location_open,
     make_group_slot_key,
     make_usage_key,
 )
+from .tracing import traced
 
+# From this many rows validate_solution checks columns in bulk with numpy
+# (installed with ortools); below it the per-row loop is faster.
+COLUMNAR_MIN_ROWS = 2000
+# Violation types in check order; a row reports the first check it fails.
+CHECKS = (
+    "missing_group",
+    "missing_location",
+    "out_of_scope",
+    "out_of_group_range",
+    "invalid_slot",
+    "group_slot_conflict",
+    "location_unavailable",
+    "capacity",
+)
+_NUMPY: Any = None
+_NUMPY_LOADED = False
+
+
+def _load_numpy() -> Any:
+    global _NUMPY, _NUMPY_LOADED
+    if not _NUMPY_LOADED:
+        try:
+            import numpy  # type: ignore
+
+            _NUMPY = numpy
+        except ImportError:
+            _NUMPY = None
+        _NUMPY_LOADED = True
+    return _NUMPY
 
+
+@traced("validate_solution")
 def validate_solution(normalized: Dict[str, Any], assignments: List[Dict[str, Any]]) -> Dict[str, Any]:
+    if len(assignments) >= COLUMNAR_MIN_ROWS and _load_numpy() is not None:
+        return validate_solution_columnar(normalized, assignments)
+    return _validate_rows(normalized, assignments)
+
+
+def _validate_rows(normalized: Dict[str, Any], assignments: List[Dict[str, Any]]) -> Dict[str, Any]:
     groups_by_id = normalized["groups_by_id"]
     locations_by_id = normalized["locations_by_id"]
     slot_windows = normalized["slot_windows"]
@@ -114,6 +155,15 @@ def validate_solution(normalized: Dict[str, Any], assignments: List[Dict[str, An
         if location_id in required_by_group.get(group_id, set()):
             required_coverage.add((group_id, location_id))
 
+    return {
+        "hard_violations": hard_violations,
+        "must_visit_missing": _must_visit_missing(required_by_group, required_coverage),
+    }
+
+
+def _must_visit_missing(
+    required_by_group: Dict[int, Set[int]], required_coverage: Set[Tuple[int, int]]
+) -> List[Dict[str, Any]]:
     must_visit_missing: List[Dict[str, Any]] = []
     for group_id, required_set in required_by_group.items():
         for location_id in required_set:
@@ -121,9 +171,339 @@ def validate_solution(normalized: Dict[str, Any], assignments: List[Dict[str, An
                 must_visit_missing.append(
                     {"group_id": group_id, "location_id": location_id}
                 )
+    return must_visit_missing
+
+
+# Fields per violation type, in the order the per-row loop writes them.
+_VIOLATION_FIELDS = {
+    "missing_group": ("group_id",),
+    "missing_location": ("location_id",),
+    "out_of_scope": ("date",),
+    "out_of_group_range": ("group_id", "date"),
+    "invalid_slot": ("time_slot",),
+    "group_slot_conflict": ("group_id", "date", "time_slot"),
+    "location_unavailable": ("group_id", "location_id", "date", "time_slot"),
+    "capacity": ("location_id", "date", "time_slot"),
+}
+
+
+def validate_solution_columnar(normalized: Dict[str, Any], assignments: List[Dict[str, Any]]) -> Dict[str, Any]:
+    # Same output as the per-row loop, checked a column at a time. Groups,
+    # locations, dates and slots become integer codes (dates sorted, so range
+    # checks are code comparisons); availability is evaluated once per
+    # distinct (location, group type) and (location, date, slot); capacity
+    # sums usage per key and replays rows in order only for keys that
+    # overflow, since a row that fails capacity does not use any.
+    np = _load_numpy()
+    groups_by_id = normalized["groups_by_id"]
+    locations_by_id = normalized["locations_by_id"]
+    slot_windows = normalized["slot_windows"]
+    required_by_group = normalized["required_by_group"]
+    scope = normalized["scope"]
+    count = len(assignments)
+
+    group_ids = [int(row["group_id"]) for row in assignments]
+    location_ids = [int(row["location_id"]) for row in assignments]
+    dates = [str(row["date"]) for row in assignments]
+    slots = [str(row["time_slot"]).upper() for row in assignments]
+    participants = np.fromiter((int(row["participant_count"]) for row in assignments), dtype=np.int64, count=count)
+
+    group_list = list(groups_by_id)
+    group_index = {group_id: index for index, group_id in enumerate(group_list)}
+    location_list = list(locations_by_id)
+    location_index = {location_id: index for index, location_id in enumerate(location_list)}
+    date_values = sorted(set(dates))
+    date_index = {date: index for index, date in enumerate(date_values)}
+    slot_values = sorted(set(slots))
+    slot_index = {slot: index for index, slot in enumerate(slot_values)}
+    g = np.fromiter((group_index.get(value, -1) for value in group_ids), dtype=np.int64, count=count)
+    loc = np.fromiter((location_index.get(value, -1) for value in location_ids), dtype=np.int64, count=count)
+    d = np.fromiter((date_index[value] for value in dates), dtype=np.int64, count=count)
+    s = np.fromiter((slot_index[value] for value in slots), dtype=np.int64, count=count)
+    date_count, slot_count = max(1, len(date_values)), max(1, len(slot_values))
+
+    status = np.full(count, -1, dtype=np.int64)
+
+    def flag(mask: Any, check: str) -> None:
+        status[(status < 0) & mask] = CHECKS.index(check)
+
+    flag(g < 0, "missing_group")
+    flag(loc < 0, "missing_location")
+    g_safe, loc_safe = np.maximum(g, 0), np.maximum(loc, 0)
+    low = bisect_left(date_values, scope["start_date"])
+    high = bisect_right(date_values, scope["end_date"])
+    flag((d < low) | (d >= high), "out_of_scope")
+    group_low = np.array([bisect_left(date_values, groups_by_id[gid]["start_date"]) for gid in group_list] or [0])
+    group_high = np.array([bisect_right(date_values, groups_by_id[gid]["end_date"]) for gid in group_list] or [0])
+    flag((d < group_low[g_safe]) | (d >= group_high[g_safe]), "out_of_group_range")
+    slot_ok = np.array([value in slot_windows for value in slot_values] or [False])
+    flag(~slot_ok[s], "invalid_slot")
+
+    # first row per (group, date, slot) keeps it, later ones conflict
+    alive = np.flatnonzero(status < 0)
+    slot_keys = (g[alive] * date_count + d[alive]) * slot_count + s[alive]
+    _, first = np.unique(slot_keys, return_index=True)
+    repeated = np.ones(len(alive), dtype=bool)
+    repeated[first] = False
+    conflict = np.zeros(count, dtype=bool)
+    conflict[alive[repeated]] = True
+    flag(conflict, "group_slot_conflict")
+
+    alive = np.flatnonzero(status < 0)
+    available = np.ones(count, dtype=bool)
+    if len(alive):
+        pairs, pair_inverse = np.unique(loc_safe[alive] * len(group_list) + g_safe[alive], return_inverse=True)
+        pair_ok = np.array(
+            [
+                is_group_type_allowed(
+                    locations_by_id[location_list[int(pair) // len(group_list)]],
+                    groups_by_id[group_list[int(pair) % len(group_list)]],
+                )
+                for pair in pairs
+            ]
+        )
+        cells = (loc_safe[alive] * date_count + d[alive]) * slot_count + s[alive]
+        cells, cell_inverse = np.unique(cells, return_inverse=True)
+        cell_ok = []
+        for cell in cells.tolist():
+            location_code, rest = divmod(cell, date_count * slot_count)
+            date_code, slot_code = divmod(rest, slot_count)
+            cell_ok.append(
+                is_location_open(
+                    location=locations_by_id[location_list[location_code]],
+                    date=date_values[date_code],
+                    slot_window=slot_windows[slot_values[slot_code]],
+                )
+            )
+        available[alive] = pair_ok[pair_inverse.ravel()] & np.array(cell_ok)[cell_inverse.ravel()]
+    flag(~available, "location_unavailable")
 
+    capacities = np.array(
+        [int(locations_by_id[location_id].get("capacity", 0) or 0) for location_id in location_list] or [0]
+    )
+    capped = np.flatnonzero((status < 0) & (capacities[loc_safe] > 0))
+    over_capacity = np.zeros(count, dtype=bool)
+    if len(capped):
+        usage_keys = (loc_safe[capped] * date_count + d[capped]) * slot_count + s[capped]
+        keys, key_inverse = np.unique(usage_keys, return_inverse=True)
+        key_inverse = key_inverse.ravel()
+        totals = np.bincount(key_inverse, weights=participants[capped], minlength=len(keys))
+        has_negative = np.bincount(key_inverse, weights=participants[capped] < 0, minlength=len(keys)) > 0
+        key_capacity = capacities[keys // (date_count * slot_count)]
+        # With non-negative counts the running sum peaks at the total.
+        replay = (totals > key_capacity) | has_negative
+        rows = capped[replay[key_inverse]]
+        used: Dict[int, int] = {}
+        for row, key, amount, capacity in zip(
+            rows.tolist(),
+            usage_keys[replay[key_inverse]].tolist(),
+            participants[rows].tolist(),
+            capacities[loc_safe[rows]].tolist(),
+        ):
+            if used.get(key, 0) + amount <= capacity:
+                used[key] = used.get(key, 0) + amount
+            else:
+                over_capacity[row] = True
+    flag(over_capacity, "capacity")
+
+    hard_violations: List[Dict[str, Any]] = []
+    flagged = np.flatnonzero(status >= 0)
+    for idx, code in zip(flagged.tolist(), status[flagged].tolist()):
+        values = {"group_id": group_ids[idx], "location_id": location_ids[idx], "date": dates[idx], "time_slot": slots[idx]}
+        check = CHECKS[code]
+        violation: Dict[str, Any] = {"type": check, "index": idx}
+        for field in _VIOLATION_FIELDS[check]:
+            violation[field] = values[field]
+        hard_violations.append(violation)
+    placed = np.flatnonzero(status < 0)
+    covered = {
+        (group_list[int(code) // len(location_list)], location_list[int(code) % len(location_list)])
+        for code in np.unique(g[placed] * len(location_list) + loc[placed]).tolist()
+    }
     return {
         "hard_violations": hard_violations,
-        "must_visit_missing": must_visit_missing,
+        "must_visit_missing": _must_visit_missing(required_by_group, covered),
     }
 
+
+
+# Plan state for move-by-move checking: accepted rows by group slot, people
+# per (date, slot, location) and how many rows visit each required pair.
+# check() tells in O(1) whether a move keeps the plan legal (None) or which
+# check it would fail (the validate_solution violation type); apply() makes a
+# legal move and returns its inverse, which undo() applies. Moves are dicts:
+#   {"op": "add", "row": row}
+#   {"op": "remove", "key": group_slot_key}
+#   {"op": "move", "key": group_slot_key, "location_id": location_id}
+#   {"op": "swap", "keys": [group_slot_key, group_slot_key]}  # exchange locations
+# Initial rows that validate_solution would flag stay out of the state and
+# are listed in `rejected`, so the state is always a legal plan and audit()
+# equals validate_solution(normalized, state.assignments()).
+class IncrementalValidator:
+    def __init__(self, normalized: Dict[str, Any], assignments: Optional[List[Dict[str, Any]]] = None) -> None:
+        self.normalized = normalized
+        self.rows: Dict[str, Dict[str, Any]] = {}
+        self.usage: Dict[str, int] = {}
+        self.coverage: Dict[Tuple[int, int], int] = {}
+        self.rejected: List[Dict[str, Any]] = []
+        for idx, row in enumerate(assignments or []):
+            move = {"op": "add", "row": row}
+            problem = self.check(move)
+            if problem is None:
+                self._apply(move)
+                continue
+            values = {
+                "group_id": int(row["group_id"]),
+                "location_id": int(row["location_id"]),
+                "date": str(row["date"]),
+                "time_slot": str(row["time_slot"]).upper(),
+            }
+            violation: Dict[str, Any] = {"type": problem, "index": idx}
+            for field in _VIOLATION_FIELDS[problem]:
+                violation[field] = values[field]
+            self.rejected.append(violation)
+
+    @staticmethod
+    def _clean(row: Dict[str, Any]) -> Dict[str, Any]:
+        return dict(
+            row,
+            group_id=int(row["group_id"]),
+            location_id=int(row["location_id"]),
+            date=str(row["date"]),
+            time_slot=str(row["time_slot"]).upper(),
+            participant_count=int(row["participant_count"]),
+        )
+
+    def _row(self, key: str) -> Dict[str, Any]:
+        row = self.rows.get(key)
+        if row is None:
+            raise ValueError(f"no assignment for {key}")
+        return row
+
+    def _available(self, row: Dict[str, Any], location_id: int) -> bool:
+        location = self.normalized["locations_by_id"][location_id]
+        return is_location_available(
+            location=location,
+            group=self.normalized["groups_by_id"][row["group_id"]],
+            date=row["date"],
+            slot_window=self.normalized["slot_windows"][row["time_slot"]],
+        )
+
+    def _over_capacity(self, deltas: Dict[Tuple[str, int], int]) -> bool:
+        # deltas: people added per (date|slot, location); only growth can overflow.
+        for (date_slot, location_id), delta in deltas.items():
+            capacity = int(self.normalized["locations_by_id"][location_id].get("capacity", 0) or 0)
+            if delta > 0 and capacity > 0:
+                if self.usage.get(f"{date_slot}|{location_id}", 0) + delta > capacity:
+                    return True
+        return False
+
+    def check(self, move: Dict[str, Any]) -> Optional[str]:
+        op = move.get("op")
+        groups_by_id = self.normalized["groups_by_id"]
+        locations_by_id = self.normalized["locations_by_id"]
+        if op == "remove":
+            self._row(move["key"])
+            return None
+        if op == "add":
+            row = self._clean(move["row"])
+            group = groups_by_id.get(row["group_id"])
+            if group is None:
+                return "missing_group"
+            if row["location_id"] not in locations_by_id:
+                return "missing_location"
+            scope = self.normalized["scope"]
+            if row["date"] < scope["start_date"] or row["date"] > scope["end_date"]:
+                return "out_of_scope"
+            if row["date"] < group["start_date"] or row["date"] > group["end_date"]:
+                return "out_of_group_range"
+            if row["time_slot"] not in self.normalized["slot_windows"]:
+                return "invalid_slot"
+            if make_group_slot_key(row["group_id"], row["date"], row["time_slot"]) in self.rows:
+                return "group_slot_conflict"
+            if not self._available(row, row["location_id"]):
+                return "location_unavailable"
+            deltas = {(f"{row['date']}|{row['time_slot']}", row["location_id"]): row["participant_count"]}
+            return "capacity" if self._over_capacity(deltas) else None
+        if op == "move":
+            row = self._row(move["key"])
+            location_id = int(move["location_id"])
+            if location_id == row["location_id"]:
+                return None
+            if location_id not in locations_by_id:
+                return "missing_location"
+            if not self._available(row, location_id):
+                return "location_unavailable"
+            deltas = {(f"{row['date']}|{row['time_slot']}", location_id): row["participant_count"]}
+            return "capacity" if self._over_capacity(deltas) else None
+        if op == "swap":
+            first, second = (self._row(key) for key in move["keys"])
+            if first is second or first["location_id"] == second["location_id"]:
+                return None
+            if not self._available(first, second["location_id"]) or not self._available(second, first["location_id"]):
+                return "location_unavailable"
+            deltas: Dict[Tuple[str, int], int] = {}
+            for row, location_id in ((first, second["location_id"]), (second, first["location_id"])):
+                date_slot = f"{row['date']}|{row['time_slot']}"
+                deltas[(date_slot, row["location_id"])] = deltas.get((date_slot, row["location_id"]), 0) - row["participant_count"]
+                deltas[(date_slot, location_id)] = deltas.get((date_slot, location_id), 0) + row["participant_count"]
+            return "capacity" if self._over_capacity(deltas) else None
+        raise ValueError(f"unknown move op {op!r}")
+
+    def _place(self, row: Dict[str, Any], sign: int) -> None:
+        usage_key = make_usage_key(row["date"], row["time_slot"], row["location_id"])
+        self.usage[usage_key] = self.usage.get(usage_key, 0) + sign * row["participant_count"]
+        if row["location_id"] in self.normalized["required_by_group"].get(row["group_id"], set()):
+            pair = (row["group_id"], row["location_id"])
+            self.coverage[pair] = self.coverage.get(pair, 0) + sign
+
+    def _apply(self, move: Dict[str, Any]) -> Dict[str, Any]:
+        op = move["op"]
+        if op == "add":
+            row = self._clean(move["row"])
+            key = make_group_slot_key(row["group_id"], row["date"], row["time_slot"])
+            self.rows[key] = row
+            self._place(row, 1)
+            return {"op": "remove", "key": key}
+        if op == "remove":
+            row = self.rows.pop(move["key"])
+            self._place(row, -1)
+            return {"op": "add", "row": row}
+        if op == "move":
+            row = self.rows[move["key"]]
+            self._place(row, -1)
+            self.rows[move["key"]] = dict(row, location_id=int(move["location_id"]))
+            self._place(self.rows[move["key"]], 1)
+            return {"op": "move", "key": move["key"], "location_id": row["location_id"]}
+        first_key, second_key = move["keys"]
+        first, second = self.rows[first_key], self.rows[second_key]
+        self._place(first, -1)
+        self._place(second, -1)
+        self.rows[first_key] = dict(first, location_id=second["location_id"])
+        self.rows[second_key] = dict(second, location_id=first["location_id"])
+        self._place(self.rows[first_key], 1)
+        self._place(self.rows[second_key], 1)
+        return {"op": "swap", "keys": [first_key, second_key]}
+
+    def apply(self, move: Dict[str, Any]) -> Dict[str, Any]:
+        problem = self.check(move)
+        if problem is not None:
+            raise ValueError(f"{move['op']} would break the plan: {problem}")
+        return self._apply(move)
+
+    def undo(self, inverse: Dict[str, Any]) -> None:
+        # The inverse of a legal move from a legal state is legal.
+        self._apply(inverse)
+
+    def covers(self, group_id: int, location_id: int) -> bool:
+        return self.coverage.get((int(group_id), int(location_id)), 0) > 0
+
+    def assignments(self) -> List[Dict[str, Any]]:
+        return list(self.rows.values())
+
+    def audit(self) -> Dict[str, Any]:
+        covered = {pair for pair, count in self.coverage.items() if count > 0}
+        return {
+            "hard_violations": [],
+            "must_visit_missing": _must_visit_missing(self.normalized["required_by_group"], covered),
+        }
@@ -0,0 +1,40 @@
+import json
+import multiprocessing
+import os
+import time
+
+import pytest
+
+from solver_lab import batch
+from solver_lab.generator import generate_preset
+from solver_lab.pipeline import build_config
+
+pytestmark = pytest.mark.skipif(
+    multiprocessing.get_start_method() != "fork", reason="the patched pipeline reaches workers only through fork"
+)
+
+
+def test_dead_worker_keeps_the_summary(tmp_path, monkeypatch):
+    real_run = batch.run_pipeline
+
+    def run_pipeline(payload, config, **kwargs):
+        if payload.get("crash"):
+            time.sleep(3)  # let the other job finish first
+            os._exit(1)
+        return real_run(payload, config, **kwargs)
+
+    monkeypatch.setattr(batch, "run_pipeline", run_pipeline)
+    good = tmp_path / "good.json"
+    crash = tmp_path / "crash.json"
+    good.write_text(json.dumps(generate_preset("xs", seed=1)), encoding="utf-8")
+    crash.write_text(json.dumps({"crash": True}), encoding="utf-8")
+
+    config = build_config(seed=1, time_limit_sec=1, workers=1)
+    summary = batch.run_batch([str(good), str(crash)], str(tmp_path / "out"), config, processes=2)
+    rows = {os.path.basename(row["input"]): row for row in summary["rows"]}
+    assert rows["crash.json"]["status"] == "failed"
+    assert "BrokenProcessPool" in rows["crash.json"]["error"]
+    assert rows["good.json"]["status"] in ("ok", "violations")
+    assert os.path.exists(rows["good.json"]["resultPath"])
+    assert sum(summary["statusCounts"].values()) == 2
+    assert len(batch.format_summary_table(summary)) == 3
@@ -0,0 +1,47 @@
+import random
+
+import pytest
+
+from solver_lab import batch_score
+from solver_lab.generator import generate_preset
+from solver_lab.normalize import normalize_input
+from solver_lab.optimize_lns import _score_solution
+from solver_lab.task_space import build_task_space
+from solver_lab.validate import validate_solution
+
+pytest.importorskip("numpy")
+
+
+def _random_plan(task_space, rng):
+    plan = []
+    for task in task_space["tasks"]:
+        if task["candidate_location_ids"] and rng.random() < 0.8:
+            plan.append(
+                {
+                    "group_id": task["group_id"],
+                    "location_id": rng.choice(task["candidate_location_ids"]),
+                    "date": task["date"],
+                    "time_slot": task["time_slot"],
+                    "participant_count": task["participant_count"],
+                }
+            )
+    return plan
+
+
+@pytest.mark.parametrize("chunk_cells", [batch_score.CHUNK_CELLS, 1000])
+def test_batch_scores_match_score_solution(monkeypatch, chunk_cells):
+    monkeypatch.setattr(batch_score, "CHUNK_CELLS", chunk_cells)
+    payload = generate_preset("s", seed=11, existing_share=0.3, cluster_share=0.4, capacity_tightness=1.2)
+    normalized = normalize_input(payload)
+    task_space = build_task_space(normalized)
+    tables = batch_score.build_score_tables(normalized, task_space)
+    plans = [[]] + [_random_plan(task_space, random.Random(seed)) for seed in range(40)]
+
+    out = batch_score.score_batch(tables, batch_score.plans_to_matrix(tables, plans))
+    assert out["scores"].tolist() == [_score_solution(normalized, plan) for plan in plans]
+    for index, plan in enumerate(plans):
+        violations = {row["type"] for row in validate_solution(normalized, plan)["hard_violations"]}
+        assert bool(out["capacity_ok"][index]) == ("capacity" not in violations)
+        assert bool(out["candidate_ok"][index])
+    # both capacity outcomes are covered
+    assert len(set(out["capacity_ok"].tolist())) == 2
@@ -0,0 +1,52 @@
+import time
+
+import pytest
+
+from solver_lab import explain_infeasible as explain_module
+from solver_lab import solve_feasible as feasible_module
+from solver_lab.generator import generate_preset
+from solver_lab.normalize import normalize_input
+from solver_lab.pipeline import build_config
+from solver_lab.precheck import run_precheck
+
+pytest.importorskip("ortools")
+
+
+def test_empty_core_is_unconditional(monkeypatch):
+    normalized = normalize_input(generate_preset("xs", seed=2))
+    task_space = run_precheck(normalized)["task_space"]
+    calls = []
+
+    def solve(bundle, assumptions, **kwargs):
+        calls.append(len(assumptions))
+        return {"status": "INFEASIBLE", "core": []}
+
+    monkeypatch.setattr(explain_module, "solve_with_assumptions", solve)
+    result = explain_module.explain_infeasibility(normalized, task_space, time_limit_sec=5, seed=1)
+    assert result["status"] == "unconditional"
+    assert result["conflicts"] == [] and result["minimal"] is False
+    assert len(calls) == 1
+
+
+def test_explain_uses_what_is_left_of_the_run(monkeypatch):
+    normalized = normalize_input(generate_preset("xs", seed=2))
+    precheck = run_precheck(normalized)
+    config = build_config(seed=1, time_limit_sec=20, workers=2, phase1_ratio=0.5, explain_infeasible=True)
+    limits = []
+
+    def solve(bundle, **kwargs):
+        return {"status": "INFEASIBLE", "assignments": []}
+
+    def explain(normalized, task_space, *, time_limit_sec, seed):
+        limits.append(time_limit_sec)
+        return {"status": "explained", "conflicts": [], "groups": [], "locations": []}
+
+    monkeypatch.setattr(feasible_module, "solve_cp_model", solve)
+    monkeypatch.setattr(feasible_module, "explain_infeasibility", explain)
+
+    feasible_module.solve_feasible(normalized, config, precheck, started_at=time.time() - 16)
+    assert 3 <= limits[-1] <= 4  # 20 s run, 16 s gone: not the 10 s phase1 share
+
+    phase1 = feasible_module.solve_feasible(normalized, config, precheck, started_at=time.time() - 19.5)
+    assert len(limits) == 1
+    assert phase1["infeasibility"]["status"] == "no_time"
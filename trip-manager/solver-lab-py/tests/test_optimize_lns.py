@@ -0,0 +1,92 @@
+import random
+import time
+
+import pytest
+
+from solver_lab.generator import generate_preset
+from solver_lab.model_cp_sat import build_cp_model, solve_cp_model
+from solver_lab.normalize import normalize_input
+from solver_lab.optimize_lns import (
+    _assignment_index,
+    _build_released_model,
+    _merge_released,
+    _score_solution,
+    optimize_with_lns,
+)
+from solver_lab.pipeline import build_config
+from solver_lab.precheck import run_precheck
+from solver_lab.solve_feasible import _solve_greedy_feasible
+
+pytest.importorskip("ortools")
+
+
+def test_released_model_objective_tracks_full_score():
+    normalized = normalize_input(generate_preset("s", seed=5))
+    task_space = run_precheck(normalized)["task_space"]
+    full = solve_cp_model(build_cp_model(normalized, task_space), time_limit_sec=5, workers=4, seed=1)
+    incumbent = _assignment_index(full["assignments"])
+    base_score = _score_solution(normalized, full["assignments"])
+
+    # the sub-model objective differs from the full score by a constant, so
+    # re-solving the incumbent's own neighbourhood never loses score
+    rng = random.Random(0)
+    keys = sorted(task_space["tasks_by_key"])
+    offsets = set()
+    for seed in range(4):
+        release_keys = set(rng.sample(keys, max(2, len(keys) // 5)))
+        bundle = _build_released_model(normalized, task_space, incumbent, release_keys)
+        hints = {key: incumbent[key] for key in release_keys if key in incumbent}
+        solved = solve_cp_model(bundle, time_limit_sec=5, workers=4, seed=seed, hints=hints)
+        assert solved["assignments"]
+        merged = _merge_released(task_space, incumbent, release_keys, solved["assignments"])
+        assert _score_solution(normalized, merged) >= base_score
+
+        # same objective as the full model with the other tasks pinned
+        pinned = build_cp_model(
+            normalized,
+            task_space,
+            fixed_tasks={key: location for key, location in incumbent.items() if key not in release_keys},
+        )
+        pinned_result = solve_cp_model(pinned, time_limit_sec=5, workers=4, seed=seed, hints=incumbent)
+        if solved["status"] == "OPTIMAL" and pinned_result["status"] == "OPTIMAL":
+            offsets.add(_score_solution(normalized, merged) - _score_solution(normalized, pinned_result["assignments"]))
+    assert offsets <= {0}
+
+
+def _stalled_run(should_stop):
+    # Greedy phase1 and a run that stops before its first LNS iteration, so
+    # the polish pass has rows to add.
+    normalized = normalize_input(generate_preset("s", seed=5))
+    task_space = run_precheck(normalized)["task_space"]
+    phase1 = _solve_greedy_feasible(normalized, task_space)
+    config = dict(build_config(seed=1, time_limit_sec=30, workers=4, stall_sec=1e-6), lns_submodel=True)
+    events = []
+    result = optimize_with_lns(
+        normalized,
+        phase1,
+        config,
+        time.time(),
+        should_stop=should_stop,
+        task_space=task_space,
+        on_improvement=lambda event, assignments: events.append((event, assignments)),
+    )
+    return normalized, phase1, result, events
+
+
+def test_polish_gain_is_reported_as_an_improvement():
+    normalized, _, result, events = _stalled_run(None)
+    polish = result["diagnostics"]["polish"]
+    assert result["diagnostics"]["stop_reason"] == "stall_seconds"
+    assert polish["gain"] > 0
+    event, assignments = events[-1]
+    assert event["iter"] == "polish"
+    assert assignments == result["assignments"]
+    assert event["score"] == result["diagnostics"]["final_score"] == _score_solution(normalized, assignments)
+
+
+def test_polish_is_skipped_after_cancel():
+    _, phase1, result, events = _stalled_run(lambda: True)
+    assert result["diagnostics"]["stop_reason"] == "cancelled"
+    assert result["diagnostics"]["polish"]["skipped"] == "cancelled"
+    assert result["assignments"] == phase1["assignments"]
+    assert not events
@@ -0,0 +1,55 @@
+import pytest
+
+from solver_lab import replan as replan_module
+from solver_lab.constraints import make_group_slot_key
+from solver_lab.generator import generate_preset
+from solver_lab.model_cp_sat import build_cp_model, solve_cp_model
+from solver_lab.normalize import normalize_input
+from solver_lab.pipeline import build_config
+from solver_lab.precheck import run_precheck
+
+pytest.importorskip("ortools")
+
+
+def test_full_escalation_keeps_unaffected_assignments(monkeypatch):
+    payload = generate_preset("s", seed=3)
+    normalized = normalize_input(payload)
+    config = build_config(seed=1, time_limit_sec=20, workers=4)
+    bundle = build_cp_model(normalized, run_precheck(normalized)["task_space"], with_objective=True)
+    previous = solve_cp_model(bundle, time_limit_sec=10, workers=4, seed=1)["assignments"]
+    assert previous
+
+    # close the location of one assignment for a day; no group must visit it
+    required = set().union(*normalized["required_by_group"].values())
+    closed = next(row for row in previous if row["location_id"] not in required)
+    for location in payload["data"]["locations"]:
+        if location["id"] == closed["location_id"]:
+            location["closedDates"] = sorted(set(location["closedDates"]) | {closed["date"]})
+    normalized = normalize_input(payload)
+    precheck = run_precheck(normalized)
+
+    # the two narrow neighbourhoods find nothing, so replan escalates to "full"
+    real_solve = replan_module.solve_cp_model
+    calls = []
+
+    def solve(bundle, **kwargs):
+        calls.append(kwargs)
+        if len(calls) < 3:
+            return {"status": "INFEASIBLE", "assignments": []}
+        return real_solve(bundle, **kwargs)
+
+    monkeypatch.setattr(replan_module, "solve_cp_model", solve)
+    result = replan_module.replan(normalized, precheck, previous, config)
+    assert result["diagnostics"]["escalation"] == "full"
+
+    previous_index = {
+        make_group_slot_key(row["group_id"], row["date"], row["time_slot"]): row["location_id"] for row in previous
+    }
+    affected = replan_module.find_affected_tasks(normalized, precheck["task_space"], previous_index)
+    final = {
+        make_group_slot_key(row["group_id"], row["date"], row["time_slot"]): row["location_id"]
+        for row in result["assignments"]
+    }
+    unaffected = [key for key in affected["valid_index"] if key not in affected["task_keys"]]
+    assert unaffected
+    assert all(final.get(key) == affected["valid_index"][key] for key in unaffected)
@@ -0,0 +1,72 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from solver_lab.constraints import make_usage_key
+from solver_lab.generator import generate_preset
+from solver_lab.normalize import normalize_input
+from solver_lab.shared_data import SharedDataset
+from solver_lab.task_space import build_task_space
+
+
+def _snapshot(name):
+    # Runs in a spawned worker: attach by name, read, close.
+    with SharedDataset.attach(name) as dataset:
+        candidates = [list(dataset.candidates(position)) for position in range(dataset.counts["tasks"])]
+        return candidates, list(dataset.arrays["incumbent"]), dataset.incumbent_usage()
+
+
+def _plan(task_space, step):
+    return [
+        {
+            "group_id": task["group_id"],
+            "location_id": task["candidate_location_ids"][position % len(task["candidate_location_ids"])],
+            "date": task["date"],
+            "time_slot": task["time_slot"],
+            "participant_count": task["participant_count"],
+        }
+        for position, task in enumerate(task_space["tasks"])
+        if task["candidate_location_ids"] and position % step == 0
+    ]
+
+
+def test_attach_round_trip():
+    normalized = normalize_input(generate_preset("s", seed=4))
+    task_space = build_task_space(normalized)
+    location_ids = [int(row["id"]) for row in normalized["locations"]]
+    plan = _plan(task_space, 2)
+
+    with SharedDataset.create(normalized, task_space, incumbent=plan) as owner:
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            candidates, incumbent, usage = pool.submit(_snapshot, owner.name).result()
+
+        assert [[location_ids[index] for index in row] for row in candidates] == [
+            list(task["candidate_location_ids"]) for task in task_space["tasks"]
+        ]
+        by_task = {
+            (row["group_id"], row["date"], row["time_slot"]): location_ids.index(row["location_id"]) for row in plan
+        }
+        assert incumbent == [
+            by_task.get((task["group_id"], task["date"], task["time_slot"]), -1) for task in task_space["tasks"]
+        ]
+        expected = {}
+        for row in plan:
+            key = make_usage_key(row["date"], row["time_slot"], row["location_id"])
+            expected[key] = expected.get(key, 0) + row["participant_count"]
+        assert {
+            make_usage_key(owner.dates[date], owner.slot_keys[slot], location_ids[location]): people
+            for (date, slot, location), people in usage.items()
+        } == expected
+
+        # the owner's set_incumbent is what a newly attached reader sees
+        owner.set_incumbent(normalized, task_space, _plan(task_space, 3))
+        with SharedDataset.attach(owner.name) as reader:
+            assert list(reader.arrays["incumbent"]) == list(owner.arrays["incumbent"])
+            assert reader.incumbent_usage() == owner.incumbent_usage()
+        name = owner.name
+
+    # close() on the owner unlinks the block
+    with pytest.raises(FileNotFoundError):
+        SharedDataset.attach(name)
@@ -0,0 +1,137 @@
+import copy
+import random
+
+import pytest
+
+from solver_lab.generator import generate_preset
+from solver_lab.normalize import normalize_input
+from solver_lab.task_space import build_task_space
+from solver_lab.validate import (
+    COLUMNAR_MIN_ROWS,
+    IncrementalValidator,
+    _validate_rows,
+    validate_solution,
+    validate_solution_columnar,
+)
+
+def _random_rows(normalized, rng, count, corrupt):
+    group_ids = sorted(normalized["groups_by_id"])
+    location_ids = sorted(normalized["locations_by_id"])
+    dates = sorted({group[field] for group in normalized["groups"] for field in ("start_date", "end_date")})
+    slots = list(normalized["slot_keys"])
+    if corrupt:
+        # unknown ids, dates outside scope, bad slots, odd participant counts
+        group_ids += [99999]
+        location_ids += [88888]
+        dates += ["2000-01-01", "2999-12-31"]
+        slots += ["EVENING", "morning", "NOPE"]
+    rows = []
+    for _ in range(count):
+        group_id = rng.choice(group_ids)
+        rows.append(
+            {
+                "group_id": str(group_id) if corrupt and rng.random() < 0.1 else group_id,
+                "location_id": rng.choice(location_ids),
+                "date": rng.choice(dates),
+                "time_slot": rng.choice(slots),
+                "participant_count": rng.choice([0, -30, 5, 200]) if corrupt else rng.randint(1, 60),
+            }
+        )
+    return rows
+
+
+@pytest.mark.parametrize("corrupt", [False, True])
+def test_columnar_matches_row_loop(corrupt):
+    pytest.importorskip("numpy")
+    normalized = normalize_input(generate_preset("m", seed=7))
+    for trial in range(5):
+        rng = random.Random(trial)
+        rows = _random_rows(normalized, rng, COLUMNAR_MIN_ROWS + rng.randint(0, 2000), corrupt)
+        expected = _validate_rows(normalized, rows)
+        assert expected["hard_violations"]
+        assert validate_solution_columnar(normalized, rows) == expected
+
+
+def _random_move(state, task_space, location_ids, rng):
+    keys = sorted(state.rows)
+    op = rng.choice(["add", "remove", "move", "swap"]) if keys else "add"
+    if op == "add":
+        task = rng.choice(task_space["tasks"])
+        row = {
+            "group_id": task["group_id"],
+            "location_id": rng.choice(location_ids),
+            "date": task["date"],
+            "time_slot": task["time_slot"],
+            "participant_count": task["participant_count"],
+        }
+        return {"op": "add", "row": row}
+    if op == "remove":
+        return {"op": "remove", "key": rng.choice(keys)}
+    if op == "move":
+        return {"op": "move", "key": rng.choice(keys), "location_id": rng.choice(location_ids)}
+    return {"op": "swap", "keys": [rng.choice(keys), rng.choice(keys)]}
+
+
+def _plan_after(state, move):
+    # The move done by hand on a copy of the accepted rows.
+    rows = {key: dict(row) for key, row in state.rows.items()}
+    if move["op"] == "add":
+        return list(rows.values()) + [dict(move["row"])]
+    if move["op"] == "remove":
+        rows.pop(move["key"])
+    elif move["op"] == "move":
+        rows[move["key"]]["location_id"] = move["location_id"]
+    else:
+        first, second = move["keys"]
+        rows[first]["location_id"], rows[second]["location_id"] = (
+            state.rows[second]["location_id"],
+            state.rows[first]["location_id"],
+        )
+    return list(rows.values())
+
+
+def _nonzero(counts):
+    return {key: value for key, value in counts.items() if value}
+
+
+@pytest.mark.parametrize("seed", [1, 2])
+def test_incremental_validator_matches_validate_solution(seed):
+    normalized = normalize_input(generate_preset("s", seed=seed, capacity_tightness=1.2))
+    task_space = build_task_space(normalized)
+    location_ids = sorted(normalized["locations_by_id"])
+    rng = random.Random(seed)
+    initial = [
+        {
+            "group_id": task["group_id"],
+            "location_id": rng.choice(task["candidate_location_ids"] or location_ids),
+            "date": task["date"],
+            "time_slot": task["time_slot"],
+            "participant_count": task["participant_count"],
+        }
+        for task in task_space["tasks"]
+        if rng.random() < 0.7
+    ]
+    state = IncrementalValidator(normalized, initial)
+    assert state.rejected == validate_solution(normalized, initial)["hard_violations"]
+    assert state.audit() == validate_solution(normalized, state.assignments())
+
+    outcomes = set()
+    for _ in range(1500):
+        move = _random_move(state, task_space, location_ids, rng)
+        problem = state.check(move)
+        violations = validate_solution(normalized, _plan_after(state, move))["hard_violations"]
+        assert (problem is None) == (not violations)
+        if problem is not None:
+            assert problem in {row["type"] for row in violations}
+            outcomes.add((move["op"], "illegal"))
+            continue
+        outcomes.add((move["op"], "legal"))
+        before = (copy.deepcopy(state.rows), _nonzero(state.usage), _nonzero(state.coverage))
+        inverse = state.apply(move)
+        assert state.audit() == validate_solution(normalized, state.assignments())
+        if rng.random() < 0.3:
+            state.undo(inverse)
+            assert (state.rows, _nonzero(state.usage), _nonzero(state.coverage)) == before
+    # every op was seen both ways (remove is always legal)
+    assert outcomes >= {(op, "legal") for op in ("add", "remove", "move", "swap")}
+    assert outcomes >= {(op, "illegal") for op in ("add", "move", "swap")}